@@ -1,6 +1,11 @@
-from django.db.models.signals import pre_delete
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
+from apps.blog.models.author import Author
+from apps.blog.models.blog import Blog
+from apps.blog.models.category import Category
 from apps.blog.models.image import Image
+from apps.blog.models.tag import Tag
+from utils.response_cache import BLOG_NAMESPACE, invalidate_on_commit
 import os
 
 @receiver(pre_delete, sender=Image)
@@ -8,3 +13,24 @@ def delete_image_file(sender, instance, **kwargs):
     if instance.image_file:
         if os.path.isfile(instance.image_file.path):
             os.remove(instance.image_file.path)
+
+
+@receiver(post_save, sender=Blog)
+@receiver(post_delete, sender=Blog)
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Image)
+@receiver(post_delete, sender=Image)
+def invalidate_blog_response_cache(sender, **kwargs):
+    invalidate_on_commit(BLOG_NAMESPACE)
+
+
+@receiver(m2m_changed, sender=Blog.categories.through)
+@receiver(m2m_changed, sender=Blog.tags.through)
+def invalidate_blog_response_cache_on_m2m_change(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate_on_commit(BLOG_NAMESPACE)
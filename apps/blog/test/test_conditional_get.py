@@ -0,0 +1,40 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from apps.blog.models.author import Author
+from apps.blog.models.blog import Blog
+from apps.blog.models.tag import Tag
+
+User = get_user_model()
+
+
+class PostConditionalGetTest(APITestCase):
+    url = "/api/v1/posts/"
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(User(username="reader"))
+        with self.captureOnCommitCallbacks(execute=True):
+            author = Author.objects.create(name="Ada", bio="Writes about Django")
+            self.post = Blog.objects.create(title="Keyset pagination", content="...", author=author)
+
+    def test_list_returns_not_modified_for_matching_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_validators_follow_tag_changes(self):
+        response = self.client.get(self.url)
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+
+        with mock.patch("utils.response_cache.time.time", return_value=time.time() + 10), \
+                self.captureOnCommitCallbacks(execute=True):
+            self.post.tags.add(Tag.objects.create(name="postgres"))
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
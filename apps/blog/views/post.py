@@ -2,6 +2,8 @@ from rest_framework import generics, permissions
 from drf_spectacular.utils import extend_schema
 from apps.blog.models.blog import Blog
 from apps.blog.serializers.blog_serializer import BlogSerializer, BlogCreateUpdateSerializer
+from utils.conditional_get import conditional_get
+from utils.response_cache import BLOG_NAMESPACE
 
 
 class PostList(generics.ListCreateAPIView):
@@ -23,6 +25,7 @@ class PostList(generics.ListCreateAPIView):
         tags=["Blog"],
         responses={200: BlogSerializer(many=True)}
     )
+    @conditional_get(namespace=BLOG_NAMESPACE)
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
@@ -50,6 +53,7 @@ class PostDetail(generics.RetrieveUpdateDestroyAPIView):
         tags=["Blog"],
         responses={200: BlogSerializer}
     )
+    @conditional_get(detail=True, namespace=BLOG_NAMESPACE)
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
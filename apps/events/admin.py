@@ -4,7 +4,7 @@ from apps.events.models import (
     Event, EventCity, EventRegion,
     EventVenue, EventTag, Reservation,
     Speaker, SpeakerSocialMedia, SpeakerSpeciality,
-    AvailableSocialMedia,
+    AvailableSocialMedia, NotificationCampaign, NotificationCampaignChunk,
 )
 
 admin.site.register(Event)
@@ -17,3 +17,5 @@ admin.site.register(Speaker)
 admin.site.register(SpeakerSocialMedia)
 admin.site.register(SpeakerSpeciality)
 admin.site.register(AvailableSocialMedia)
+admin.site.register(NotificationCampaign)
+admin.site.register(NotificationCampaignChunk)
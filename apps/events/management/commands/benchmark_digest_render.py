@@ -0,0 +1,101 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.utils.html import conditional_escape
+from django.utils.timezone import now
+
+from apps.events.models import Event, EventCity, EventVenue
+from services import MailService, SMSService
+from services.mail_service import RECIPIENT_NAME_PLACEHOLDER
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Measure the per-recipient cost of rendering the monthly digest, per user vs rendered once'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--events',
+            type=int,
+            nargs='+',
+            default=[1, 10, 50],
+            help='Number of events in the digest (default: 1 10 50)'
+        )
+        parser.add_argument(
+            '--recipients',
+            type=int,
+            default=500,
+            help='Recipients per measurement (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        recipients = [
+            User(username=f"benchmark{index}", first_name=f"Benchmark {index}")
+            for index in range(options['recipients'])
+        ]
+        mail_service = MailService()
+        sms_service = SMSService()
+
+        self.stdout.write(
+            f"{'events':>8} {'email per user (us)':>20} {'email once (us)':>16} "
+            f"{'sms per user (us)':>18} {'sms once (us)':>14}"
+        )
+        for count in options['events']:
+            events = self.build_events(count)
+            event_items = [
+                {"title": event.title, "when": event.date.strftime("%b %d"), "url": f"https://example.com/{event.slug}"}
+                for event in events[:3]
+            ]
+
+            def email_per_user():
+                for user in recipients:
+                    render_to_string("mails/upcoming_events.html", context={
+                        "user": user, "events": events, "site_url": "https://djangocameroon.org",
+                    })
+
+            def email_once():
+                body = mail_service.render_upcoming_events(events)
+                for user in recipients:
+                    body.replace(RECIPIENT_NAME_PLACEHOLDER, conditional_escape(user.first_name or user.username))
+
+            def sms_per_user():
+                for _ in recipients:
+                    sms_service.render_upcoming_events_digest_sms(event_items, "https://djangocameroon.org")
+
+            def sms_once():
+                message = sms_service.render_upcoming_events_digest_sms(event_items, "https://djangocameroon.org")
+                for _ in recipients:
+                    len(message)
+
+            self.stdout.write(
+                f"{count:>8} {self.measure(email_per_user, len(recipients)):>20.1f} "
+                f"{self.measure(email_once, len(recipients)):>16.1f} "
+                f"{self.measure(sms_per_user, len(recipients)):>18.1f} "
+                f"{self.measure(sms_once, len(recipients)):>14.1f}"
+            )
+
+    def build_events(self, count):
+        venue = EventVenue(name="Benchmark venue", city=EventCity(name="Douala"))
+        return [
+            Event(
+                title=f"Benchmark event {index}",
+                slug=f"benchmark-event-{index}",
+                description="A benchmark event description " * 10,
+                location=venue,
+                date=now() + timedelta(days=index),
+            )
+            for index in range(count)
+        ]
+
+    def measure(self, func, recipients, repeat=3):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1_000_000 / recipients)
+        return statistics.median(timings)
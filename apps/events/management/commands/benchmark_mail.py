@@ -0,0 +1,125 @@
+import socketserver
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from services import MailService
+
+User = get_user_model()
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """
+    Just enough SMTP for Django's backend: every command is accepted and messages are discarded
+    """
+
+    def handle(self):
+        self.server.connections += 1
+        time.sleep(self.server.connect_latency)
+        self.reply("220 benchmark ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line[:4].upper()
+            if command == b"EHLO":
+                self.reply("250-benchmark", "250 8BITMIME")
+            elif command == b"DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                self.server.messages += 1
+                self.reply("250 OK")
+            elif command == b"QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("250 OK")
+
+    def reply(self, *lines):
+        self.wfile.write("".join(f"{line}\r\n" for line in lines).encode())
+
+
+class _SMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, connect_latency):
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.connect_latency = connect_latency
+        self.connections = 0
+        self.messages = 0
+
+
+class Command(BaseCommand):
+    help = 'Compare one SMTP connection per email with MailService batch mode against a local SMTP stand-in'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--messages',
+            type=int,
+            default=500,
+            help='Emails sent per run (default: 500)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Messages per connection in batch mode (default: 100)'
+        )
+        parser.add_argument(
+            '--connect-latency',
+            type=float,
+            default=50,
+            help='Milliseconds the stand-in waits before greeting, to mimic network and TLS setup (default: 50)'
+        )
+
+    def handle(self, *args, **options):
+        server = _SMTPServer(options['connect_latency'] / 1000)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        users = [
+            User(username=f"benchmark{index}", first_name="Benchmark", email=f"benchmark{index}@example.com")
+            for index in range(options['messages'])
+        ]
+
+        try:
+            with override_settings(
+                EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+                EMAIL_HOST=server.server_address[0],
+                EMAIL_PORT=server.server_address[1],
+                EMAIL_HOST_USER="",
+                EMAIL_HOST_PASSWORD="",
+                EMAIL_USE_TLS=False,
+                EMAIL_USE_SSL=False,
+                DEFAULT_FROM_EMAIL="benchmark@example.com",
+            ):
+                self.stdout.write(f"{'mode':>10} {'messages':>10} {'connections':>12} {'msg/s':>10}")
+                self.run(server, 'single', users, lambda service, run: run())
+                self.run(server, 'batch', users, lambda service, run: self.in_batch(
+                    service, run, options['batch_size'],
+                ))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def in_batch(self, service, run, batch_size):
+        with service.batch(batch_size=batch_size):
+            run()
+
+    def run(self, server, mode, users, wrap):
+        server.connections = server.messages = 0
+        service = MailService()
+
+        def send_all():
+            for user in users:
+                service.send_welcome_email(user)
+
+        started = time.perf_counter()
+        wrap(service, send_all)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{mode:>10} {server.messages:>10} {server.connections:>12} {len(users) / elapsed:>10.1f}"
+        )
@@ -0,0 +1,114 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.timezone import now
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.events.models import Event, EventCity, EventRegion, EventVenue
+from apps.users.pagination import KeysetPagination
+from mixins.api_response_mixin import APIResponseMixin
+
+
+class _EventIdSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Event
+        fields = ("id",)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compare page number and cursor pagination latency on the events list (data is rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=10,
+            help='Items per page (default: 10)'
+        )
+        parser.add_argument(
+            '--pages',
+            type=int,
+            nargs='+',
+            default=[1, 10, 100, 1000, 10000],
+            help='Pages to measure (default: 1 10 100 1000 10000)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Requests per measurement, the median is reported (default: 20)'
+        )
+
+    def handle(self, *args, **options):
+        page_size = options['page_size']
+        pages = sorted(options['pages'])
+        repeat = options['repeat']
+
+        try:
+            with transaction.atomic():
+                self.seed_events(page_size * pages[-1])
+                self.run(pages, page_size, repeat)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def seed_events(self, total):
+        region = EventRegion.objects.create(name="Benchmark")
+        city = EventCity.objects.create(name="Benchmark", region=region)
+        venue = EventVenue.objects.create(name="Benchmark", city=city)
+        start = now()
+        batch = []
+        for index in range(total):
+            batch.append(Event(
+                title=f"Benchmark event {index}",
+                slug=f"benchmark-event-{index}",
+                description="Benchmark",
+                location=venue,
+                date=start + timedelta(minutes=index),
+            ))
+            if len(batch) == 5000:
+                Event.objects.bulk_create(batch)
+                batch = []
+        Event.objects.bulk_create(batch)
+        self.stdout.write(f"Seeded {total} events")
+
+    def run(self, pages, page_size, repeat):
+        factory = APIRequestFactory()
+        view = APIResponseMixin()
+        queryset = Event.objects.all()
+        ordered_ids = Event.objects.order_by('created_at', 'id')
+
+        self.stdout.write(f"{'page':>8} {'offset (ms)':>14} {'cursor (ms)':>14}")
+        for page in pages:
+            offset_request = Request(factory.get('/api/v1/events/', {'page': page}))
+            offset_ms = self.measure(repeat, lambda: view.paginated_response(
+                offset_request, queryset, _EventIdSerializer, page_size=page_size,
+            ))
+
+            cursor = ''
+            if page > 1:
+                anchor = ordered_ids[(page - 1) * page_size - 1]
+                cursor = KeysetPagination().build_cursor(anchor, reverse=False)
+            cursor_request = Request(factory.get('/api/v1/events/', {'cursor': cursor}))
+            cursor_ms = self.measure(repeat, lambda: view.paginated_response(
+                cursor_request, queryset, _EventIdSerializer, page_size=page_size,
+            ))
+
+            self.stdout.write(f"{page:>8} {offset_ms:>14.2f} {cursor_ms:>14.2f}")
+
+    def measure(self, repeat, func):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,104 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+from twilio.http.http_client import TwilioHttpClient
+from twilio.rest import Client
+
+from services import SMSService
+
+
+class TwilioMessagesHandler(BaseHTTPRequestHandler):
+    """Answers the Twilio Messages endpoint after a fixed latency, keeping connections alive"""
+
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+    counter = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.latency)
+        with self.lock:
+            TwilioMessagesHandler.counter += 1
+            sid = f"SM{TwilioMessagesHandler.counter:032d}"
+        body = json.dumps({"sid": sid, "status": "queued", "account_sid": "ACbenchmark"}).encode()
+        self.send_response(201)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalTwilioHttpClient(TwilioHttpClient):
+    def __init__(self, base_url, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url
+
+    def request(self, method, url, *args, **kwargs):
+        return super().request(method, url.replace("https://api.twilio.com", self.base_url), *args, **kwargs)
+
+
+class NoRateLimit:
+    def acquire(self, buckets, tokens=1, max_wait=None):
+        return 0
+
+
+class Command(BaseCommand):
+    help = 'Measure SMSService.send_bulk throughput against a local stand-in for the Twilio Messages API'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--messages',
+            type=int,
+            default=200,
+            help='Messages sent per measurement (default: 200)'
+        )
+        parser.add_argument(
+            '--latency',
+            type=float,
+            default=0.3,
+            help='Seconds the stand-in takes to answer each request (default: 0.3)'
+        )
+        parser.add_argument(
+            '--in-flight',
+            type=int,
+            nargs='+',
+            default=[1, 4, 8, 16, 32],
+            help='Maximum in-flight requests to measure (default: 1 4 8 16 32)'
+        )
+
+    def handle(self, *args, **options):
+        TwilioMessagesHandler.latency = options['latency']
+        server = ThreadingHTTPServer(("127.0.0.1", 0), TwilioMessagesHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+        class BenchmarkSMSService(SMSService):
+            def _build_client(self):
+                return Client("ACbenchmark", "token", http_client=LocalTwilioHttpClient(base_url))
+
+        service = BenchmarkSMSService(rate_limiter=NoRateLimit())
+        service.from_number = "+15005550006"
+        messages = [(f"+2376700{index:05d}", "Benchmark message") for index in range(options['messages'])]
+
+        self.stdout.write(f"{options['messages']} messages, {options['latency'] * 1000:.0f} ms per request")
+        self.stdout.write(f"{'in flight':>10} {'seconds':>9} {'msg/s':>9} {'failed':>7}")
+        try:
+            for max_in_flight in options['in_flight']:
+                started = time.perf_counter()
+                results = service.send_bulk(messages, max_in_flight=max_in_flight)
+                elapsed = time.perf_counter() - started
+                failed = sum(1 for result in results if not result['success'])
+                self.stdout.write(
+                    f"{max_in_flight:>10} {elapsed:>9.2f} {len(messages) / elapsed:>9.1f} {failed:>7}"
+                )
+        finally:
+            server.shutdown()
+            server.server_close()
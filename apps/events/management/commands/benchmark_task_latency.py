@@ -0,0 +1,144 @@
+import statistics
+import time
+from datetime import timedelta
+
+from celery import current_app
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.timezone import now
+
+from apps.events.models import Event, EventCity, EventRegion, EventVenue, NotificationCampaign
+from apps.events.tasks import notify_users_on_new_event_task, send_monthly_digest_task
+from apps.users.tasks import send_email_otp_task
+
+User = get_user_model()
+
+USERNAME_PREFIX = "benchmark-latency-"
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure OTP enqueue-to-sent latency while a monthly digest is running. '
+        'Needs a broker, a result backend and the workers of docker-compose.yml running'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=5000,
+            help='Benchmark users receiving the digest (default: 5000)'
+        )
+        parser.add_argument(
+            '--samples',
+            type=int,
+            default=20,
+            help='OTPs sent while the digest runs (default: 20)'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0.5,
+            help='Seconds between two OTPs (default: 0.5)'
+        )
+        parser.add_argument(
+            '--otp-queue',
+            default=None,
+            help='Send the OTPs to this queue instead of the routed one, e.g. "bulk" to measure a shared queue'
+        )
+        parser.add_argument(
+            '--with-announcement',
+            action='store_true',
+            help='Also announce a new event to the benchmark users, filling the bulk queue with chunks'
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=600,
+            help='Seconds to wait for one OTP (default: 600)'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Run even though other active users exist, they will receive the digest too'
+        )
+
+    def handle(self, *args, **options):
+        if not settings.CELERY_RESULT_BACKEND or current_app.conf.task_always_eager:
+            raise CommandError('A result backend and real workers are needed, set CELERY_RESULT_BACKEND')
+        if User.objects.filter(is_active=True).exclude(username__startswith=USERNAME_PREFIX).exists() \
+                and not options['force']:
+            raise CommandError('The digest goes to every active user, run this against a benchmark database or --force')
+        if NotificationCampaign.objects.filter(
+            kind=NotificationCampaign.KIND_MONTHLY_DIGEST, status=NotificationCampaign.STATUS_RUNNING
+        ).exists():
+            raise CommandError('A digest campaign is already running')
+
+        started_at = now()
+        otp_user = self.create_users(options['users'])
+        event = self.create_event()
+        try:
+            send_monthly_digest_task.delay(days=30)
+            if options['with_announcement']:
+                notify_users_on_new_event_task.delay(event.pk)
+            # Let the digest start before the first OTP
+            time.sleep(1)
+
+            latencies = []
+            for _ in range(options['samples']):
+                started = time.perf_counter()
+                if options['otp_queue']:
+                    result = send_email_otp_task.apply_async(args=[otp_user.pk], queue=options['otp_queue'])
+                else:
+                    result = send_email_otp_task.delay(otp_user.pk)
+                result.get(timeout=options['timeout'])
+                latencies.append(time.perf_counter() - started)
+                time.sleep(options['interval'])
+
+            campaign = NotificationCampaign.objects.filter(kind=NotificationCampaign.KIND_MONTHLY_DIGEST).first()
+            latencies.sort()
+            self.stdout.write(
+                f"OTP queue: {options['otp_queue'] or 'routed'}, digest processed "
+                f"{campaign.processed_count if campaign else 0}/{options['users']} users meanwhile"
+            )
+            self.stdout.write(
+                f"OTP latency (ms): p50={statistics.median(latencies) * 1000:.0f} "
+                f"p95={latencies[int(len(latencies) * 0.95) - 1] * 1000:.0f} max={latencies[-1] * 1000:.0f}"
+            )
+        finally:
+            self.stdout.write('Waiting for the digest to finish before cleaning up...')
+            deadline = time.monotonic() + options['timeout']
+            while time.monotonic() < deadline and NotificationCampaign.objects.filter(
+                kind=NotificationCampaign.KIND_MONTHLY_DIGEST, status=NotificationCampaign.STATUS_RUNNING
+            ).exists():
+                time.sleep(1)
+            NotificationCampaign.objects.filter(created_at__gte=started_at).delete()
+            event.location.city.region.delete()
+            User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+
+    def create_users(self, count):
+        User.objects.bulk_create(
+            [
+                User(
+                    username=f"{USERNAME_PREFIX}{index}",
+                    email=f"{USERNAME_PREFIX}{index}@example.com",
+                    is_active=True,
+                )
+                for index in range(count)
+            ],
+            batch_size=1000,
+        )
+        return User.objects.filter(username__startswith=USERNAME_PREFIX).order_by('id').first()
+
+    def create_event(self):
+        region = EventRegion.objects.create(name="Benchmark region")
+        city = EventCity.objects.create(name="Benchmark city", region=region)
+        venue = EventVenue.objects.create(name="Benchmark venue", city=city)
+        return Event.objects.create(
+            title="Benchmark event",
+            description="Benchmark event",
+            location=venue,
+            date=now() + timedelta(days=7),
+            published=True,
+        )
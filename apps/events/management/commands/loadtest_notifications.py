@@ -0,0 +1,228 @@
+import dataclasses
+import os
+import resource
+import statistics
+import time
+from datetime import timedelta
+from functools import wraps
+from unittest import mock
+
+from celery import current_app
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.utils.timezone import now
+
+from apps.events import tasks
+from apps.events.models import (
+    Event,
+    EventCity,
+    EventRegion,
+    EventRegistration,
+    EventVenue,
+    NotificationCampaign,
+)
+from services import MailService, SMSService
+from services.fakes import FakeTwilioClient
+
+User = get_user_model()
+
+USERNAME_PREFIX = "loadtest-"
+SCENARIOS = ("new_event", "reminder", "digest")
+
+
+class DiscardingEmailBackend(locmem.EmailBackend):
+    """Locmem backend dropping the messages once sent, so that they do not pile up in memory"""
+
+    def send_messages(self, messages):
+        count = super().send_messages(messages)
+        mail.outbox.clear()
+        return count
+
+
+class SendTimer:
+    """Durations of the individual email and SMS sends, rendering and rate limiter waits included"""
+
+    def __init__(self):
+        self.latencies = []
+
+    def wrap(self, send):
+        @wraps(send)
+        def timed_send(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return send(*args, **kwargs)
+            finally:
+                # list.append is atomic, send_bulk calls this from its pool threads
+                self.latencies.append(time.perf_counter() - started)
+
+        return timed_send
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        'Load test the new event, reminder and digest notifications end to end with synthetic users, '
+        'the locmem email backend and a fake Twilio client. Tasks run eagerly in this process'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            type=int,
+            nargs='+',
+            default=[1000, 10000, 100000],
+            help='Synthetic users of each run (default: 1000 10000 100000)'
+        )
+        parser.add_argument(
+            '--scenarios',
+            nargs='+',
+            choices=SCENARIOS,
+            default=list(SCENARIOS),
+            help='Notifications to send (default: all)'
+        )
+        parser.add_argument(
+            '--sms',
+            action='store_true',
+            help='Send the SMS too, through the fake Twilio client'
+        )
+        parser.add_argument(
+            '--sms-latency',
+            type=float,
+            default=0.0,
+            help='Seconds the fake Twilio client takes per message (default: 0)'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Run even though other active users exist, they will be notified too'
+        )
+
+    def handle(self, *args, **options):
+        if User.objects.filter(is_active=True).exclude(username__startswith=USERNAME_PREFIX).exists() \
+                and not options['force']:
+            raise CommandError('Every active user is notified, run this against a load test database or --force')
+
+        client = FakeTwilioClient(latency=options['sms_latency'])
+        prefs = dataclasses.replace(
+            tasks.get_notification_preferences(),
+            send_new_event_email=True,
+            send_new_event_sms=options['sms'],
+            send_event_reminder_email=True,
+            send_event_reminder_sms=options['sms'],
+            send_upcoming_digest_email=True,
+            send_upcoming_digest_sms=options['sms'],
+        )
+        timer = SendTimer()
+        conf = current_app.conf
+        # The settings are read under the CELERY_ namespace, setting conf.task_always_eager would not be seen
+        eager = conf.task_always_eager, conf.task_eager_propagates
+        conf['CELERY_TASK_ALWAYS_EAGER'] = conf['CELERY_TASK_EAGER_PROPAGATES'] = True
+        try:
+            with override_settings(
+                EMAIL_BACKEND=f"{__name__}.DiscardingEmailBackend",
+                SMS_RATE_LIMIT_PER_SENDER={"rate": 1e9, "capacity": 1e9},
+                SMS_RATE_LIMIT_PER_COUNTRY={},
+            ), mock.patch.dict(os.environ, {"TWILIO_PHONE_NUMBER": "+15005550006"}), \
+                    mock.patch.object(SMSService, '_build_client', lambda service: client), \
+                    mock.patch.object(MailService, '_send', timer.wrap(MailService._send)), \
+                    mock.patch.object(SMSService, 'send_sms', timer.wrap(SMSService.send_sms)), \
+                    mock.patch.object(tasks, 'get_notification_preferences', lambda: prefs):
+                self.stdout.write(
+                    f"{'users':>7} {'scenario':>9} {'seconds':>8} {'users/min':>10} {'messages':>9} "
+                    f"{'p50 send ms':>12} {'p95 send ms':>12} {'queries':>8} {'peak RSS MB':>12}"
+                )
+                for user_count in options['users']:
+                    self.run(user_count, options['scenarios'], options['sms'], timer)
+        finally:
+            conf['CELERY_TASK_ALWAYS_EAGER'], conf['CELERY_TASK_EAGER_PROPAGATES'] = eager
+
+    def run(self, user_count, scenarios, send_sms, timer):
+        started_at = now()
+        region = EventRegion.objects.create(name="Load test region")
+        try:
+            users = self.create_users(user_count, send_sms)
+            venue = EventVenue.objects.create(
+                name="Load test venue", city=EventCity.objects.create(name="Load test city", region=region)
+            )
+            for scenario in scenarios:
+                if scenario == "new_event":
+                    event = self.create_event(venue, timedelta(days=7))
+                    result = self.measure(timer, tasks.notify_users_on_new_event_task, event.pk)
+                elif scenario == "reminder":
+                    event = self.create_event(venue, timedelta(hours=24))
+                    EventRegistration.objects.bulk_create(
+                        [
+                            # generate_registration_code collides within 100k registrations
+                            EventRegistration(event=event, user_id=user_id, registration_code=f"LOAD-{index:08d}")
+                            for index, user_id in enumerate(users)
+                        ],
+                        batch_size=1000,
+                    )
+                    result = self.measure(timer, tasks.send_event_reminders_task, hours=24, send_sms=send_sms)
+                else:
+                    self.create_event(venue, timedelta(days=14))
+                    result = self.measure(timer, tasks.send_monthly_digest_task, days=30, send_sms=send_sms)
+                self.report(user_count, scenario, *result)
+        finally:
+            NotificationCampaign.objects.filter(created_at__gte=started_at).delete()
+            region.delete()
+            User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+
+    def measure(self, timer, task, *args, **kwargs):
+        """
+        Run the task and everything it enqueues
+        :return: (seconds, duration of each send, query count)
+        """
+        timer.latencies = []
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            task.delay(*args, **kwargs)
+            elapsed = time.perf_counter() - started
+        return elapsed, sorted(timer.latencies), counter.count
+
+    def report(self, user_count, scenario, elapsed, latencies, queries):
+        p50 = statistics.median(latencies) * 1000 if latencies else 0
+        p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)] * 1000 if latencies else 0
+        # Kilobytes on Linux
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.stdout.write(
+            f"{user_count:>7} {scenario:>9} {elapsed:>8.2f} {user_count / elapsed * 60:>10.0f} {len(latencies):>9} "
+            f"{p50:>12.1f} {p95:>12.1f} {queries:>8} {peak_rss:>12.0f}"
+        )
+
+    def create_users(self, count, with_phone_number):
+        User.objects.bulk_create(
+            [
+                User(
+                    username=f"{USERNAME_PREFIX}{index}",
+                    email=f"{USERNAME_PREFIX}{index}@example.com",
+                    phone_number=f"+2376{index:08d}" if with_phone_number else None,
+                    is_active=True,
+                )
+                for index in range(count)
+            ],
+            batch_size=1000,
+        )
+        return list(User.objects.filter(username__startswith=USERNAME_PREFIX).values_list('id', flat=True))
+
+    def create_event(self, venue, starts_in):
+        return Event.objects.create(
+            title="Load test event",
+            description="Load test event",
+            location=venue,
+            date=now() + starts_in,
+            published=True,
+        )
@@ -1,5 +1,8 @@
 from django.core.management.base import BaseCommand
-from apps.events.tasks import send_monthly_digest_task
+from django.utils.timezone import now
+
+from apps.events.models import NotificationCampaign
+from apps.events.tasks import process_digest_campaign_task, send_monthly_digest_task
 
 
 class Command(BaseCommand):
@@ -17,9 +20,63 @@ class Command(BaseCommand):
             action='store_true',
             help='Send SMS digest in addition to email (requires phone_number on user)'
         )
+        parser.add_argument(
+            '--status',
+            action='store_true',
+            help='Show the progress of the latest digest campaigns instead of sending'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Queue the running digest campaign again from its last checkpoint, e.g. after a worker crash'
+        )
 
     def handle(self, *args, **options):
+        if options['status']:
+            self.show_status()
+            return
+
+        if options['resume']:
+            campaign = NotificationCampaign.objects.filter(
+                kind=NotificationCampaign.KIND_MONTHLY_DIGEST,
+                status=NotificationCampaign.STATUS_RUNNING,
+            ).first()
+            if not campaign:
+                self.stdout.write(self.style.WARNING('No running digest campaign to resume.'))
+                return
+            if campaign.is_leased:
+                self.stdout.write(self.style.WARNING(
+                    f'Digest campaign {campaign.id} is being sent, its lease expires at '
+                    f'{campaign.lease_expires_at:%Y-%m-%d %H:%M:%S}.'
+                ))
+                return
+            process_digest_campaign_task.delay(str(campaign.id))
+            self.stdout.write(self.style.SUCCESS(
+                f'Resuming digest campaign {campaign.id} after user {campaign.last_processed_user_id}.'
+            ))
+            return
+
         days = options['days']
         send_sms = bool(options.get('send_sms'))
         send_monthly_digest_task.delay(days=days, send_sms=send_sms)
         self.stdout.write(self.style.SUCCESS('Queued monthly digest notifications via Celery.'))
+
+    def show_status(self):
+        campaigns = NotificationCampaign.objects.filter(
+            kind=NotificationCampaign.KIND_MONTHLY_DIGEST,
+        )[:5]
+        if not campaigns:
+            self.stdout.write('No digest campaign yet.')
+            return
+
+        for campaign in campaigns:
+            total = campaign.total_recipients or 1
+            elapsed = (campaign.finished_at or now()) - campaign.created_at
+            self.stdout.write(
+                f"{campaign.id} {campaign.status:<22} "
+                f"{campaign.processed_count}/{campaign.total_recipients} "
+                f"({100 * campaign.processed_count / total:.0f}%) "
+                f"sent={campaign.sent_count} failed={campaign.failed_count} "
+                f"started={campaign.created_at:%Y-%m-%d %H:%M} elapsed={str(elapsed).split('.')[0]} "
+                f"checkpoint={campaign.last_processed_user_id or '-'}"
+            )
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0005_project_is_featured'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['created_at', 'id'], name='events_created_25cb16_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['created_at', 'id'], name='reservation_created_f73f9a_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:50
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+BACKFILL_SEARCH_VECTOR = """
+UPDATE events SET search_vector =
+    setweight(to_tsvector('simple', coalesce(title, '')), 'A')
+    || setweight(to_tsvector('simple', coalesce((
+        SELECT string_agg(event_tags.name, ' ') FROM event_tags
+        INNER JOIN events_tags ON events_tags.eventtag_id = event_tags.id
+        WHERE events_tags.event_id = events.id
+    ), '')), 'B')
+    || setweight(to_tsvector('simple', coalesce((
+        SELECT string_agg(speakers.name, ' ') FROM speakers
+        INNER JOIN events_speakers ON events_speakers.speaker_id = speakers.id
+        WHERE events_speakers.event_id = events.id
+    ), '')), 'B')
+    || setweight(to_tsvector('simple', coalesce(description, '')), 'C');
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0006_keyset_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, help_text='Full-text index of the title, description, tags and speakers', null=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='events_search__f2494b_gin'),
+        ),
+        migrations.RunSQL(BACKFILL_SEARCH_VECTOR, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,131 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:54
+
+import django.db.models.deletion
+import utils.main
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0007_event_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCampaign',
+            fields=[
+                ('id', models.UUIDField(
+                    default=utils.main.generate_uuid, editable=False, help_text='Unique identifier for this object',
+                    primary_key=True, serialize=False,
+                )),
+                ('active', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('kind', models.CharField(
+                    choices=[('new_event', 'New event')], help_text='The notification being sent', max_length=30,
+                    verbose_name='Kind',
+                )),
+                ('status', models.CharField(
+                    choices=[
+                        ('running', 'Running'), ('completed', 'Completed'),
+                        ('completed_with_errors', 'Completed with errors'),
+                    ],
+                    default='running', help_text='Campaign status', max_length=30, verbose_name='Status',
+                )),
+                ('send_email', models.BooleanField(default=True, verbose_name='Send email')),
+                ('send_sms', models.BooleanField(default=False, verbose_name='Send SMS')),
+                ('total_chunks', models.PositiveIntegerField(
+                    default=0, help_text='Number of chunks the audience was split into', verbose_name='Total chunks',
+                )),
+                ('completed_chunks', models.PositiveIntegerField(
+                    default=0, help_text='Number of chunks processed, successfully or not',
+                    verbose_name='Completed chunks',
+                )),
+                ('failed_chunks', models.PositiveIntegerField(
+                    default=0, help_text='Number of chunks that stopped on an error', verbose_name='Failed chunks',
+                )),
+                ('sent_count', models.PositiveIntegerField(
+                    default=0, help_text='Number of users notified', verbose_name='Sent',
+                )),
+                ('failed_count', models.PositiveIntegerField(
+                    default=0, help_text='Number of users that could not be notified', verbose_name='Failed',
+                )),
+                ('finished_at', models.DateTimeField(
+                    blank=True, help_text='Time when the last chunk was processed', null=True,
+                    verbose_name='Finished at',
+                )),
+                ('created_by', models.ForeignKey(
+                    editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL,
+                    related_name='created_%(class)s_set', to=settings.AUTH_USER_MODEL,
+                )),
+                ('event', models.ForeignKey(
+                    blank=True, help_text='The event the notification is about', null=True,
+                    on_delete=django.db.models.deletion.CASCADE, related_name='notification_campaigns',
+                    to='events.event', verbose_name='Event',
+                )),
+                ('updated_by', models.ForeignKey(
+                    editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL,
+                    related_name='updated_%(class)s_set', to=settings.AUTH_USER_MODEL,
+                )),
+            ],
+            options={
+                'verbose_name': 'Notification Campaign',
+                'verbose_name_plural': 'Notification Campaigns',
+                'db_table': 'notification_campaigns',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='NotificationCampaignChunk',
+            fields=[
+                ('id', models.UUIDField(
+                    default=utils.main.generate_uuid, editable=False, help_text='Unique identifier for this object',
+                    primary_key=True, serialize=False,
+                )),
+                ('active', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('first_user_id', models.UUIDField(
+                    help_text='Lowest user id of the chunk, inclusive', verbose_name='First user id',
+                )),
+                ('last_user_id', models.UUIDField(
+                    help_text='Highest user id of the chunk, inclusive', verbose_name='Last user id',
+                )),
+                ('status', models.CharField(
+                    choices=[
+                        ('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'),
+                        ('failed', 'Failed'),
+                    ],
+                    default='pending', help_text='Chunk status', max_length=20, verbose_name='Status',
+                )),
+                ('sent_count', models.PositiveIntegerField(default=0, verbose_name='Sent')),
+                ('failed_count', models.PositiveIntegerField(default=0, verbose_name='Failed')),
+                ('error', models.TextField(
+                    blank=True, help_text='The error that stopped the chunk, if any', verbose_name='Error',
+                )),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished at')),
+                ('campaign', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE, related_name='chunks',
+                    to='events.notificationcampaign', verbose_name='Campaign',
+                )),
+                ('created_by', models.ForeignKey(
+                    editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL,
+                    related_name='created_%(class)s_set', to=settings.AUTH_USER_MODEL,
+                )),
+                ('updated_by', models.ForeignKey(
+                    editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL,
+                    related_name='updated_%(class)s_set', to=settings.AUTH_USER_MODEL,
+                )),
+            ],
+            options={
+                'verbose_name': 'Notification Campaign Chunk',
+                'verbose_name_plural': 'Notification Campaign Chunks',
+                'db_table': 'notification_campaign_chunks',
+                'ordering': ['first_user_id'],
+                'indexes': [models.Index(fields=['campaign', 'status'], name='notificatio_campaig_2d2a69_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0008_notification_campaigns'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationcampaign',
+            name='last_processed_user_id',
+            field=models.UUIDField(
+                blank=True, help_text='Checkpoint, users up to this id (in id order) have been processed', null=True,
+                verbose_name='Last processed user id',
+            ),
+        ),
+        migrations.AddField(
+            model_name='notificationcampaign',
+            name='parameters',
+            field=models.JSONField(
+                blank=True, default=dict,
+                help_text='Everything needed to resume the campaign, e.g. the events of a digest',
+                verbose_name='Parameters',
+            ),
+        ),
+        migrations.AddField(
+            model_name='notificationcampaign',
+            name='lease_expires_at',
+            field=models.DateTimeField(
+                blank=True,
+                help_text='Renewed after each batch, another run may take the campaign over once it has passed',
+                null=True, verbose_name='Lease expires at',
+            ),
+        ),
+        migrations.AddField(
+            model_name='notificationcampaign',
+            name='lease_owner',
+            field=models.UUIDField(
+                blank=True, help_text='Run currently sending the campaign, only it may checkpoint', null=True,
+                verbose_name='Lease owner',
+            ),
+        ),
+        migrations.AddField(
+            model_name='notificationcampaign',
+            name='total_recipients',
+            field=models.PositiveIntegerField(
+                default=0, help_text='Size of the audience when the campaign started', verbose_name='Total recipients',
+            ),
+        ),
+        migrations.AlterField(
+            model_name='notificationcampaign',
+            name='finished_at',
+            field=models.DateTimeField(
+                blank=True, help_text='Time when the campaign finished', null=True, verbose_name='Finished at',
+            ),
+        ),
+        migrations.AlterField(
+            model_name='notificationcampaign',
+            name='kind',
+            field=models.CharField(
+                choices=[('new_event', 'New event'), ('monthly_digest', 'Monthly digest')],
+                help_text='The notification being sent', max_length=30, verbose_name='Kind',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='notificationcampaign',
+            index=models.Index(fields=['kind', 'status'], name='notificatio_kind_ce9167_idx'),
+        ),
+    ]
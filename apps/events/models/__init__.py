@@ -3,3 +3,4 @@ from .reservation import Reservation
 from .speaker import Speaker, SpeakerSocialMedia, SpeakerSpeciality, AvailableSocialMedia
 from .event_registration import EventRegistration, EventAttendanceStats
 from .projects import Project
+from .notification_campaign import NotificationCampaign, NotificationCampaignChunk
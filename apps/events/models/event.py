@@ -1,3 +1,5 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
@@ -75,13 +77,17 @@ class Event(BaseModel):
         default=False, help_text=_("Whether the event is published"),
         verbose_name=_("Event published"),
     )
+    search_vector = SearchVectorField(
+        null=True, editable=False,
+        help_text=_("Full-text index of the title, description, tags and speakers"),
+    )
 
     def __str__(self):
         return self.title
 
     def get_calendar_ics(self):
         calendar_service = CalendarService()
-        ics_content = calendar_service.generate_event_ics(self)
+        ics_content = calendar_service.get_event_ics(self)
         filename = calendar_service.generate_filename(self)
         return filename, ics_content
 
@@ -100,6 +106,10 @@ class Event(BaseModel):
         verbose_name = _("Event")
         verbose_name_plural = _("Events")
         unique_together = ("title", "date", "location")
+        indexes = [
+            models.Index(fields=["created_at", "id"]),
+            GinIndex(fields=["search_vector"]),
+        ]
 
 class EventTag(models.Model):
     name = models.CharField(max_length=50)
@@ -0,0 +1,187 @@
+from django.db import models
+from django.utils.timezone import now
+from django.utils.translation import gettext_lazy as _
+
+from apps.users.models.base_model import BaseModel
+
+
+class NotificationCampaign(BaseModel):
+    """
+    Track a notification sent to many users, either split into chunks processed in parallel
+    or processed in keyset batches checkpointed on last_processed_user_id
+    """
+
+    KIND_NEW_EVENT = 'new_event'
+    KIND_MONTHLY_DIGEST = 'monthly_digest'
+
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_COMPLETED_WITH_ERRORS = 'completed_with_errors'
+
+    kind = models.CharField(
+        max_length=30,
+        choices=(
+            (KIND_NEW_EVENT, 'New event'),
+            (KIND_MONTHLY_DIGEST, 'Monthly digest'),
+        ),
+        verbose_name=_("Kind"),
+        help_text=_("The notification being sent")
+    )
+    event = models.ForeignKey(
+        'Event',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='notification_campaigns',
+        verbose_name=_("Event"),
+        help_text=_("The event the notification is about")
+    )
+    status = models.CharField(
+        max_length=30,
+        choices=(
+            (STATUS_RUNNING, 'Running'),
+            (STATUS_COMPLETED, 'Completed'),
+            (STATUS_COMPLETED_WITH_ERRORS, 'Completed with errors'),
+        ),
+        default=STATUS_RUNNING,
+        verbose_name=_("Status"),
+        help_text=_("Campaign status")
+    )
+    send_email = models.BooleanField(default=True, verbose_name=_("Send email"))
+    send_sms = models.BooleanField(default=False, verbose_name=_("Send SMS"))
+    parameters = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name=_("Parameters"),
+        help_text=_("Everything needed to resume the campaign, e.g. the events of a digest")
+    )
+    total_recipients = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Total recipients"),
+        help_text=_("Size of the audience when the campaign started")
+    )
+    last_processed_user_id = models.UUIDField(
+        null=True,
+        blank=True,
+        verbose_name=_("Last processed user id"),
+        help_text=_("Checkpoint, users up to this id (in id order) have been processed")
+    )
+    lease_owner = models.UUIDField(
+        null=True,
+        blank=True,
+        verbose_name=_("Lease owner"),
+        help_text=_("Run currently sending the campaign, only it may checkpoint")
+    )
+    lease_expires_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_("Lease expires at"),
+        help_text=_("Renewed after each batch, another run may take the campaign over once it has passed")
+    )
+    total_chunks = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Total chunks"),
+        help_text=_("Number of chunks the audience was split into")
+    )
+    completed_chunks = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Completed chunks"),
+        help_text=_("Number of chunks processed, successfully or not")
+    )
+    failed_chunks = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Failed chunks"),
+        help_text=_("Number of chunks that stopped on an error")
+    )
+    sent_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Sent"),
+        help_text=_("Number of users notified")
+    )
+    failed_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Failed"),
+        help_text=_("Number of users that could not be notified")
+    )
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_("Finished at"),
+        help_text=_("Time when the campaign finished")
+    )
+
+    class Meta:
+        db_table = 'notification_campaigns'
+        verbose_name = _("Notification Campaign")
+        verbose_name_plural = _("Notification Campaigns")
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['kind', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} - {self.status}"
+
+    @property
+    def processed_count(self):
+        return self.sent_count + self.failed_count
+
+    @property
+    def is_leased(self):
+        return self.lease_expires_at is not None and self.lease_expires_at > now()
+
+
+class NotificationCampaignChunk(BaseModel):
+    """A contiguous id range of the audience of a notification campaign"""
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+
+    campaign = models.ForeignKey(
+        NotificationCampaign,
+        on_delete=models.CASCADE,
+        related_name='chunks',
+        verbose_name=_("Campaign")
+    )
+    first_user_id = models.UUIDField(
+        verbose_name=_("First user id"),
+        help_text=_("Lowest user id of the chunk, inclusive")
+    )
+    last_user_id = models.UUIDField(
+        verbose_name=_("Last user id"),
+        help_text=_("Highest user id of the chunk, inclusive")
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=(
+            (STATUS_PENDING, 'Pending'),
+            (STATUS_RUNNING, 'Running'),
+            (STATUS_COMPLETED, 'Completed'),
+            (STATUS_FAILED, 'Failed'),
+        ),
+        default=STATUS_PENDING,
+        verbose_name=_("Status"),
+        help_text=_("Chunk status")
+    )
+    sent_count = models.PositiveIntegerField(default=0, verbose_name=_("Sent"))
+    failed_count = models.PositiveIntegerField(default=0, verbose_name=_("Failed"))
+    error = models.TextField(
+        blank=True,
+        verbose_name=_("Error"),
+        help_text=_("The error that stopped the chunk, if any")
+    )
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Finished at"))
+
+    class Meta:
+        db_table = 'notification_campaign_chunks'
+        verbose_name = _("Notification Campaign Chunk")
+        verbose_name_plural = _("Notification Campaign Chunks")
+        ordering = ['first_user_id']
+        indexes = [
+            models.Index(fields=['campaign', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.campaign} [{self.first_user_id} - {self.last_user_id}]"
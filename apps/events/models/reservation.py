@@ -23,3 +23,6 @@ class Reservation(BaseModel):
         verbose_name = _("Reservation")
         verbose_name_plural = _("Reservations")
         unique_together = ("for_event", "user")
+        indexes = [
+            models.Index(fields=["created_at", "id"]),
+        ]
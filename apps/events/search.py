@@ -0,0 +1,64 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import F, OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Coalesce
+
+from apps.events.models import Event, EventTag, Speaker
+
+# Events are written in French and English, so no language specific stemming is applied
+SEARCH_CONFIG = "simple"
+
+
+def _names_of(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(events=OuterRef("pk"))
+            .order_by()
+            .values("events")
+            .annotate(names=StringAgg("name", delimiter=" "))
+            .values("names")
+        ),
+        Value(""),
+        output_field=TextField(),
+    )
+
+
+def build_search_vector():
+    """
+    Build the expression stored in Event.search_vector, titles weigh more than tags and speakers,
+    which weigh more than the description
+    """
+    return (
+        SearchVector("title", weight="A", config=SEARCH_CONFIG)
+        + SearchVector(_names_of(EventTag), weight="B", config=SEARCH_CONFIG)
+        + SearchVector(_names_of(Speaker), weight="B", config=SEARCH_CONFIG)
+        + SearchVector("description", weight="C", config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vectors(event_ids) -> int:
+    """
+    Recompute the search vector of the given events in a single UPDATE
+
+    :param event_ids: The ids of the events to refresh
+    :return: The number of updated events
+    """
+    event_ids = list(event_ids)
+    if not event_ids:
+        return 0
+    return Event.objects.filter(pk__in=event_ids).update(search_vector=build_search_vector())
+
+
+def search_events(queryset, query: str):
+    """
+    Filter a queryset of events with a full-text query and order it by relevance
+
+    :param queryset: The events to search in
+    :param query: The user input, parsed with websearch syntax ("quoted phrases", -exclusions, or)
+    """
+    search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type="websearch")
+    return (
+        queryset.filter(search_vector=search_query)
+        .annotate(rank=SearchRank(F("search_vector"), search_query))
+        .order_by("-rank", "-date", "id")
+    )
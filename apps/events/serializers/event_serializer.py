@@ -3,6 +3,7 @@ from drf_spectacular.utils import extend_schema_field, OpenApiTypes
 from rest_framework import serializers
 
 from apps.events.models import Event, Speaker, EventTag, EventVenue
+from apps.events.models.constants import COMMUNITIES, EVENT_CATEGORIES, EVENT_TYPES
 from apps.events.serializers.speaker_serializer import SpeakerSerializer
 
 
@@ -10,9 +11,12 @@ class EventSerializer(serializers.ModelSerializer):
     speakers_data = serializers.SerializerMethodField()
     tags_list = serializers.SerializerMethodField()
 
+    select_related_fields = ("location__city__region",)
+    prefetch_related_fields = ("tags", "speakers__speciality")
+
     class Meta:
         model = Event
-        exclude = ("active", "level", "speakers", "tags")
+        exclude = ("active", "level", "speakers", "tags", "search_vector")
 
     @extend_schema_field(OpenApiTypes.STR)
     def get_speakers_data(self, event):
@@ -40,7 +44,7 @@ class CreateEventInputSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Event
-        exclude = ("created_by", "id", "active", "slug", "level",)
+        exclude = ("created_by", "id", "active", "slug", "level", "search_vector",)
 
     def validate(self, data):
         if not EventVenue.objects.filter(id=data["location"].id).exists():
@@ -85,4 +89,21 @@ class CreateEventSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Event
-        exclude = ("id",)
+        exclude = ("id", "search_vector",)
+
+
+class EventSearchInputSerializer(serializers.Serializer):
+    """
+    Serializer for the query parameters of the event search.
+    """
+    q = serializers.CharField(max_length=200, help_text=_("The search terms"))
+    category = serializers.ChoiceField(choices=EVENT_CATEGORIES, required=False)
+    for_community = serializers.ChoiceField(choices=COMMUNITIES, required=False)
+    type = serializers.ChoiceField(choices=EVENT_TYPES, required=False)
+    date_from = serializers.DateTimeField(required=False, help_text=_("Only events from this date"))
+    date_to = serializers.DateTimeField(required=False, help_text=_("Only events until this date"))
+
+    def validate(self, data):
+        if "date_from" in data and "date_to" in data and data["date_from"] > data["date_to"]:
+            raise serializers.ValidationError(_("date_from must be before date_to."))
+        return data
@@ -5,6 +5,8 @@ from apps.users.serializers.general_serializers import UserMinSerializer
 
 
 class ReservationSerializer(serializers.ModelSerializer):
+    select_related_fields = ("user",)
+
     class Meta:
         model = Reservation
         fields = "__all__"
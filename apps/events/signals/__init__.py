@@ -0,0 +1,2 @@
+from . import response_cache
+from . import search
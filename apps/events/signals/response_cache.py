@@ -0,0 +1,38 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from apps.events.models import Event, EventTag, Project, Speaker, SpeakerSocialMedia, SpeakerSpeciality
+from utils.response_cache import EVENTS_NAMESPACE, PROJECTS_NAMESPACE, SPEAKERS_NAMESPACE, invalidate_on_commit
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+@receiver(post_save, sender=Speaker)
+@receiver(post_delete, sender=Speaker)
+@receiver(post_save, sender=EventTag)
+@receiver(post_delete, sender=EventTag)
+def invalidate_events_response_cache(sender, **kwargs):
+    invalidate_on_commit(EVENTS_NAMESPACE)
+
+
+@receiver(m2m_changed, sender=Event.tags.through)
+@receiver(m2m_changed, sender=Event.speakers.through)
+def invalidate_events_response_cache_on_m2m_change(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate_on_commit(EVENTS_NAMESPACE)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def invalidate_projects_response_cache(sender, **kwargs):
+    invalidate_on_commit(PROJECTS_NAMESPACE)
+
+
+@receiver(post_save, sender=Speaker)
+@receiver(post_delete, sender=Speaker)
+@receiver(post_save, sender=SpeakerSpeciality)
+@receiver(post_delete, sender=SpeakerSpeciality)
+@receiver(post_save, sender=SpeakerSocialMedia)
+@receiver(post_delete, sender=SpeakerSocialMedia)
+def invalidate_speakers_response_cache(sender, **kwargs):
+    invalidate_on_commit(SPEAKERS_NAMESPACE)
@@ -0,0 +1,51 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from apps.events.models import Event, EventTag, Speaker
+from apps.events.search import update_search_vectors
+
+SEARCHED_EVENT_FIELDS = {"title", "description"}
+
+
+@receiver(post_save, sender=Event)
+def update_event_search_vector(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not SEARCHED_EVENT_FIELDS.intersection(update_fields):
+        return
+    update_search_vectors([instance.pk])
+
+
+@receiver(m2m_changed, sender=Event.tags.through)
+@receiver(m2m_changed, sender=Event.speakers.through)
+def update_search_vector_on_m2m_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        instance._search_event_ids = list(instance.events.values_list("pk", flat=True))
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        update_search_vectors([instance.pk])
+    elif action == "post_clear":
+        update_search_vectors(getattr(instance, "_search_event_ids", []))
+    else:
+        update_search_vectors(pk_set or [])
+
+
+@receiver(post_save, sender=EventTag)
+@receiver(post_save, sender=Speaker)
+def update_search_vector_on_rename(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and "name" not in update_fields):
+        return
+    update_search_vectors(instance.events.values_list("pk", flat=True))
+
+
+@receiver(pre_delete, sender=EventTag)
+@receiver(pre_delete, sender=Speaker)
+def remember_searched_events(sender, instance, **kwargs):
+    instance._search_event_ids = list(instance.events.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=EventTag)
+@receiver(post_delete, sender=Speaker)
+def update_search_vector_on_delete(sender, instance, **kwargs):
+    update_search_vectors(getattr(instance, "_search_event_ids", []))
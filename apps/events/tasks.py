@@ -1,11 +1,17 @@
 import logging
+import uuid
 
-from celery import shared_task
+from celery import chord, shared_task
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import F, Q
 from django.utils.timezone import now, timedelta
 
-from apps.events.models import Event, EventRegistration
-from services import NotificationService
+from apps.events.models import Event, EventRegistration, NotificationCampaign, NotificationCampaignChunk
+from apps.users.models import NotificationOutbox
+from apps.users.tasks import dispatch_notification_outbox_task
+from services import NotificationService, OutboxService
 from services.notification_preferences import get_notification_preferences
 
 logger = logging.getLogger(__name__)
@@ -13,6 +19,30 @@ logger = logging.getLogger(__name__)
 User = get_user_model()
 
 
+def build_user_id_ranges(users, chunk_size: int):
+    """
+    Split a queryset of users into contiguous id ranges of at most chunk_size users
+
+    :param users: The audience
+    :param chunk_size: Maximum number of users per range
+    :return: A list of (first_id, last_id) tuples, both inclusive
+    """
+    ranges = []
+    first_id = last_id = None
+    count = 0
+    for user_id in users.order_by('id').values_list('id', flat=True).iterator(chunk_size=5000):
+        if first_id is None:
+            first_id = user_id
+        last_id = user_id
+        count += 1
+        if count == chunk_size:
+            ranges.append((first_id, last_id))
+            first_id, count = None, 0
+    if first_id is not None:
+        ranges.append((first_id, last_id))
+    return ranges
+
+
 @shared_task
 def notify_users_on_new_event_task(event_id: int) -> None:
     try:
@@ -27,12 +57,104 @@ def notify_users_on_new_event_task(event_id: int) -> None:
     if not (prefs.send_new_event_email or prefs.send_new_event_sms):
         return
 
-    users = User.objects.filter(is_active=True)
-    NotificationService().send_event_notification(
-        users,
-        event,
-        send_sms=prefs.send_new_event_sms,
+    ranges = build_user_id_ranges(User.objects.filter(is_active=True), settings.NOTIFICATION_CHUNK_SIZE)
+    campaign = NotificationCampaign.objects.create(
+        kind=NotificationCampaign.KIND_NEW_EVENT,
+        event=event,
         send_email=prefs.send_new_event_email,
+        send_sms=prefs.send_new_event_sms,
+        total_chunks=len(ranges),
+    )
+    if not ranges:
+        campaign.status = NotificationCampaign.STATUS_COMPLETED
+        campaign.finished_at = now()
+        campaign.save(update_fields=['status', 'finished_at'])
+        return
+
+    chunks = NotificationCampaignChunk.objects.bulk_create([
+        NotificationCampaignChunk(campaign=campaign, first_user_id=first_id, last_user_id=last_id)
+        for first_id, last_id in ranges
+    ])
+    chord(
+        send_event_notification_chunk_task.s(str(chunk.id)) for chunk in chunks
+    )(finalize_notification_campaign_task.s(str(campaign.id)))
+
+
+@shared_task
+def send_event_notification_chunk_task(chunk_id: str) -> dict:
+    """
+    Notify the users of one id range of a new event campaign and record the outcome on the chunk
+    and the campaign. Errors are recorded instead of raised so the chord callback always runs.
+    """
+    chunk = NotificationCampaignChunk.objects.select_related('campaign').get(pk=chunk_id)
+    campaign = chunk.campaign
+    NotificationCampaignChunk.objects.filter(pk=chunk.pk).update(status=NotificationCampaignChunk.STATUS_RUNNING)
+
+    sent = failed = 0
+    deferred = set()
+    try:
+        event = Event.objects.select_related('location__city__region').get(pk=campaign.event_id)
+        users = User.objects.filter(
+            is_active=True,
+            id__gte=chunk.first_user_id,
+            id__lte=chunk.last_user_id,
+        ).order_by('id')
+        sent, failed, deferred = NotificationService().send_event_notification(
+            users,
+            event,
+            send_sms=campaign.send_sms,
+            send_email=campaign.send_email,
+        )
+    except Exception as e:
+        logger.exception("Error processing notification campaign chunk id=%s", chunk_id)
+        NotificationCampaignChunk.objects.filter(pk=chunk.pk).update(
+            status=NotificationCampaignChunk.STATUS_FAILED,
+            sent_count=sent,
+            failed_count=failed,
+            error=repr(e),
+            finished_at=now(),
+        )
+        NotificationCampaign.objects.filter(pk=campaign.pk).update(
+            completed_chunks=F('completed_chunks') + 1,
+            failed_chunks=F('failed_chunks') + 1,
+        )
+        return {'sent': sent, 'failed': failed, 'deferred': len(deferred), 'error': True}
+
+    NotificationCampaignChunk.objects.filter(pk=chunk.pk).update(
+        status=NotificationCampaignChunk.STATUS_COMPLETED,
+        sent_count=sent,
+        failed_count=failed,
+        finished_at=now(),
+    )
+    NotificationCampaign.objects.filter(pk=campaign.pk).update(
+        completed_chunks=F('completed_chunks') + 1,
+        sent_count=F('sent_count') + sent,
+        failed_count=F('failed_count') + failed,
+    )
+    return {'sent': sent, 'failed': failed, 'deferred': len(deferred), 'error': False}
+
+
+@shared_task
+def finalize_notification_campaign_task(results: list, campaign_id: str) -> None:
+    """
+    Chord callback, runs once every chunk of a campaign has been processed
+    """
+    sent = sum(result['sent'] for result in results)
+    failed = sum(result['failed'] for result in results)
+    # Results of the chunks queued before deferred notifications were counted
+    deferred = sum(result.get('deferred', 0) for result in results)
+    has_errors = failed > 0 or any(result['error'] for result in results)
+
+    NotificationCampaign.objects.filter(pk=campaign_id).update(
+        status=(
+            NotificationCampaign.STATUS_COMPLETED_WITH_ERRORS if has_errors
+            else NotificationCampaign.STATUS_COMPLETED
+        ),
+        finished_at=now(),
+    )
+    logger.info(
+        "Notification campaign id=%s finished: %s sent (%s queued for a retry), %s failed over %s chunks",
+        campaign_id, sent, deferred, failed, len(results),
     )
 
 
@@ -83,22 +205,83 @@ def send_registration_confirmation_task(registration_id: int) -> None:
     if not (prefs.send_registration_confirmation_email or prefs.send_registration_confirmation_sms):
         return
 
-    try:
-        NotificationService().send_registration_confirmation(
+    channels = []
+    if prefs.send_registration_confirmation_email:
+        channels.append(NotificationOutbox.CHANNEL_EMAIL)
+    if prefs.send_registration_confirmation_sms and registration.user.phone_number:
+        channels.append(NotificationOutbox.CHANNEL_SMS)
+
+    with transaction.atomic():
+        OutboxService.enqueue(
+            NotificationOutbox.TYPE_REGISTRATION_CONFIRMATION,
             registration.user,
-            registration.event,
-            registration,
-            send_sms=prefs.send_registration_confirmation_sms,
-            send_email=prefs.send_registration_confirmation_email,
+            registration.pk,
+            channels,
         )
         registration.confirmation_sent = True
         registration.save(update_fields=['confirmation_sent'])
-    except Exception:
-        logger.exception("Error sending registration confirmation for EventRegistration id=%s", registration_id)
+        transaction.on_commit(dispatch_notification_outbox_task.delay)
+
+
+# Claims a batch of due reminders: they are marked as sent in the statement that reads them, so a
+# registration created meanwhile is never marked without being sent, and concurrent runs skip the
+# rows already claimed. Keyset ordered by registration id.
+REMINDER_CLAIM_SQL = """
+    WITH batch AS (
+        SELECT r.id
+        FROM event_registrations r
+        JOIN events e ON e.id = r.event_id
+        WHERE e.published
+          AND e.date BETWEEN %(start)s AND %(end)s
+          AND r.status = 'registered'
+          AND NOT r.reminder_sent
+          {after}
+        ORDER BY r.id
+        LIMIT %(limit)s
+        FOR UPDATE OF r SKIP LOCKED
+    )
+    UPDATE event_registrations r
+    SET reminder_sent = TRUE, updated_at = %(now)s
+    FROM batch, users u
+    WHERE r.id = batch.id AND u.id = r.user_id
+    RETURNING r.id, r.event_id, u.id, u.email, u.username, u.first_name, u.phone_number
+"""
+
+
+def claim_reminder_batch(start_time, end_time, after_id, limit: int) -> list:
+    """
+    Claim the next due reminders of the events starting between start_time and end_time
+
+    :param after_id: Id of the last registration of the previous batch, None for the first one
+    :param limit: Maximum registrations claimed
+    :return: (registration_id, event_id, user) tuples, user only holds the fields the reminders use
+    """
+    params = {'start': start_time, 'end': end_time, 'limit': limit, 'now': now()}
+    after = ''
+    if after_id is not None:
+        after = 'AND r.id > %(after)s'
+        params['after'] = after_id
+    with connection.cursor() as cursor:
+        cursor.execute(REMINDER_CLAIM_SQL.format(after=after), params)
+        rows = cursor.fetchall()
+    return [
+        (
+            registration_id,
+            event_id,
+            User(id=user_id, email=email, username=username, first_name=first_name, phone_number=phone_number),
+        )
+        for registration_id, event_id, user_id, email, username, first_name, phone_number in rows
+    ]
 
 
 @shared_task
 def send_event_reminders_task(hours: int = 24, send_sms: bool = False) -> None:
+    """
+    Remind the registered users of the events starting in about `hours` hours, in batches of
+    REMINDER_BATCH_SIZE registrations claimed atomically, see claim_reminder_batch.
+    A batch whose sending fails is released so that the next run retries it, the reminders deferred
+    by the SMS rate limit or an open circuit breaker are queued in the notification outbox.
+    """
     prefs = get_notification_preferences()
     send_sms_final = bool(send_sms) or prefs.send_event_reminder_sms
     send_email = prefs.send_event_reminder_email
@@ -108,41 +291,60 @@ def send_event_reminders_task(hours: int = 24, send_sms: bool = False) -> None:
 
     start_time = now() + timedelta(hours=hours - 1)
     end_time = now() + timedelta(hours=hours + 1)
-
-    upcoming_events = Event.objects.filter(
-        published=True,
-        date__gte=start_time,
-        date__lte=end_time
-    )
+    batch_size = settings.REMINDER_BATCH_SIZE
 
     notification_service = NotificationService()
-
-    for event in upcoming_events:
-        registrations = EventRegistration.objects.filter(
-            event=event,
-            status='registered',
-            reminder_sent=False
-        ).select_related('user')
-
-        if not registrations.exists():
-            continue
-
-        users = [reg.user for reg in registrations]
-
-        try:
-            notification_service.send_event_reminder(
-                users,
-                event,
-                send_sms=send_sms_final,
-                send_email=send_email,
-            )
-            registrations.update(reminder_sent=True)
-        except Exception:
-            logger.exception("Error sending reminders for event id=%s", getattr(event, 'id', None))
+    events = {}
+    last_id = None
+    while True:
+        claimed = claim_reminder_batch(start_time, end_time, last_id, batch_size)
+        if not claimed:
+            break
+        last_id = max(registration_id for registration_id, _, _ in claimed)
+
+        users_by_event = {}
+        for _, event_id, user in claimed:
+            users_by_event.setdefault(event_id, []).append(user)
+        missing = set(users_by_event) - set(events)
+        if missing:
+            events.update(Event.objects.select_related('location__city__region').in_bulk(missing))
+
+        for event_id, users in users_by_event.items():
+            try:
+                notification_service.send_event_reminder(
+                    users,
+                    events[event_id],
+                    send_sms=send_sms_final,
+                    send_email=send_email,
+                )
+            except Exception:
+                logger.exception("Error sending reminders for event id=%s", event_id)
+                EventRegistration.objects.filter(
+                    id__in=[registration_id for registration_id, claimed_event_id, _ in claimed
+                            if claimed_event_id == event_id]
+                ).update(reminder_sent=False)
+
+        if len(claimed) < batch_size:
+            break
 
 
 @shared_task
 def send_monthly_digest_task(days: int = 30, send_sms: bool = False) -> None:
+    """
+    Start a monthly digest campaign, or resume the one still running so nobody gets the digest twice
+    """
+    running = NotificationCampaign.objects.filter(
+        kind=NotificationCampaign.KIND_MONTHLY_DIGEST,
+        status=NotificationCampaign.STATUS_RUNNING,
+    ).first()
+    if running:
+        if running.is_leased:
+            logger.info("Monthly digest campaign id=%s is being sent by another run", running.id)
+            return
+        logger.info("Monthly digest campaign id=%s is still running, resuming it", running.id)
+        process_digest_campaign_task.delay(str(running.id))
+        return
+
     prefs = get_notification_preferences()
     send_sms_final = bool(send_sms) or prefs.send_upcoming_digest_sms
     send_email = prefs.send_upcoming_digest_email
@@ -151,27 +353,118 @@ def send_monthly_digest_task(days: int = 30, send_sms: bool = False) -> None:
         return
 
     end_date = now() + timedelta(days=days)
-    upcoming_events = list(
+    event_ids = list(
         Event.objects.filter(
             published=True,
             date__gte=now(),
             date__lte=end_date
-        ).order_by('date')
+        ).order_by('date').values_list('id', flat=True)
     )
 
-    if not upcoming_events:
+    if not event_ids:
         return
 
-    users = User.objects.filter(is_active=True).only('id').iterator(chunk_size=200)
-    notification_service = NotificationService()
+    campaign = NotificationCampaign.objects.create(
+        kind=NotificationCampaign.KIND_MONTHLY_DIGEST,
+        send_email=send_email,
+        send_sms=send_sms_final,
+        parameters={'days': days, 'event_ids': [str(event_id) for event_id in event_ids]},
+        total_recipients=User.objects.filter(is_active=True).count(),
+    )
+    process_digest_campaign_task.delay(str(campaign.id))
+
+
+def claim_digest_campaign(campaign_id: str, owner: uuid.UUID):
+    """
+    Take the lease of a running digest campaign, unless another run holds an unexpired one
+
+    :param campaign_id: The campaign to send
+    :param owner: Token of the run, required to checkpoint the campaign afterwards
+    :return: The claimed campaign, or None if it is finished, unknown or leased by another run
+    """
+    with transaction.atomic():
+        campaign = NotificationCampaign.objects.select_for_update(skip_locked=True).filter(
+            Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lte=now()),
+            pk=campaign_id,
+            status=NotificationCampaign.STATUS_RUNNING,
+        ).first()
+        if campaign is None:
+            return None
+        campaign.lease_owner = owner
+        campaign.lease_expires_at = now() + timedelta(seconds=settings.DIGEST_CAMPAIGN_LEASE)
+        campaign.save(update_fields=['lease_owner', 'lease_expires_at', 'updated_at'])
+    return campaign
+
+
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True, max_retries=None)
+def process_digest_campaign_task(self, campaign_id: str) -> None:
+    """
+    Send a digest campaign in keyset ordered batches of users, checkpointing after each batch.
+
+    The message is only acknowledged once the task returns, so if the worker dies it is delivered
+    again and the campaign resumes after last_processed_user_id: at most one batch is sent twice.
+    A run first takes the campaign's lease and renews it at each checkpoint, so a duplicate message
+    waits for the lease to expire instead of sending the same batches concurrently.
+    """
+    owner = uuid.uuid4()
+    campaign = claim_digest_campaign(campaign_id, owner)
+    if campaign is None:
+        leased = NotificationCampaign.objects.filter(
+            pk=campaign_id, status=NotificationCampaign.STATUS_RUNNING,
+        ).values_list('lease_expires_at', flat=True).first()
+        if leased is None:
+            return
+        # Held by another run, which may have died: try again once its lease has expired
+        raise self.retry(countdown=max(int((leased - now()).total_seconds()) + 1, 1))
 
-    for user in users:
-        try:
-            notification_service.send_upcoming_events_digest(
-                [user],
+    upcoming_events = list(
+        Event.objects.filter(id__in=campaign.parameters['event_ids'])
+        .select_related('location__city')
+        .order_by('date')
+    )
+    users = User.objects.filter(is_active=True).order_by('id')
+    notification_service = NotificationService()
+    prepared = notification_service.prepare_upcoming_events_digest(
+        upcoming_events, send_sms=campaign.send_sms, send_email=campaign.send_email,
+    )
+    last_processed_user_id = campaign.last_processed_user_id
+    leased_campaign = NotificationCampaign.objects.filter(pk=campaign.pk, lease_owner=owner)
+
+    with notification_service.mail_service.batch():
+        while True:
+            batch = users
+            if last_processed_user_id is not None:
+                batch = batch.filter(id__gt=last_processed_user_id)
+            batch = list(batch[:settings.DIGEST_BATCH_SIZE])
+            if not batch:
+                break
+
+            sent, failed, _ = notification_service.send_upcoming_events_digest(
+                batch,
                 upcoming_events,
-                send_sms=send_sms_final,
-                send_email=send_email,
+                send_sms=campaign.send_sms,
+                send_email=campaign.send_email,
+                prepared=prepared,
             )
-        except Exception:
-            logger.exception("Error sending monthly digest to user id=%s", getattr(user, 'id', None))
+            last_processed_user_id = batch[-1].id
+            checkpointed = leased_campaign.update(
+                last_processed_user_id=last_processed_user_id,
+                sent_count=F('sent_count') + sent,
+                failed_count=F('failed_count') + failed,
+                lease_expires_at=now() + timedelta(seconds=settings.DIGEST_CAMPAIGN_LEASE),
+                updated_at=now(),
+            )
+            if not checkpointed:
+                logger.warning("Lost the lease of digest campaign id=%s, stopping this run", campaign.pk)
+                return
+
+    campaign.refresh_from_db(fields=['failed_count'])
+    leased_campaign.update(
+        status=(
+            NotificationCampaign.STATUS_COMPLETED_WITH_ERRORS if campaign.failed_count
+            else NotificationCampaign.STATUS_COMPLETED
+        ),
+        lease_owner=None,
+        lease_expires_at=None,
+        finished_at=now(),
+    )
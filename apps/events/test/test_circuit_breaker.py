@@ -0,0 +1,153 @@
+import smtplib
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.users.models import LoginHistory, NotificationOutbox
+from services import MailService, OutboxService, SMSService
+from services.circuit_breaker import (
+    SMTP_CIRCUIT,
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    TWILIO_CIRCUIT,
+    CircuitBreaker,
+    CircuitOpenError,
+    circuit_breaker_trips_total,
+    get_circuit_breaker,
+)
+from services.fakes import FakeTwilioClient
+from services.rate_limiter import LocalTokenBuckets, RateLimiter
+
+User = get_user_model()
+
+
+class DownEmailBackend(EmailBackend):
+    calls = 0
+
+    def send_messages(self, messages):
+        DownEmailBackend.calls += 1
+        raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+
+
+class RejectingEmailBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise smtplib.SMTPDataError(554, b"Message rejected")
+
+
+class CircuitBreakerTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.breaker = CircuitBreaker("test", failure_threshold=3, failure_window=60, reset_timeout=30)
+
+    def expire_open_period(self):
+        cache.set("circuit:test:opened_at", time.time() - 31, timeout=None)
+
+    def test_breaker_opens_after_the_threshold(self):
+        trips = circuit_breaker_trips_total.labels(provider="test")._value.get()
+        for _ in range(3):
+            self.breaker.before_call()
+            self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state(), STATE_OPEN)
+        with self.assertRaises(CircuitOpenError) as raised:
+            self.breaker.before_call()
+        self.assertGreater(raised.exception.retry_after, 29)
+        self.assertEqual(circuit_breaker_trips_total.labels(provider="test")._value.get() - trips, 1)
+
+    def test_success_resets_the_failure_count(self):
+        for _ in range(2):
+            self.breaker.before_call()
+            self.breaker.record_failure()
+        self.breaker.before_call()
+        self.breaker.record_success()
+        self.breaker.before_call()
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state(), STATE_CLOSED)
+
+    def test_half_open_lets_a_single_probe_through(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.expire_open_period()
+        self.assertEqual(self.breaker.state(), STATE_HALF_OPEN)
+
+        self.breaker.before_call()
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state(), STATE_CLOSED)
+        self.breaker.before_call()
+
+    def test_failed_probe_opens_the_circuit_again(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.expire_open_period()
+
+        self.breaker.before_call()
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state(), STATE_OPEN)
+
+
+@override_settings(EMAIL_BACKEND="apps.events.test.test_circuit_breaker.DownEmailBackend")
+class ProviderCircuitBreakerTest(TestCase):
+    def setUp(self):
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create(username="amina", email="amina@example.com", phone_number="+237670000001")
+        # Forget the failed welcome email
+        cache.clear()
+        DownEmailBackend.calls = 0
+
+    def open_circuit(self, name):
+        cache.set(f"circuit:{name}:opened_at", time.time(), timeout=None)
+
+    def test_mail_stops_calling_a_failing_smtp_server(self):
+        service = MailService()
+        for _ in range(5):
+            with self.assertRaises(smtplib.SMTPServerDisconnected):
+                service.send_welcome_email(self.user)
+
+        with self.assertRaises(CircuitOpenError):
+            service.send_welcome_email(self.user)
+        self.assertEqual(DownEmailBackend.calls, 5)
+
+    @override_settings(EMAIL_BACKEND="apps.events.test.test_circuit_breaker.RejectingEmailBackend")
+    def test_rejected_messages_do_not_open_the_circuit(self):
+        service = MailService()
+        for _ in range(6):
+            with self.assertRaises(smtplib.SMTPDataError):
+                service.send_welcome_email(self.user)
+
+        self.assertEqual(get_circuit_breaker(SMTP_CIRCUIT).state(), STATE_CLOSED)
+
+    def test_sms_is_not_sent_while_the_circuit_is_open(self):
+        self.open_circuit(TWILIO_CIRCUIT)
+        client = FakeTwilioClient()
+        service = SMSService(client=client, rate_limiter=RateLimiter(LocalTokenBuckets()))
+        service.from_number = "+15005550006"
+
+        result = service.send_sms("+237670000001", "Hello")
+
+        self.assertTrue(result["circuit_open"])
+        self.assertGreater(result["retry_after"], 0)
+        self.assertEqual(client.sent, [])
+
+    def test_outbox_requeues_without_using_up_an_attempt(self):
+        self.open_circuit(SMTP_CIRCUIT)
+        login_record = LoginHistory.objects.create(user=self.user, ip_address="41.202.219.1")
+        OutboxService.enqueue(
+            NotificationOutbox.TYPE_NEW_LOCATION_LOGIN, self.user, login_record.pk, [NotificationOutbox.CHANNEL_EMAIL],
+        )
+
+        self.assertEqual(OutboxService().dispatch(), (1, 0))
+
+        message = NotificationOutbox.objects.get()
+        self.assertEqual(message.status, NotificationOutbox.STATUS_PENDING)
+        self.assertEqual(message.attempts, 0)
+        self.assertEqual(DownEmailBackend.calls, 0)
@@ -0,0 +1,118 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.utils.timezone import now
+from rest_framework.test import APITestCase
+
+from apps.events.models import (
+    AvailableSocialMedia, Event, EventCity, EventRegion, EventTag, EventVenue,
+    Project, Speaker, SpeakerSocialMedia,
+)
+
+
+def later(seconds=10):
+    """Bump cache namespaces a few seconds from now, Last-Modified has a one second resolution"""
+    return mock.patch("utils.response_cache.time.time", return_value=time.time() + seconds)
+
+
+class EventConditionalGetTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        region = EventRegion.objects.create(name="Centre")
+        city = EventCity.objects.create(name="Yaounde", region=region)
+        venue = EventVenue.objects.create(name="Hub", city=city)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event = Event.objects.create(
+                title="Django Day",
+                description="Test event",
+                location=venue,
+                date=now() + timedelta(days=1),
+                published=True,
+            )
+
+    def test_list_returns_not_modified_for_matching_etag(self):
+        response = self.client.get("/api/v1/events/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("ETag", response)
+        self.assertIn("Last-Modified", response)
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/v1/events/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_list_etag_changes_with_related_rows(self):
+        etag = self.client.get("/api/v1/events/")["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.tags.add(EventTag.objects.create(name="django", color="#000"))
+
+        response = self.client.get("/api/v1/events/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_detail_returns_not_modified_since_last_update(self):
+        url = f"/api/v1/events/{self.event.pk}/"
+        last_modified = self.client.get(url)["Last-Modified"]
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+        Event.objects.filter(pk=self.event.pk).update(updated_at=now() + timedelta(seconds=5))
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_last_modified_follows_related_rows(self):
+        url = f"/api/v1/events/{self.event.pk}/"
+        last_modified = self.client.get(url)["Last-Modified"]
+
+        with later(), self.captureOnCommitCallbacks(execute=True):
+            self.event.tags.add(EventTag.objects.create(name="django", color="#000"))
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"]["tags_list"], ["django"])
+
+
+class ProjectConditionalGetTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_list_etag_changes_with_projects(self):
+        etag = self.client.get("/api/v1/projects/")["ETag"]
+        self.assertEqual(self.client.get("/api/v1/projects/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Project.objects.create(title="Website", description="This API", published=True)
+
+        response = self.client.get("/api/v1/projects/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["data"]), 1)
+
+
+class SpeakerConditionalGetTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.speaker = Speaker.objects.create(name="Ada Lovelace")
+
+    def test_list_returns_not_modified_for_matching_etag(self):
+        etag = self.client.get("/api/v1/speakers/")["ETag"]
+
+        response = self.client.get("/api/v1/speakers/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_detail_validators_follow_social_media_changes(self):
+        url = f"/api/v1/speakers/{self.speaker.pk}/"
+        response = self.client.get(url)
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        platform = AvailableSocialMedia.objects.create(name="GitHub", link="https://github.com")
+        with later(), self.captureOnCommitCallbacks(execute=True):
+            SpeakerSocialMedia.objects.create(speaker=self.speaker, platform=platform, handle="ada")
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
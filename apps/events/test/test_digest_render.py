@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.template.loader import render_to_string
+from django.test import SimpleTestCase
+from django.utils.timezone import now
+
+from apps.events.models import Event, EventCity, EventVenue
+from services import MailService
+
+User = get_user_model()
+
+
+class DigestRenderTest(SimpleTestCase):
+    def setUp(self):
+        venue = EventVenue(name="Hub", city=EventCity(name="Buea"))
+        self.events = [
+            Event(title=f"Event {index}", slug=f"event-{index}", description="Talks & <code>",
+                  location=venue, date=now() + timedelta(days=index))
+            for index in range(3)
+        ]
+
+    def test_rendered_once_body_matches_per_user_rendering(self):
+        service = MailService()
+        body = service.render_upcoming_events(self.events)
+
+        for user in (User(username="mbappe", first_name="O'Neil <b>&</b>"), User(username="eto'o")):
+            expected = render_to_string("mails/upcoming_events.html", context={
+                "user": user, "events": self.events, "site_url": "https://djangocameroon.org",
+            })
+            user.email = f"{user.username}@example.com"
+            service.send_upcoming_events(user, self.events, rendered_body=body)
+            self.assertEqual(service.mail.body, expected)
@@ -0,0 +1,59 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils.timezone import now
+
+from apps.events.models import Event, EventCity, EventRegion, EventTag, EventVenue
+from services import CalendarService, NotificationService
+
+User = get_user_model()
+
+
+class EventCalendarCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        CalendarService._local_cache.clear()
+        region = EventRegion.objects.create(name="Ouest")
+        city = EventCity.objects.create(name="Bafoussam", region=region)
+        venue = EventVenue.objects.create(name="Hub", city=city)
+        self.event = Event.objects.create(
+            title="PyCon Cameroon",
+            description="Test event",
+            location=venue,
+            date=now() + timedelta(days=3),
+            published=True,
+        )
+        self.users = [
+            User.objects.create(username=f"user{index}", email=f"user{index}@example.com")
+            for index in range(3)
+        ]
+        mail.outbox = []
+
+    def test_fan_out_generates_the_calendar_once(self):
+        with mock.patch.object(
+            CalendarService, "generate_event_ics", autospec=True,
+            side_effect=CalendarService.generate_event_ics,
+        ) as generate_event_ics:
+            NotificationService().send_event_notification(self.users, self.event)
+            NotificationService().send_event_reminder(self.users, self.event, send_sms=False)
+
+        self.assertEqual(generate_event_ics.call_count, 1)
+        self.assertEqual(len(mail.outbox), 6)
+        for message in mail.outbox:
+            self.assertEqual(len(message.attachments), 1)
+
+    def test_calendar_is_regenerated_when_the_event_changes(self):
+        first = self.event.get_calendar_ics()[1]
+
+        self.event.title = "PyCon Cameroon 2026"
+        self.event.save()
+        self.assertIn(b"PyCon Cameroon 2026", self.event.get_calendar_ics()[1])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.tags.add(EventTag.objects.create(name="keynote", color="#000"))
+        self.assertIn(b"keynote", self.event.get_calendar_ics()[1])
+        self.assertNotEqual(first, self.event.get_calendar_ics()[1])
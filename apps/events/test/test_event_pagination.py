@@ -0,0 +1,101 @@
+import base64
+import json
+from datetime import timedelta
+from urllib.parse import parse_qs, urlparse
+
+from django.core.cache import cache
+from django.utils.timezone import now
+from rest_framework.test import APITestCase
+
+from apps.events.models import Event, EventCity, EventRegion, EventVenue
+
+
+class EventCursorPaginationTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        region = EventRegion.objects.create(name="Littoral")
+        city = EventCity.objects.create(name="Douala", region=region)
+        self.venue = EventVenue.objects.create(name="Hub", city=city)
+
+    def create_events(self, count):
+        return [
+            Event.objects.create(
+                title=f"Event {index}",
+                description="Test event",
+                location=self.venue,
+                date=now() + timedelta(days=index + 1),
+                published=True,
+            )
+            for index in range(count)
+        ]
+
+    def get_page(self, cursor=""):
+        response = self.client.get("/api/v1/events/", {"cursor": cursor})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    @staticmethod
+    def cursor_of(link):
+        return parse_qs(urlparse(link).query)["cursor"][0]
+
+    def test_first_page_has_no_count_and_no_previous_link(self):
+        events = self.create_events(12)
+
+        page = self.get_page()
+
+        self.assertEqual([event["id"] for event in page["data"]], [str(event.pk) for event in events[:10]])
+        self.assertIsNone(page["pagination"]["count"])
+        self.assertIsNone(page["pagination"]["previous"])
+        self.assertIsNotNone(page["pagination"]["next"])
+
+    def test_next_and_previous_links(self):
+        events = self.create_events(12)
+
+        first_page = self.get_page()
+        second_page = self.get_page(self.cursor_of(first_page["pagination"]["next"]))
+        self.assertEqual([event["id"] for event in second_page["data"]], [str(event.pk) for event in events[10:]])
+        self.assertIsNone(second_page["pagination"]["next"])
+
+        back = self.get_page(self.cursor_of(second_page["pagination"]["previous"]))
+        self.assertEqual(back["data"], first_page["data"])
+        self.assertIsNone(back["pagination"]["previous"])
+        self.assertIsNotNone(back["pagination"]["next"])
+
+    def test_cursor_encodes_the_last_row(self):
+        events = self.create_events(11)
+
+        payload = json.loads(base64.urlsafe_b64decode(self.cursor_of(self.get_page()["pagination"]["next"])))
+
+        self.assertEqual(payload, {"c": events[9].created_at.isoformat(), "i": str(events[9].pk), "r": False})
+
+    def test_rows_created_at_the_same_time_are_ordered_by_id(self):
+        events = self.create_events(25)
+        Event.objects.update(created_at=now())
+
+        seen, cursor = [], ""
+        while cursor is not None:
+            page = self.get_page(cursor)
+            seen += [event["id"] for event in page["data"]]
+            cursor = page["pagination"]["next"] and self.cursor_of(page["pagination"]["next"])
+
+        self.assertEqual(seen, sorted(str(event.pk) for event in events))
+
+    def test_invalid_cursor_is_not_found(self):
+        payloads = [
+            b'{"c": "yesterday"}',
+            b'{"c": "2024-01-01T00:00:00+00:00", "i": "xyz"}',
+            b'{"c": "2024-01-01T00:00:00+00:00", "i": []}',
+            b'{"c": "2024-01-01T00:00:00", "i": "6f1c2a4e-8a51-4c39-9d8e-3f0b2d8c7a10"}',
+            b'{"c": 1704067200, "i": "6f1c2a4e-8a51-4c39-9d8e-3f0b2d8c7a10"}',
+            b'["2024-01-01T00:00:00+00:00"]',
+        ]
+        cursors = ["not-a-cursor"] + [base64.urlsafe_b64encode(payload).decode() for payload in payloads]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                response = self.client.get("/api/v1/events/", {"cursor": cursor})
+                self.assertEqual(response.status_code, 404)
+
+    def test_ranked_search_results_are_not_cursor_paginated(self):
+        response = self.client.get("/api/v1/events/search/", {"q": "event", "cursor": ""})
+
+        self.assertEqual(response.status_code, 400)
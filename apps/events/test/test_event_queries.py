@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from rest_framework.test import APITestCase
+
+from apps.events.models import (
+    Event, EventCity, EventRegion, EventTag,
+    EventVenue, Speaker, SpeakerSpeciality,
+)
+
+
+class EventQueryCountTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        region = EventRegion.objects.create(name="Littoral")
+        city = EventCity.objects.create(name="Douala", region=region)
+        self.venue = EventVenue.objects.create(name="Hub", city=city)
+        self.speciality = SpeakerSpeciality.objects.create(name="Backend")
+
+    def create_events(self, count):
+        events = []
+        with self.captureOnCommitCallbacks(execute=True):
+            for index in range(count):
+                event = Event.objects.create(
+                    title=f"Event {Event.objects.count()}",
+                    description="Test event",
+                    location=self.venue,
+                    date=now() + timedelta(days=index + 1),
+                    published=True,
+                )
+                tag = EventTag.objects.create(name=f"tag-{event.pk}", color="#000")
+                speaker = Speaker.objects.create(name=f"Speaker {event.pk}", speciality=self.speciality)
+                event.tags.add(tag)
+                event.speakers.add(speaker)
+                events.append(event)
+        return events
+
+    def count_list_queries(self, url="/api/v1/events/"):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response
+
+    def test_list_query_count_does_not_grow_with_rows(self):
+        self.create_events(2)
+        small_page_queries, _ = self.count_list_queries()
+
+        self.create_events(8)
+        full_page_queries, response = self.count_list_queries()
+
+        self.assertEqual(len(response.data["data"]), 10)
+        self.assertEqual(small_page_queries, full_page_queries)
+        # count, events (+ location/city/region), tags, speakers, specialities
+        self.assertEqual(full_page_queries, 5)
+
+    def test_cursor_list_skips_count_query(self):
+        self.create_events(10)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get("/api/v1/events/?cursor=")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["data"]), 10)
+        self.assertIsNone(response.data["pagination"]["count"])
+        # events (+ location/city/region), tags, speakers, specialities
+        self.assertEqual(len(context.captured_queries), 4)
+        for query in context.captured_queries:
+            self.assertNotIn("COUNT(", query["sql"].upper())
+            self.assertNotIn("MAX(", query["sql"].upper())
+
+    def test_retrieve_query_count(self):
+        event = self.create_events(1)[0]
+
+        with self.assertNumQueries(5):
+            response = self.client.get(f"/api/v1/events/{event.pk}/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"]["tags_list"], [f"tag-{event.pk}"])
+        self.assertEqual(len(response.data["data"]["speakers_data"]), 1)
@@ -0,0 +1,114 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+
+from apps.events.models import Event, EventCity, EventRegion, EventRegistration, EventVenue
+from apps.events.tasks import send_event_reminders_task
+from apps.users.models import NotificationOutbox
+from services import NotificationService, OutboxService
+from services.circuit_breaker import SMTP_CIRCUIT
+
+User = get_user_model()
+
+
+class RecipientsEmailBackend(EmailBackend):
+    """MailService reuses one message, keep the recipients of the reminders as they were when sent"""
+    recipients = []
+
+    def send_messages(self, messages):
+        # Registering also sends a confirmation
+        RecipientsEmailBackend.recipients += [
+            message.to[0] for message in messages if message.subject.startswith("Reminder:")
+        ]
+        return super().send_messages(messages)
+
+
+@override_settings(
+    REMINDER_BATCH_SIZE=2, EMAIL_BACKEND="apps.events.test.test_event_reminders.RecipientsEmailBackend"
+)
+class EventRemindersTest(TestCase):
+    def setUp(self):
+        self.addCleanup(cache.clear)
+        region = EventRegion.objects.create(name="Littoral")
+        city = EventCity.objects.create(name="Douala", region=region)
+        self.venue = EventVenue.objects.create(name="Hub", city=city)
+        self.event = self.create_event(timedelta(hours=24))
+        self.users = [
+            User.objects.create(username=f"user{index}", email=f"user{index}@example.com", is_active=True)
+            for index in range(5)
+        ]
+        for user in self.users:
+            EventRegistration.objects.create(event=self.event, user=user)
+        cache.clear()
+        RecipientsEmailBackend.recipients = []
+
+    def create_event(self, starts_in):
+        return Event.objects.create(
+            title="Django Girls Douala",
+            description="Test event",
+            location=self.venue,
+            date=now() + starts_in,
+            published=True,
+        )
+
+    def test_due_registrations_are_reminded_once(self):
+        later = self.create_event(timedelta(days=3))
+        EventRegistration.objects.create(event=later, user=self.users[0])
+        EventRegistration.objects.filter(user=self.users[4], event=self.event).update(status='cancelled')
+
+        send_event_reminders_task(hours=24)
+        send_event_reminders_task(hours=24)
+
+        self.assertCountEqual(RecipientsEmailBackend.recipients, [user.email for user in self.users[:4]])
+        self.assertEqual(EventRegistration.objects.filter(reminder_sent=True).count(), 4)
+        self.assertFalse(EventRegistration.objects.get(event=later).reminder_sent)
+
+    def test_registration_created_while_sending_is_not_marked_unless_reminded(self):
+        newcomer = User.objects.create(username="newcomer", email="newcomer@example.com", is_active=True)
+        send_event_reminder = NotificationService.send_event_reminder
+
+        def register_newcomer(service, users, event, **kwargs):
+            if not EventRegistration.objects.filter(user=newcomer).exists():
+                EventRegistration.objects.create(event=event, user=newcomer)
+            return send_event_reminder(service, users, event, **kwargs)
+
+        with mock.patch.object(NotificationService, 'send_event_reminder', register_newcomer):
+            send_event_reminders_task(hours=24)
+
+        reminded = set(RecipientsEmailBackend.recipients)
+        marked = set(
+            EventRegistration.objects.filter(reminder_sent=True).values_list('user__email', flat=True)
+        )
+        self.assertEqual(marked, reminded)
+        self.assertTrue({user.email for user in self.users} <= reminded)
+
+    def test_failed_batch_is_released(self):
+        with mock.patch.object(NotificationService, 'send_event_reminder', side_effect=RuntimeError("SMTP down")):
+            send_event_reminders_task(hours=24)
+
+        self.assertFalse(EventRegistration.objects.filter(reminder_sent=True).exists())
+
+        send_event_reminders_task(hours=24)
+
+        self.assertEqual(EventRegistration.objects.filter(reminder_sent=True).count(), 5)
+
+    def test_reminders_deferred_by_an_open_circuit_are_delivered_from_the_outbox(self):
+        cache.set(f"circuit:{SMTP_CIRCUIT}:opened_at", time.time(), timeout=None)
+
+        send_event_reminders_task(hours=24)
+
+        self.assertEqual(RecipientsEmailBackend.recipients, [])
+        self.assertEqual(EventRegistration.objects.filter(reminder_sent=True).count(), 5)
+        self.assertEqual(
+            NotificationOutbox.objects.filter(notification_type=NotificationOutbox.TYPE_EVENT_REMINDER).count(), 5
+        )
+
+        cache.delete(f"circuit:{SMTP_CIRCUIT}:opened_at")
+        self.assertEqual(OutboxService().dispatch(notification_types=NotificationOutbox.BULK_TYPES), (5, 5))
+        self.assertCountEqual(RecipientsEmailBackend.recipients, [user.email for user in self.users])
@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.utils.timezone import now
+from rest_framework.test import APITestCase
+
+from apps.events.models import Event, EventCity, EventRegion, EventTag, EventVenue, Speaker
+from apps.events.models.constants import EventCategory
+from apps.events.serializers.event_serializer import CreateEventInputSerializer
+
+
+class EventSearchTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        region = EventRegion.objects.create(name="Littoral")
+        city = EventCity.objects.create(name="Douala", region=region)
+        self.venue = EventVenue.objects.create(name="Hub", city=city)
+        self.speaker = Speaker.objects.create(name="Ada Lovelace")
+
+    def create_event(self, title, description="A meetup", tags=(), speakers=(), **extra):
+        serializer = CreateEventInputSerializer(data={
+            "title": title,
+            "description": description,
+            "location": self.venue.pk,
+            "date": (now() + timedelta(days=Event.objects.count() + 1)).isoformat(),
+            "tags": list(tags),
+            "speakers": [str(speaker.pk) for speaker in speakers],
+            **extra,
+        })
+        serializer.is_valid(raise_exception=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            return serializer.save()
+
+    def search(self, **params):
+        response = self.client.get("/api/v1/events/search/", params)
+        self.assertEqual(response.status_code, 200)
+        return [event["title"] for event in response.data["data"]]
+
+    def test_search_matches_tags_and_speakers_set_on_create(self):
+        self.create_event("Django Day", tags=["htmx"], speakers=[self.speaker])
+        self.create_event("Flutter Night")
+
+        self.assertEqual(self.search(q="htmx"), ["Django Day"])
+        self.assertEqual(self.search(q="lovelace"), ["Django Day"])
+
+    def test_title_matches_rank_before_description_matches(self):
+        self.create_event("Intro to Python", description="Beginner friendly")
+        self.create_event("Community meetup", description="We will talk about python packaging")
+
+        self.assertEqual(self.search(q="python"), ["Intro to Python", "Community meetup"])
+
+    def test_filters_apply_to_results(self):
+        self.create_event("Django workshop", category=EventCategory.WORKSHOPS.value)
+        self.create_event("Django talk", category=EventCategory.TALKS.value)
+
+        self.assertEqual(self.search(q="django", category=EventCategory.TALKS.value), ["Django talk"])
+
+    def test_search_vector_follows_tag_changes(self):
+        event = self.create_event("Meetup", tags=["orm"])
+        tag = EventTag.objects.get(name="orm")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.name = "postgres"
+            tag.save()
+        self.assertEqual(self.search(q="postgres"), ["Meetup"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            event.tags.clear()
+        self.assertEqual(self.search(q="postgres"), [])
+
+    def test_search_requires_a_query(self):
+        response = self.client.get("/api/v1/events/search/")
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,84 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+
+from apps.events.models import Event, EventCity, EventRegion, EventVenue
+from apps.events.test.test_sms_rate_limit import FakeClock
+from apps.users.models import NotificationOutbox
+from services import NotificationService, OutboxService, SMSService
+from services.fakes import FakeTwilioClient
+from services.rate_limiter import LocalTokenBuckets, RateLimiter
+
+User = get_user_model()
+
+
+@override_settings(SMS_RATE_LIMIT_PER_SENDER={"rate": 1, "capacity": 2}, SMS_RATE_LIMIT_PER_COUNTRY={})
+class FanOutRetriesTest(TestCase):
+    def setUp(self):
+        region = EventRegion.objects.create(name="Centre")
+        city = EventCity.objects.create(name="Yaounde", region=region)
+        venue = EventVenue.objects.create(name="Hub", city=city)
+        self.event = Event.objects.create(
+            title="PyCon Cameroon",
+            description="Test event",
+            location=venue,
+            date=now() + timedelta(days=7),
+            published=True,
+        )
+        self.users = [
+            User.objects.create(username=f"user{index}", email=f"user{index}@example.com",
+                                phone_number=f"+23767000000{index}", is_active=True)
+            for index in range(5)
+        ]
+        self.clock = FakeClock()
+        self.buckets = LocalTokenBuckets(clock=self.clock)
+        self.client = FakeTwilioClient()
+
+    def build_sms_service(self, max_wait):
+        service = SMSService(
+            client=self.client,
+            rate_limiter=RateLimiter(self.buckets, max_wait=max_wait, sleep=self.clock.sleep),
+        )
+        service.from_number = "+15005550006"
+        return service
+
+    def test_rate_limited_sms_are_queued_and_delivered_by_the_bulk_dispatcher(self):
+        notification_service = NotificationService(sms_service=self.build_sms_service(max_wait=0))
+
+        sent, failed, deferred = notification_service.send_event_cancelled_notification(
+            self.users, self.event, cancellation_reason="Venue closed", send_email=False,
+        )
+
+        self.assertEqual((sent, failed, len(deferred)), (5, 0, 3))
+        self.assertEqual(len(self.client.sent), 2)
+        messages = NotificationOutbox.objects.filter(notification_type=NotificationOutbox.TYPE_EVENT_CANCELLED)
+        self.assertEqual(
+            {str(user_id) for user_id in messages.values_list("recipient_id", flat=True)},
+            {str(user_id) for user_id in deferred},
+        )
+        self.assertEqual(messages.first().payload["cancellation_reason"], "Venue closed")
+
+        outbox_service = OutboxService()
+        outbox_service.sms_service = self.build_sms_service(max_wait=10)
+        self.assertEqual(outbox_service.dispatch(notification_types=NotificationOutbox.TRANSACTIONAL_TYPES), (0, 0))
+        self.assertEqual(outbox_service.dispatch(notification_types=NotificationOutbox.BULK_TYPES), (3, 3))
+
+        self.assertEqual(len({message.to for message in self.client.sent}), 5)
+        self.assertEqual({message.body for message in self.client.sent}, {self.client.sent[0].body})
+        self.assertIn("Event cancelled", self.client.sent[0].body)
+
+    def test_retry_of_an_event_that_has_started_is_dropped(self):
+        notification_service = NotificationService(sms_service=self.build_sms_service(max_wait=0))
+        notification_service.send_event_notification(self.users, self.event, send_sms=True, send_email=False)
+        Event.objects.filter(pk=self.event.pk).update(date=now() - timedelta(minutes=1))
+
+        outbox_service = OutboxService()
+        outbox_service.sms_service = self.build_sms_service(max_wait=10)
+        self.assertEqual(outbox_service.dispatch(), (3, 0))
+
+        self.assertEqual(
+            set(NotificationOutbox.objects.values_list("status", flat=True)), {NotificationOutbox.STATUS_FAILED}
+        )
+        self.assertEqual(len(self.client.sent), 2)
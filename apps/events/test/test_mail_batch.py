@@ -0,0 +1,60 @@
+import smtplib
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import SimpleTestCase, override_settings
+
+from services import MailService
+
+User = get_user_model()
+
+
+class FlakyEmailBackend(EmailBackend):
+    opened = 0
+    failures = 0
+
+    def open(self):
+        FlakyEmailBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        if FlakyEmailBackend.failures:
+            FlakyEmailBackend.failures -= 1
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_BACKEND="apps.events.test.test_mail_batch.FlakyEmailBackend")
+class MailBatchTest(SimpleTestCase):
+    def setUp(self):
+        FlakyEmailBackend.opened = 0
+        FlakyEmailBackend.failures = 0
+        mail.outbox = []
+        self.users = [User(username=f"user{index}", email=f"user{index}@example.com") for index in range(5)]
+
+    def test_batch_reuses_the_connection_and_recycles_it(self):
+        service = MailService()
+        with service.batch(batch_size=2):
+            for user in self.users:
+                service.send_welcome_email(user)
+
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(FlakyEmailBackend.opened, 3)
+
+    def test_batch_reconnects_when_the_connection_drops(self):
+        FlakyEmailBackend.failures = 1
+        service = MailService()
+        with service.batch(reconnect_attempts=1):
+            service.send_welcome_email(self.users[0])
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(FlakyEmailBackend.opened, 2)
+
+    def test_batch_gives_up_after_the_configured_attempts(self):
+        FlakyEmailBackend.failures = 2
+        service = MailService()
+        with self.assertRaises(smtplib.SMTPServerDisconnected):
+            with service.batch(reconnect_attempts=1):
+                service.send_welcome_email(self.users[0])
+        self.assertIsNone(service.connection)
@@ -0,0 +1,153 @@
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from celery.exceptions import Retry
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+
+from apps.events.models import (
+    Event, EventCity, EventRegion, EventVenue,
+    NotificationCampaign, NotificationCampaignChunk,
+)
+from apps.events.tasks import (
+    build_user_id_ranges,
+    claim_digest_campaign,
+    notify_users_on_new_event_task,
+    process_digest_campaign_task,
+    send_monthly_digest_task,
+)
+from services import MailService, NotificationService
+
+User = get_user_model()
+
+
+@override_settings(NOTIFICATION_CHUNK_SIZE=2, DIGEST_BATCH_SIZE=2)
+class NewEventCampaignTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        region = EventRegion.objects.create(name="Nord")
+        city = EventCity.objects.create(name="Garoua", region=region)
+        venue = EventVenue.objects.create(name="Hub", city=city)
+        self.event = Event.objects.create(
+            title="DjangoCon Africa watch party",
+            description="Test event",
+            location=venue,
+            date=now() + timedelta(days=7),
+            published=True,
+        )
+        self.users = [
+            User.objects.create(username=f"user{index}", email=f"user{index}@example.com", is_active=True)
+            for index in range(5)
+        ]
+        mail.outbox = []
+
+    def test_build_user_id_ranges_covers_every_user_once(self):
+        ranges = build_user_id_ranges(User.objects.all(), 2)
+
+        self.assertEqual(len(ranges), 3)
+        covered = [
+            user_id
+            for first_id, last_id in ranges
+            for user_id in User.objects.filter(id__gte=first_id, id__lte=last_id).values_list("id", flat=True)
+        ]
+        self.assertCountEqual(covered, User.objects.values_list("id", flat=True))
+
+    def test_campaign_records_chunks_and_totals(self):
+        notify_users_on_new_event_task(self.event.pk)
+
+        campaign = NotificationCampaign.objects.get(event=self.event)
+        self.assertEqual(campaign.status, NotificationCampaign.STATUS_COMPLETED)
+        self.assertEqual((campaign.total_chunks, campaign.completed_chunks), (3, 3))
+        self.assertEqual((campaign.sent_count, campaign.failed_count), (5, 0))
+        self.assertIsNotNone(campaign.finished_at)
+        self.assertFalse(campaign.chunks.exclude(status=NotificationCampaignChunk.STATUS_COMPLETED).exists())
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_failed_sends_are_counted(self):
+        failing_email = self.users[0].email
+        send = MailService.send_event_notification
+
+        def send_or_fail(service, user, *args, **kwargs):
+            if user.email == failing_email:
+                raise ConnectionError("SMTP down")
+            return send(service, user, *args, **kwargs)
+
+        with mock.patch.object(MailService, "send_event_notification", autospec=True, side_effect=send_or_fail):
+            notify_users_on_new_event_task(self.event.pk)
+
+        campaign = NotificationCampaign.objects.get(event=self.event)
+        self.assertEqual(campaign.status, NotificationCampaign.STATUS_COMPLETED_WITH_ERRORS)
+        self.assertEqual((campaign.sent_count, campaign.failed_count), (4, 1))
+
+    def test_digest_resumes_from_its_checkpoint(self):
+        send_digest = NotificationService.send_upcoming_events_digest
+        calls = []
+
+        def crash_on_second_batch(service, users, *args, **kwargs):
+            calls.append(users)
+            if len(calls) == 2:
+                raise SystemExit("worker lost")
+            return send_digest(service, users, *args, **kwargs)
+
+        with mock.patch.object(
+            NotificationService, "send_upcoming_events_digest", autospec=True, side_effect=crash_on_second_batch,
+        ), mock.patch.object(process_digest_campaign_task, "delay"):
+            send_monthly_digest_task()
+            campaign = NotificationCampaign.objects.get(kind=NotificationCampaign.KIND_MONTHLY_DIGEST)
+            with self.assertRaises(SystemExit):
+                process_digest_campaign_task(str(campaign.id))
+
+        campaign.refresh_from_db()
+        self.assertEqual(campaign.status, NotificationCampaign.STATUS_RUNNING)
+        self.assertEqual((campaign.total_recipients, campaign.sent_count), (5, 2))
+        self.assertEqual(campaign.last_processed_user_id, calls[0][-1].id)
+        self.assertTrue(campaign.is_leased)
+
+        # The crashed run still holds the lease, resume once it has expired
+        NotificationCampaign.objects.filter(pk=campaign.pk).update(lease_expires_at=now() - timedelta(seconds=1))
+        send_monthly_digest_task()
+
+        campaign.refresh_from_db()
+        self.assertEqual(campaign.status, NotificationCampaign.STATUS_COMPLETED)
+        self.assertEqual((campaign.sent_count, campaign.failed_count), (5, 0))
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(NotificationCampaign.objects.filter(kind=NotificationCampaign.KIND_MONTHLY_DIGEST).count(), 1)
+
+    def test_digest_leased_by_another_run_is_not_sent_twice(self):
+        with mock.patch.object(process_digest_campaign_task, "delay"):
+            send_monthly_digest_task()
+        campaign = NotificationCampaign.objects.get(kind=NotificationCampaign.KIND_MONTHLY_DIGEST)
+        self.assertIsNotNone(claim_digest_campaign(str(campaign.id), uuid.uuid4()))
+        self.assertIsNone(claim_digest_campaign(str(campaign.id), uuid.uuid4()))
+
+        with mock.patch.object(process_digest_campaign_task, "delay") as delay:
+            send_monthly_digest_task()
+        delay.assert_not_called()
+
+        with self.assertRaises(Retry):
+            process_digest_campaign_task(str(campaign.id))
+
+        campaign.refresh_from_db()
+        self.assertEqual((campaign.status, campaign.sent_count), (NotificationCampaign.STATUS_RUNNING, 0))
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_digest_run_stops_when_its_lease_is_taken_over(self):
+        send_digest = NotificationService.send_upcoming_events_digest
+
+        def lose_lease(service, users, *args, **kwargs):
+            NotificationCampaign.objects.update(lease_owner=uuid.uuid4())
+            return send_digest(service, users, *args, **kwargs)
+
+        with mock.patch.object(
+            NotificationService, "send_upcoming_events_digest", autospec=True, side_effect=lose_lease,
+        ):
+            send_monthly_digest_task()
+
+        campaign = NotificationCampaign.objects.get(kind=NotificationCampaign.KIND_MONTHLY_DIGEST)
+        self.assertEqual(campaign.status, NotificationCampaign.STATUS_RUNNING)
+        self.assertEqual((campaign.sent_count, campaign.last_processed_user_id), (0, None))
+        self.assertEqual(len(mail.outbox), 2)
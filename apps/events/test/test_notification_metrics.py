@@ -0,0 +1,101 @@
+import socket
+import time
+import urllib.request
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from prometheus_client import REGISTRY
+
+from services import MailService, SMSService, metrics
+from services.fakes import FakeTwilioClient
+from services.rate_limiter import LocalTokenBuckets, RateLimiter
+
+User = get_user_model()
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MailMetricsTest(TestCase):
+    def setUp(self):
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create(username="amina", email="amina@example.com")
+
+    def test_sent_email_is_counted_and_timed(self):
+        labels = {"type": metrics.WELCOME, "channel": metrics.CHANNEL_EMAIL}
+        sent = sample("notifications_total", outcome=metrics.OUTCOME_SENT, **labels)
+        renders = sample("notification_render_seconds_count", **labels)
+        calls = sample("notification_provider_seconds_count", **labels)
+        latencies = sample("notification_end_to_end_seconds_count", **labels)
+
+        with metrics.enqueued_since(time.time() - 2):
+            MailService().send_welcome_email(self.user)
+
+        self.assertEqual(sample("notifications_total", outcome=metrics.OUTCOME_SENT, **labels) - sent, 1)
+        self.assertEqual(sample("notification_render_seconds_count", **labels) - renders, 1)
+        self.assertEqual(sample("notification_provider_seconds_count", **labels) - calls, 1)
+        self.assertEqual(sample("notification_end_to_end_seconds_count", **labels) - latencies, 1)
+        self.assertEqual(sample("notification_end_to_end_seconds_bucket", le="1.0", **labels), 0)
+
+
+@override_settings(SMS_RATE_LIMIT_PER_SENDER={"rate": 1000, "capacity": 1000}, SMS_RATE_LIMIT_PER_COUNTRY={})
+class SMSMetricsTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_bulk_sms_outcomes_are_labelled_with_the_notification_type(self):
+        labels = {"type": metrics.REMINDER, "channel": metrics.CHANNEL_SMS}
+        sent = sample("notifications_total", outcome=metrics.OUTCOME_SENT, **labels)
+        failed = sample("notifications_total", outcome=metrics.OUTCOME_FAILED, **labels)
+        latencies = sample("notification_end_to_end_seconds_count", **labels)
+        service = SMSService(client=FakeTwilioClient(failures=1, failure_status=400),
+                             rate_limiter=RateLimiter(LocalTokenBuckets()))
+        service.from_number = "+15005550006"
+
+        with metrics.enqueued_since(time.time()):
+            service.send_bulk(
+                [(f"+23767000000{index}", "Reminder") for index in range(4)],
+                max_in_flight=2, notification_type=metrics.REMINDER,
+            )
+
+        self.assertEqual(sample("notifications_total", outcome=metrics.OUTCOME_SENT, **labels) - sent, 3)
+        self.assertEqual(sample("notifications_total", outcome=metrics.OUTCOME_FAILED, **labels) - failed, 1)
+        # Measured from the pool threads too
+        self.assertEqual(sample("notification_end_to_end_seconds_count", **labels) - latencies, 3)
+
+    def test_unconfigured_sms_is_skipped(self):
+        labels = {"type": metrics.OTP, "channel": metrics.CHANNEL_SMS, "outcome": metrics.OUTCOME_SKIPPED}
+        skipped = sample("notifications_total", **labels)
+        service = SMSService(client=FakeTwilioClient())
+        service.from_number = None
+
+        service.send_otp_sms("+237670000001", "123456")
+
+        self.assertEqual(sample("notifications_total", **labels) - skipped, 1)
+
+
+class WorkerMetricsTest(SimpleTestCase):
+    def test_published_tasks_inherit_the_enqueue_time(self):
+        headers = {}
+        with metrics.enqueued_since(1000.0):
+            metrics.stamp_enqueued_at(headers)
+        self.assertEqual(headers[metrics.ENQUEUED_AT_HEADER], 1000.0)
+
+        headers = {}
+        metrics.stamp_enqueued_at(headers)
+        self.assertAlmostEqual(headers[metrics.ENQUEUED_AT_HEADER], time.time(), delta=5)
+
+    def test_exporter_serves_the_notification_metrics(self):
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        metrics.record_notification(metrics.DIGEST, metrics.CHANNEL_EMAIL, metrics.OUTCOME_FAILED)
+
+        metrics.start_worker_exporter(port)
+
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            body = response.read().decode()
+        self.assertIn('notifications_total{channel="email",outcome="failed",type="digest"}', body)
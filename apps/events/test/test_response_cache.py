@@ -0,0 +1,89 @@
+import json
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from apps.events.models import Project
+from utils.response_cache import (
+    _version_key, bump_namespace_version, cached_response, get_namespace_version, invalidate_on_commit,
+)
+
+User = get_user_model()
+
+NAMESPACE = "test"
+
+
+class CountingView:
+    def __init__(self):
+        self.calls = 0
+
+    @cached_response(NAMESPACE)
+    def get(self, request):
+        self.calls += 1
+        return Response({"calls": self.calls, "path": request.get_full_path()})
+
+
+class ResponseCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.view = CountingView()
+
+    def get(self, path="/things/", user=None, **params):
+        request = APIRequestFactory().get(path, params)
+        request.user = user or AnonymousUser()
+        response = self.view.get(request)
+        self.assertEqual(response.status_code, 200)
+        # Hits are plain HttpResponses holding the cached JSON
+        return response.data if hasattr(response, "data") else json.loads(response.content)
+
+    def test_miss_then_hit(self):
+        self.assertEqual(self.get()["calls"], 1)
+        self.assertEqual(self.get()["calls"], 1)
+        self.assertEqual(self.view.calls, 1)
+
+    def test_version_bump_invalidates(self):
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_on_commit(NAMESPACE)
+            self.assertEqual(self.get()["calls"], 1)
+
+        self.assertEqual(self.get()["calls"], 2)
+        self.assertEqual(self.get()["calls"], 2)
+
+    def test_keyed_by_query_string(self):
+        self.assertEqual(self.get(page=1)["calls"], 1)
+        self.assertEqual(self.get(page=2)["calls"], 2)
+        self.assertEqual(self.get(page=1)["calls"], 1)
+
+    def test_keyed_by_authenticated_user(self):
+        ada, grace = User(pk=uuid.uuid4()), User(pk=uuid.uuid4())
+
+        self.assertEqual(self.get()["calls"], 1)
+        self.assertEqual(self.get(user=ada)["calls"], 2)
+        self.assertEqual(self.get(user=grace)["calls"], 3)
+        self.assertEqual(self.get(user=ada)["calls"], 2)
+        self.assertEqual(self.get()["calls"], 1)
+
+    def test_evicted_version_does_not_serve_older_entries(self):
+        version = get_namespace_version(NAMESPACE)
+        self.get()
+        bump_namespace_version(NAMESPACE)
+        self.get()
+        cache.delete(_version_key(NAMESPACE))
+
+        self.assertGreater(get_namespace_version(NAMESPACE), version + 1)
+        self.assertEqual(self.get()["calls"], 3)
+
+    def test_saving_a_project_invalidates_the_projects_list(self):
+        self.assertEqual(self.client.get("/api/v1/projects/").json()["data"], [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Project.objects.create(title="Website", description="This API", published=True)
+
+        response = self.client.get("/api/v1/projects/")
+        self.assertEqual([project["title"] for project in response.json()["data"]], ["Website"])
@@ -0,0 +1,120 @@
+import math
+import os
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, override_settings
+
+from apps.events.test.test_sms_rate_limit import FakeClock
+
+from services import NotificationService, SMSService
+from services.fakes import FakeTwilioClient
+from services.rate_limiter import LocalTokenBuckets, RateLimiter
+from services.sms_service import _client_pools
+
+User = get_user_model()
+
+
+@override_settings(SMS_RATE_LIMIT_PER_SENDER={"rate": 1000, "capacity": 1000}, SMS_RATE_LIMIT_PER_COUNTRY={})
+class SMSBulkTest(SimpleTestCase):
+    def build_service(self, client):
+        service = SMSService(client=client, rate_limiter=RateLimiter(LocalTokenBuckets()))
+        service.from_number = "+15005550006"
+        return service
+
+    def test_results_follow_the_order_of_the_messages(self):
+        client = FakeTwilioClient(latency=0.01)
+        messages = [(f"+2376700000{index:02d}", f"Message {index}") for index in range(20)]
+
+        results = self.build_service(client).send_bulk(messages, max_in_flight=4)
+
+        self.assertEqual([result["to"] for result in results], [to for to, _ in messages])
+        self.assertTrue(all(result["success"] for result in results))
+        self.assertEqual(len(client.sent), 20)
+        self.assertLessEqual(client.max_in_flight, 4)
+        self.assertGreater(client.max_in_flight, 1)
+
+    def test_one_failure_does_not_stop_the_others(self):
+        client = FakeTwilioClient(failures=1, failure_status=500)
+
+        results = self.build_service(client).send_bulk([("+237670000001", "A"), ("+237670000002", "B")])
+
+        self.assertEqual(sum(1 for result in results if result["success"]), 1)
+        self.assertEqual(len(client.sent), 1)
+
+    def test_threads_reuse_the_pooled_clients_across_calls(self):
+        built = []
+
+        def build_client(service):
+            built.append(FakeTwilioClient(latency=0.01))
+            return built[-1]
+
+        self.addCleanup(_client_pools.clear)
+        messages = [(f"+2376700000{index:02d}", f"Message {index}") for index in range(8)]
+        with mock.patch.dict(os.environ, {"TWILIO_SID": "AC1", "TWILIO_PHONE_NUMBER": "+15005550006"}), \
+                mock.patch.object(SMSService, "_build_client", build_client):
+            service = SMSService(rate_limiter=RateLimiter(LocalTokenBuckets()))
+            service.send_bulk(messages, max_in_flight=4)
+            clients = len(built)
+            SMSService(rate_limiter=RateLimiter(LocalTokenBuckets())).send_bulk(messages, max_in_flight=1)
+
+        # The client of each service, and at most one per thread, taken again from the pool by the second call
+        self.assertLessEqual(clients, 1 + 4)
+        self.assertEqual(len(built), clients + 1)
+        self.assertEqual(sum(len(client.sent) for client in built), 16)
+
+    def test_notification_service_counts_sms_failures(self):
+        client = FakeTwilioClient(failures=1, failure_status=500)
+        service = NotificationService()
+        service.sms_service = self.build_service(client)
+        users = [
+            User(username=f"user{index}", phone_number=f"+23767000000{index}") for index in range(3)
+        ] + [User(username="no-phone")]
+
+        failed_ids, deferred_ids = service._send_sms_to_users(users, "Hello", "test")
+
+        self.assertEqual(len(failed_ids), 1)
+        self.assertEqual(deferred_ids, set())
+        self.assertEqual(len(client.sent), 2)
+
+
+class SMSBulkDefaultLimitsTest(SimpleTestCase):
+    def test_fan_out_under_the_default_limits_delivers_every_message(self):
+        clock = FakeClock()
+        client = FakeTwilioClient(latency=0.001)
+        sms_service = SMSService(
+            client=client,
+            rate_limiter=RateLimiter(
+                LocalTokenBuckets(clock=clock), max_wait=settings.SMS_RATE_LIMIT_MAX_WAIT, sleep=clock.sleep,
+            ),
+        )
+        sms_service.from_number = "+15005550006"
+        service = NotificationService(sms_service=sms_service)
+        users = [User(username=f"user{index}", phone_number=f"+237670000{index:03d}") for index in range(200)]
+
+        failed_ids, deferred_ids = service._send_sms_to_users(users, "Hello", "test")
+
+        self.assertEqual((failed_ids, deferred_ids), (set(), set()))
+        self.assertEqual(len({message.to for message in client.sent}), 200)
+        # One message per second with half second requests needs no concurrency, more threads would only
+        # compete for the tokens
+        self.assertEqual(client.max_in_flight, 1)
+        # The burst goes out at once, then one message per token
+        sender = settings.SMS_RATE_LIMIT_PER_SENDER
+        self.assertAlmostEqual(clock.slept, (200 - sender["capacity"]) / sender["rate"])
+
+    @override_settings(
+        SMS_RATE_LIMIT_PER_SENDER={"rate": 20, "capacity": 5}, SMS_RATE_LIMIT_PER_COUNTRY={}, SMS_EXPECTED_LATENCY=0.2,
+    )
+    def test_requests_in_flight_follow_the_rate_and_latency(self):
+        client = FakeTwilioClient(latency=0.02)
+        sms_service = SMSService(client=client, rate_limiter=RateLimiter(LocalTokenBuckets(), max_wait=10))
+        sms_service.from_number = "+15005550006"
+        messages = [(f"+237670000{index:03d}", "Hello") for index in range(20)]
+
+        results = sms_service.send_bulk(messages)
+
+        self.assertTrue(all(result["success"] for result in results))
+        self.assertLessEqual(client.max_in_flight, math.ceil(20 * 0.2))
+        self.assertGreater(client.max_in_flight, 1)
@@ -0,0 +1,116 @@
+import os
+import unittest
+import uuid
+
+from django.test import SimpleTestCase, override_settings
+
+from services import SMSService
+from services.fakes import FakeTwilioClient
+from services.rate_limiter import Bucket, LocalTokenBuckets, RateLimiter, RedisTokenBuckets
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+        self.slept += seconds
+
+
+class TokenBucketTest(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.buckets = LocalTokenBuckets(clock=self.clock)
+
+    def test_bucket_allows_a_burst_then_refills_at_its_rate(self):
+        bucket = Bucket("sender", rate=1, capacity=2)
+
+        self.assertEqual(self.buckets.take([bucket]), 0)
+        self.assertEqual(self.buckets.take([bucket]), 0)
+        self.assertAlmostEqual(self.buckets.take([bucket]), 1.0)
+
+        self.clock.now += 1
+        self.assertEqual(self.buckets.take([bucket]), 0)
+
+    def test_tokens_are_taken_from_every_bucket_or_none(self):
+        sender = Bucket("sender", rate=1, capacity=1)
+        country = Bucket("country", rate=0.5, capacity=1)
+        self.buckets.take([country])
+
+        self.assertAlmostEqual(self.buckets.take([sender, country]), 2.0)
+        # The sender bucket was left untouched
+        self.assertEqual(self.buckets.take([sender]), 0)
+
+
+@override_settings(
+    SMS_RATE_LIMIT_PER_SENDER={"rate": 1, "capacity": 2},
+    SMS_RATE_LIMIT_PER_COUNTRY={"237": {"rate": 0.5, "capacity": 1}},
+)
+class SMSRateLimitTest(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.client = FakeTwilioClient()
+
+    def build_service(self, max_wait=10):
+        limiter = RateLimiter(LocalTokenBuckets(clock=self.clock), max_wait=max_wait, sleep=self.clock.sleep)
+        service = SMSService(client=self.client, rate_limiter=limiter)
+        service.from_number = "+15005550006"
+        return service
+
+    def test_sends_wait_for_their_turn_instead_of_failing(self):
+        service = self.build_service()
+
+        results = [service.send_sms("+33612345678", "Hello") for _ in range(5)]
+
+        self.assertTrue(all(result["success"] for result in results))
+        self.assertEqual(len(self.client.sent), 5)
+        self.assertAlmostEqual(self.clock.slept, 3.0)
+
+    def test_destination_country_has_its_own_limit(self):
+        service = self.build_service()
+
+        service.send_sms("+237670000001", "Hello")
+        service.send_sms("+237670000002", "Hello")
+
+        self.assertAlmostEqual(self.clock.slept, 2.0)
+
+    def test_send_is_reported_rate_limited_past_the_max_wait(self):
+        service = self.build_service(max_wait=0)
+        service.send_sms("+237670000001", "Hello")
+
+        result = service.send_sms("+237670000002", "Hello")
+
+        self.assertFalse(result["success"])
+        self.assertTrue(result["rate_limited"])
+        self.assertAlmostEqual(result["retry_after"], 2.0)
+        self.assertEqual(len(self.client.sent), 1)
+
+    def test_twilio_429_is_reported_rate_limited(self):
+        self.client.failures = 1
+        service = self.build_service()
+
+        result = service.send_sms("+33612345678", "Hello")
+
+        self.assertFalse(result["success"])
+        self.assertTrue(result["rate_limited"])
+        self.assertEqual(result["error_code"], 20429)
+
+
+@unittest.skipUnless(os.getenv("REDIS_URL"), "REDIS_URL is not set")
+class RedisTokenBucketTest(SimpleTestCase):
+    def test_workers_share_the_bucket(self):
+        import redis
+
+        client = redis.Redis.from_url(os.getenv("REDIS_URL"))
+        bucket = Bucket(f"test:{uuid.uuid4()}", rate=0.001, capacity=2)
+        self.addCleanup(client.delete, f"rate-limit:{bucket.key}")
+        workers = [RedisTokenBuckets(client), RedisTokenBuckets(client)]
+
+        self.assertEqual(workers[0].take([bucket]), 0)
+        self.assertEqual(workers[1].take([bucket]), 0)
+        self.assertGreater(workers[0].take([bucket]), 0)
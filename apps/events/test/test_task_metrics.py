@@ -0,0 +1,55 @@
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from celery import shared_task
+from django.test import SimpleTestCase
+from prometheus_client import REGISTRY
+
+from services.task_metrics import PUBLISHED_AT_HEADER, _queued_since, stamp_published_at
+
+TASK_NAME = "apps.events.test.test_task_metrics.metrics_probe_task"
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@shared_task
+def metrics_probe_task(fail=False):
+    if fail:
+        raise ValueError("Probe failure")
+    return sample("celery_tasks_in_flight", task=TASK_NAME, queue="")
+
+
+class TaskMetricsTest(SimpleTestCase):
+    def test_successful_run_is_timed_and_in_flight_while_running(self):
+        runs = sample("celery_task_runtime_seconds_count", task=TASK_NAME, state="SUCCESS")
+
+        in_flight = metrics_probe_task.apply().get()
+
+        self.assertEqual(in_flight, 1)
+        self.assertEqual(sample("celery_tasks_in_flight", task=TASK_NAME, queue=""), 0)
+        self.assertEqual(sample("celery_task_runtime_seconds_count", task=TASK_NAME, state="SUCCESS") - runs, 1)
+
+    def test_failed_run_is_counted_by_exception(self):
+        failures = sample("celery_task_failures_total", task=TASK_NAME, exception="ValueError")
+        runs = sample("celery_task_runtime_seconds_count", task=TASK_NAME, state="FAILURE")
+
+        metrics_probe_task.apply(kwargs={"fail": True})
+
+        self.assertEqual(sample("celery_task_failures_total", task=TASK_NAME, exception="ValueError") - failures, 1)
+        self.assertEqual(sample("celery_task_runtime_seconds_count", task=TASK_NAME, state="FAILURE") - runs, 1)
+
+    def test_queue_wait_starts_at_publication_or_eta(self):
+        headers = {}
+        stamp_published_at(headers)
+        self.assertAlmostEqual(headers[PUBLISHED_AT_HEADER], time.time(), delta=5)
+
+        published_at = time.time() - 60
+        eta = datetime.fromtimestamp(published_at + 30, tz=timezone.utc).isoformat()
+        self.assertEqual(_queued_since(SimpleNamespace(published_at=published_at, eta=None)), published_at)
+        self.assertAlmostEqual(
+            _queued_since(SimpleNamespace(published_at=published_at, eta=eta)), published_at + 30, places=3
+        )
+        self.assertIsNone(_queued_since(SimpleNamespace(eta=None)))
@@ -1,7 +1,6 @@
 from django.http import HttpResponse
 from django.utils.translation import gettext_lazy as _
 from drf_spectacular.utils import extend_schema, OpenApiResponse
-from oauth2_provider.contrib.rest_framework import OAuth2Authentication
 from rest_framework import status, serializers
 from rest_framework.decorators import action
 from rest_framework.parsers import JSONParser
@@ -10,17 +9,24 @@ from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
 from apps.events.models.event import Event
+from apps.events.search import search_events
 from apps.events.serializers.event_serializer import (
     CreateEventInputSerializer,
+    EventSearchInputSerializer,
     EventSerializer,
 )
 from apps.events.serializers.reservation_serializer import ReservationSerializer
+from apps.users.authentication import CachedOAuth2Authentication
+from apps.users.pagination import CURSOR_PARAMETER
 from mixins.api_response_mixin import APIResponseMixin
+from mixins.query_plan_mixin import QueryPlanMixin
+from utils.conditional_get import conditional_get
+from utils.response_cache import EVENTS_NAMESPACE, cached_response
 
 
-class EventViewSet(ModelViewSet, APIResponseMixin):
-    queryset = Event.objects.all().select_related('created_by', 'updated_by')
-    authentication_classes = [OAuth2Authentication]
+class EventViewSet(QueryPlanMixin, ModelViewSet, APIResponseMixin):
+    queryset = Event.objects.defer("search_vector")
+    authentication_classes = [CachedOAuth2Authentication]
     http_method_names = ["get", "post", "put", "delete"]
     parser_classes = [JSONParser]
 
@@ -30,7 +36,7 @@ class EventViewSet(ModelViewSet, APIResponseMixin):
         return EventSerializer
 
     def get_permissions(self):
-        if self.action in ["list", "retrieve"]:
+        if self.action in ["list", "retrieve", "search"]:
             permission_classes = [AllowAny]
         else:
             permission_classes = [IsAuthenticated]
@@ -39,6 +45,7 @@ class EventViewSet(ModelViewSet, APIResponseMixin):
     @extend_schema(
         summary="Get all events",
         operation_id="get_events",
+        parameters=[CURSOR_PARAMETER],
         description="Get all events.",
         responses={
             200: OpenApiResponse(
@@ -48,6 +55,8 @@ class EventViewSet(ModelViewSet, APIResponseMixin):
         },
         tags=["Events"],
     )
+    @conditional_get(namespace=EVENTS_NAMESPACE)
+    @cached_response(EVENTS_NAMESPACE)
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
         return self.paginated_response(
@@ -58,6 +67,44 @@ class EventViewSet(ModelViewSet, APIResponseMixin):
             status_code=status.HTTP_200_OK,
         )
 
+    @extend_schema(
+        summary="Search events",
+        operation_id="search_events",
+        parameters=[EventSearchInputSerializer],
+        description="Full-text search on the title, description, tags and speakers of events, "
+                    "most relevant first.",
+        responses={
+            200: OpenApiResponse(
+                response=EventSerializer(many=True),
+                description=_("Search results")
+            )
+        },
+        tags=["Events"],
+    )
+    @action(detail=False, methods=["GET"])
+    @cached_response(EVENTS_NAMESPACE)
+    def search(self, request, *args, **kwargs):
+        search_serializer = EventSearchInputSerializer(data=request.query_params)
+        search_serializer.is_valid(raise_exception=True)
+        filters = search_serializer.validated_data
+
+        queryset = self.get_queryset()
+        for field in ("category", "for_community", "type"):
+            if field in filters:
+                queryset = queryset.filter(**{field: filters[field]})
+        if "date_from" in filters:
+            queryset = queryset.filter(date__gte=filters["date_from"])
+        if "date_to" in filters:
+            queryset = queryset.filter(date__lte=filters["date_to"])
+
+        return self.paginated_response(
+            request=request,
+            queryset=search_events(queryset, filters["q"]),
+            serializer_class=EventSerializer,
+            message=_("Search results"),
+            status_code=status.HTTP_200_OK,
+        )
+
     @extend_schema(
         summary="Create an event",
         operation_id="create_event",
@@ -93,10 +140,10 @@ class EventViewSet(ModelViewSet, APIResponseMixin):
         },
         tags=["Events"],
     )
+    @conditional_get(detail=True, namespace=EVENTS_NAMESPACE)
+    @cached_response(EVENTS_NAMESPACE)
     def retrieve(self, request, *args, **kwargs):
-        event = self.get_queryset().select_related(
-            'created_by', 'updated_by'
-        ).get(pk=kwargs['pk'])
+        event = self.get_queryset().get(pk=kwargs['pk'])
         serializer = EventSerializer(event)
         return self.success(
             message=_("Event details"),
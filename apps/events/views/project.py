@@ -8,6 +8,8 @@ from rest_framework.views import APIView
 from apps.events.models import Project
 from apps.events.serializers.project_serializer import ProjectSerializer
 from mixins import APIResponseMixin
+from utils.conditional_get import conditional_get
+from utils.response_cache import PROJECTS_NAMESPACE, cached_response
 
 
 class ProjectsListView(APIResponseMixin, APIView):
@@ -25,6 +27,8 @@ class ProjectsListView(APIResponseMixin, APIView):
             ),
         }
     )
+    @conditional_get(Project.objects.filter(published=True), namespace=PROJECTS_NAMESPACE)
+    @cached_response(PROJECTS_NAMESPACE)
     def get(self, request):
         projects = Project.objects.filter(published=True).order_by('-is_featured', '-created_at')
         serializer = ProjectSerializer(projects, many=True)
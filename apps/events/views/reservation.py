@@ -1,6 +1,5 @@
 from django.utils.translation import gettext_lazy as _
 from drf_spectacular.utils import extend_schema, OpenApiResponse
-from oauth2_provider.contrib.rest_framework import OAuth2Authentication
 from rest_framework import status, serializers
 from rest_framework.decorators import action
 from rest_framework.parsers import JSONParser
@@ -13,12 +12,15 @@ from apps.events.serializers.reservation_serializer import (
     CreateReservationSerializer,
     ReservationSerializer,
 )
+from apps.users.authentication import CachedOAuth2Authentication
+from apps.users.pagination import CURSOR_PARAMETER
 from mixins.api_response_mixin import APIResponseMixin
+from mixins.query_plan_mixin import QueryPlanMixin
 
 
-class ReservationViewSet(ModelViewSet, APIResponseMixin):
+class ReservationViewSet(QueryPlanMixin, ModelViewSet, APIResponseMixin):
     queryset = Reservation.objects.all()
-    authentication_classes = [OAuth2Authentication]
+    authentication_classes = [CachedOAuth2Authentication]
     http_method_names = ["get", "post", "put", "delete"]
     parser_classes = [JSONParser]
 
@@ -42,6 +44,7 @@ class ReservationViewSet(ModelViewSet, APIResponseMixin):
     @extend_schema(
         summary="List all reservations",
         operation_id="list_reservations",
+        parameters=[CURSOR_PARAMETER],
         description="List all reservations.",
         tags=["Reservations"],
     )
@@ -1,5 +1,4 @@
 from drf_spectacular.utils import extend_schema
-from oauth2_provider.contrib.rest_framework import OAuth2Authentication
 from rest_framework import status
 from rest_framework.parsers import JSONParser
 from rest_framework.permissions import IsAuthenticated, AllowAny
@@ -10,8 +9,11 @@ from apps.events.serializers.speaker_serializer import (
     SpeakerSerializer,
     SpeakerWithLastUpdatedBySerializer,
 )
+from apps.users.authentication import CachedOAuth2Authentication
 from apps.users.serializers.general_serializers import PaginatedResponseSerializer
 from mixins.api_response_mixin import APIResponseMixin
+from utils.conditional_get import conditional_get
+from utils.response_cache import SPEAKERS_NAMESPACE
 
 
 class SpeakerViewSet(ModelViewSet, APIResponseMixin):
@@ -19,7 +21,7 @@ class SpeakerViewSet(ModelViewSet, APIResponseMixin):
     ViewSet for managing speakers.
     """
     queryset = Speaker.objects.all()
-    authentication_classes = [OAuth2Authentication]
+    authentication_classes = [CachedOAuth2Authentication]
     parser_classes = [JSONParser]
     http_method_names = ["get", "post", "put", "delete"]
 
@@ -66,6 +68,7 @@ class SpeakerViewSet(ModelViewSet, APIResponseMixin):
             status.HTTP_200_OK: PaginatedResponseSerializer(data_serializer_class=SpeakerSerializer),
         }
     )
+    @conditional_get(namespace=SPEAKERS_NAMESPACE)
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
@@ -76,6 +79,7 @@ class SpeakerViewSet(ModelViewSet, APIResponseMixin):
         description="Get a speaker.",
         responses={200: SpeakerSerializer},
     )
+    @conditional_get(detail=True, namespace=SPEAKERS_NAMESPACE)
     def retrieve(self, request, *args, **kwargs):
         return super().retrieve(request, *args, **kwargs)
 
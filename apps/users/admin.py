@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from apps.users.models import NotificationSettings, OtpCode, User
+from apps.users.models import NotificationOutbox, NotificationSettings, OtpCode, User
 
 admin.site.register(User)
 admin.site.register(OtpCode)
@@ -30,3 +30,19 @@ class NotificationSettingsAdmin(admin.ModelAdmin):
 
 	def has_delete_permission(self, request, obj=None):
 		return False
+
+
+@admin.register(NotificationOutbox)
+class NotificationOutboxAdmin(admin.ModelAdmin):
+	list_display = (
+		'notification_type',
+		'channel',
+		'recipient',
+		'status',
+		'attempts',
+		'next_attempt_at',
+		'sent_at',
+	)
+	list_filter = ('status', 'notification_type', 'channel')
+	search_fields = ('idempotency_key', 'recipient__email')
+	raw_id_fields = ('recipient',)
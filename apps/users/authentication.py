@@ -0,0 +1,196 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.functional import SimpleLazyObject
+from django_prometheus.conf import NAMESPACE
+from oauth2_provider.contrib.rest_framework import OAuth2Authentication
+from oauth2_provider.models import AccessToken
+from prometheus_client import Counter
+
+User = get_user_model()
+
+CACHE_KEY_PREFIX = "oauth2-token:v1:"
+# Marks a deleted token, so a request that read it just before the deletion cannot cache it again
+REVOKED_KEY_PREFIX = "oauth2-token-revoked:v1:"
+
+access_token_lookups_total = Counter(
+    "access_token_lookups_total",
+    "Access token resolutions by the layer that answered, local and cache lookups avoided a query",
+    ["source"],
+    namespace=NAMESPACE,
+)
+
+_local_lock = threading.Lock()
+# Token hash -> (local expiry, entry), least recently used first
+_local_entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+
+def hash_token(token: str) -> str:
+    """Tokens are never kept in the caches, only their hash"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _get_local(token_hash: str) -> Optional[dict]:
+    with _local_lock:
+        item = _local_entries.get(token_hash)
+        if item is None:
+            return None
+        expires_at, entry = item
+        if time.monotonic() >= expires_at:
+            del _local_entries[token_hash]
+            return None
+        _local_entries.move_to_end(token_hash)
+        return entry
+
+
+def _set_local(token_hash: str, entry: dict):
+    ttl = settings.AUTH_TOKEN_LOCAL_TTL
+    if ttl <= 0:
+        return
+    with _local_lock:
+        _local_entries[token_hash] = (time.monotonic() + ttl, entry)
+        _local_entries.move_to_end(token_hash)
+        while len(_local_entries) > settings.AUTH_TOKEN_LOCAL_CACHE_SIZE:
+            _local_entries.popitem(last=False)
+
+
+def get_cached_token(token_hash: str) -> Optional[dict]:
+    """
+    Get the cached resolution of an access token, from this process, then the shared cache
+    :return: dict with id, user_id, scope and expires (Unix time), None when not cached or expired
+    """
+    entry = _get_local(token_hash)
+    source = "local"
+    if entry is None:
+        try:
+            entry = cache.get(CACHE_KEY_PREFIX + token_hash)
+        except Exception:
+            entry = None
+        if entry is None:
+            return None
+        source = "cache"
+        _set_local(token_hash, entry)
+
+    if entry["expires"] <= time.time():
+        evict_token(token_hash)
+        return None
+    access_token_lookups_total.labels(source=source).inc()
+    return entry
+
+
+def cache_token(access_token: AccessToken):
+    """Cache an access token resolved from the database, until it expires at most"""
+    token_hash = hash_token(access_token.token)
+    entry = {
+        "id": access_token.pk,
+        "user_id": access_token.user_id,
+        "scope": access_token.scope,
+        "expires": access_token.expires.timestamp(),
+    }
+    timeout = min(settings.AUTH_TOKEN_CACHE_TIMEOUT, int(entry["expires"] - time.time()))
+    if timeout <= 0:
+        return
+    try:
+        cache.set(CACHE_KEY_PREFIX + token_hash, entry, timeout)
+        # Checked after the write: an eviction either sees the entry or its marker is seen here
+        if cache.get(REVOKED_KEY_PREFIX + token_hash) is not None:
+            cache.delete(CACHE_KEY_PREFIX + token_hash)
+            return
+    except Exception:
+        return
+    _set_local(token_hash, entry)
+
+
+def evict_token(token_hash: str):
+    """
+    Drop a token from this process and the shared cache. Other processes drop their
+    copy within AUTH_TOKEN_LOCAL_TTL seconds
+    """
+    with _local_lock:
+        _local_entries.pop(token_hash, None)
+    try:
+        cache.set(REVOKED_KEY_PREFIX + token_hash, 1, settings.AUTH_TOKEN_CACHE_TIMEOUT)
+        cache.delete(CACHE_KEY_PREFIX + token_hash)
+    except Exception:
+        pass
+
+
+def evict_token_on_commit(token: str):
+    """
+    Evict now, so this process stops accepting the token, and again once the deletion commits,
+    so a request reading the row before the commit cannot cache it again
+    """
+    token_hash = hash_token(token)
+    evict_token(token_hash)
+    transaction.on_commit(lambda: evict_token(token_hash))
+
+
+class CachedUser(SimpleLazyObject):
+    """
+    The user of a cached token. Permission and throttling checks only need it to be authenticated
+    and its id, the user is loaded from the database on first use of anything else
+    """
+
+    def __init__(self, user_id):
+        super().__init__(lambda: User.objects.get(pk=user_id))
+        self.__dict__["_user_id"] = user_id
+
+    @property
+    def pk(self):
+        return self.__dict__["_user_id"]
+
+    id = pk
+
+    @property
+    def is_authenticated(self):
+        return True
+
+    @property
+    def is_anonymous(self):
+        return False
+
+    def __bool__(self):
+        return True
+
+
+class CachedOAuth2Authentication(OAuth2Authentication):
+    """
+    OAuth2Authentication resolving bearer tokens from a short lived process LRU, then the cache (Redis),
+    before the AccessToken query. Deleting an AccessToken evicts it, see apps.users.signals.
+    Tokens passed in other ways than the Authorization header take the usual path
+    """
+
+    def authenticate(self, request):
+        token = self._get_bearer_token(request)
+        if token:
+            entry = get_cached_token(hash_token(token))
+            if entry is not None:
+                access_token = AccessToken(
+                    id=entry["id"],
+                    user_id=entry["user_id"],
+                    scope=entry["scope"],
+                    expires=datetime.fromtimestamp(entry["expires"], tz=timezone.utc),
+                )
+                return CachedUser(entry["user_id"]), access_token
+
+        result = super().authenticate(request)
+        if result is not None and token:
+            access_token_lookups_total.labels(source="database").inc()
+            cache_token(result[1])
+        return result
+
+    @staticmethod
+    def _get_bearer_token(request) -> Optional[str]:
+        header = request.META.get("HTTP_AUTHORIZATION", "")
+        scheme, _, token = header.partition(" ")
+        if scheme.lower() != "bearer":
+            return None
+        return token.strip() or None
@@ -0,0 +1,111 @@
+import secrets
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils.timezone import now
+from oauth2_provider.contrib.rest_framework import OAuth2Authentication
+from oauth2_provider.models import AccessToken, Application
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from apps.users.authentication import CachedOAuth2Authentication, evict_token, hash_token
+
+User = get_user_model()
+
+
+class _Rollback(Exception):
+    pass
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _view(authentication_class):
+    class AuthenticatedView(APIView):
+        authentication_classes = [authentication_class]
+        permission_classes = [permissions.IsAuthenticated]
+
+        def get(self, request):
+            return Response({"id": str(request.user.pk)})
+
+    return AuthenticatedView.as_view()
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare authenticated GET throughput with OAuth2Authentication and CachedOAuth2Authentication, '
+        'on a view doing nothing else (data is rolled back)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=5000,
+            help='Requests per measurement (default: 5000)'
+        )
+        parser.add_argument(
+            '--tokens',
+            type=int,
+            default=100,
+            help='Distinct users and tokens the requests cycle through (default: 100)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                tokens = self.seed_tokens(options['tokens'])
+                try:
+                    self.run(tokens, options['requests'])
+                finally:
+                    for token in tokens:
+                        evict_token(hash_token(token))
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def seed_tokens(self, count):
+        application = Application.objects.create(
+            name="Benchmark",
+            client_type=Application.CLIENT_CONFIDENTIAL,
+            authorization_grant_type=Application.GRANT_PASSWORD,
+        )
+        users = User.objects.bulk_create([
+            User(username=f"benchmark-auth-{index}", email=f"benchmark-auth-{index}@example.com", is_active=True)
+            for index in range(count)
+        ])
+        tokens = [secrets.token_hex(16) for _ in users]
+        AccessToken.objects.bulk_create([
+            AccessToken(user=user, application=application, token=token, expires=now() + timedelta(days=1))
+            for user, token in zip(users, tokens)
+        ])
+        return tokens
+
+    def run(self, tokens, total):
+        factory = APIRequestFactory()
+        requests = [factory.get('/', HTTP_AUTHORIZATION=f"Bearer {token}") for token in tokens]
+
+        self.stdout.write(f"{'authentication':>28} {'req/s':>10} {'queries/req':>12}")
+        for authentication_class in (OAuth2Authentication, CachedOAuth2Authentication):
+            view = _view(authentication_class)
+            counter = _QueryCounter()
+            with connection.execute_wrapper(counter):
+                started = time.perf_counter()
+                for index in range(total):
+                    response = view(requests[index % len(requests)])
+                    assert response.status_code == 200, response.status_code
+                elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{authentication_class.__name__:>28} {total / elapsed:>10.0f} {counter.count / total:>12.2f}"
+            )
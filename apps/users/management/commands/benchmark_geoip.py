@@ -0,0 +1,87 @@
+import os
+import random
+import resource
+import socket
+import struct
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from utils.geoip import GeoIPDatabase, compile_database
+
+
+def _synthetic_ranges(count, rng):
+    """Contiguous IPv4 ranges covering the address space and one IPv6 /32 per 100 of them"""
+    step = 2 ** 32 // count
+    for index in range(count):
+        location = (f"Country {index % 250}", f"City {index % 50000}")
+        yield index * step, index * step + step - 1, *location
+        if index % 100 == 0:
+            first = (0x2001_0000 + index) << 96
+            yield first, first + 2 ** 96 - 1, *location
+
+
+class Command(BaseCommand):
+    help = 'Measure GeoIP database lookups, on synthetic databases or on a compiled one'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ranges',
+            type=int,
+            nargs='+',
+            default=[10000, 100000, 1000000],
+            help='Sizes of the synthetic databases (default: 10000 100000 1000000)'
+        )
+        parser.add_argument(
+            '--database',
+            help='Measure this compiled database instead'
+        )
+        parser.add_argument(
+            '--lookups',
+            type=int,
+            default=200000,
+            help='Lookups per measurement (default: 200000)'
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        ipv4 = [socket.inet_ntoa(struct.pack('>I', rng.getrandbits(32))) for _ in range(options['lookups'])]
+        ipv6 = [
+            socket.inet_ntop(socket.AF_INET6, struct.pack('>QQ', 0x2001_0000_0000_0000 + rng.getrandbits(40),
+                                                          rng.getrandbits(64)))
+            for _ in range(options['lookups'])
+        ]
+
+        self.stdout.write(
+            f"{'ranges':>9} {'file MB':>8} {'open ms':>8} {'IPv4 us':>8} {'IPv6 us':>8} {'RSS +MB':>8}"
+        )
+        if options['database']:
+            self.measure(options['database'], ipv4, ipv6)
+            return
+        with tempfile.TemporaryDirectory() as directory:
+            for count in options['ranges']:
+                path = os.path.join(directory, f"geoip-{count}.bin")
+                compile_database(_synthetic_ranges(count, rng), path)
+                self.measure(path, ipv4, ipv6)
+
+    def measure(self, path, ipv4, ipv6):
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        started = time.perf_counter()
+        database = GeoIPDatabase(path)
+        open_ms = (time.perf_counter() - started) * 1000
+
+        timings = []
+        for addresses in (ipv4, ipv6):
+            lookup = database.lookup
+            started = time.perf_counter()
+            for address in addresses:
+                lookup(address)
+            timings.append((time.perf_counter() - started) / len(addresses) * 1e6)
+
+        # Kilobytes on Linux
+        rss_mb = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss) / 1024
+        self.stdout.write(
+            f"{database.range_count:>9} {os.path.getsize(path) / 2 ** 20:>8.1f} {open_ms:>8.1f} "
+            f"{timings[0]:>8.2f} {timings[1]:>8.2f} {rss_mb:>8.1f}"
+        )
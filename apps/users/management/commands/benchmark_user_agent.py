@@ -0,0 +1,89 @@
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from utils.user_agent import parse_user_agent
+
+FIXTURE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'test', 'fixtures', 'user_agents.json',
+)
+
+
+def _legacy_parse_user_agent(user_agent):
+    """The substring checks track_user_login used before utils.user_agent, for comparison"""
+    device_type = 'unknown'
+    browser = 'Unknown'
+    os_name = 'Unknown'
+    if user_agent:
+        user_agent_lower = user_agent.lower()
+        if 'mobile' in user_agent_lower or 'android' in user_agent_lower or 'iphone' in user_agent_lower:
+            device_type = 'mobile'
+        elif 'tablet' in user_agent_lower or 'ipad' in user_agent_lower:
+            device_type = 'tablet'
+        else:
+            device_type = 'desktop'
+
+        if 'chrome' in user_agent_lower and 'edg' not in user_agent_lower:
+            browser = 'Chrome'
+        elif 'firefox' in user_agent_lower:
+            browser = 'Firefox'
+        elif 'safari' in user_agent_lower and 'chrome' not in user_agent_lower:
+            browser = 'Safari'
+        elif 'edg' in user_agent_lower:
+            browser = 'Edge'
+
+        if 'windows' in user_agent_lower:
+            os_name = 'Windows'
+        elif 'mac' in user_agent_lower:
+            os_name = 'macOS'
+        elif 'linux' in user_agent_lower:
+            os_name = 'Linux'
+        elif 'android' in user_agent_lower:
+            os_name = 'Android'
+        elif 'iphone' in user_agent_lower or 'ipad' in user_agent_lower:
+            os_name = 'iOS'
+    return device_type, browser, os_name
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the speed and accuracy of the user agent classifier, uncached and cached, '
+        'with the previous substring checks on the fixture of real user agents'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=2000,
+            help='Passes over the fixture per measurement (default: 2000)'
+        )
+
+    def handle(self, *args, **options):
+        with open(FIXTURE) as fixture:
+            cases = json.load(fixture)
+        user_agents = [case['user_agent'] for case in cases]
+        expected = [(case['device_type'], case['browser'], case['os']) for case in cases]
+        iterations = options['iterations']
+
+        parsers = (
+            ('substring checks (before)', _legacy_parse_user_agent),
+            ('rules, uncached', parse_user_agent.__wrapped__),
+            ('rules, cached', parse_user_agent),
+        )
+        self.stdout.write(f"{'classifier':>26} {'us/parse':>9} {'accuracy':>9}")
+        for name, parse in parsers:
+            parse_user_agent.cache_clear()
+            correct = sum(tuple(parse(user_agent)) == result for user_agent, result in zip(user_agents, expected))
+            started = time.perf_counter()
+            for _ in range(iterations):
+                for user_agent in user_agents:
+                    parse(user_agent)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{name:>26} {elapsed / (iterations * len(user_agents)) * 1e6:>9.2f} "
+                f"{correct / len(cases):>9.0%}"
+            )
@@ -0,0 +1,72 @@
+import csv
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.geoip import GeoIPDatabase, compile_database
+
+
+class Command(BaseCommand):
+    help = (
+        'Compile IP range CSV data (first address, last address, country, city) into the GeoIP database '
+        'read at login. Addresses may be written as text or as integers'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'csv_files',
+            nargs='+',
+            help='CSV files of IP ranges, IPv4 and IPv6 ranges may be mixed'
+        )
+        parser.add_argument(
+            '--output',
+            default=settings.GEOIP_DATABASE_PATH,
+            help='Database to write (default: GEOIP_DATABASE_PATH)'
+        )
+        parser.add_argument(
+            '--columns',
+            type=int,
+            nargs=4,
+            default=[0, 1, 2, 3],
+            metavar=('FIRST', 'LAST', 'COUNTRY', 'CITY'),
+            help='Positions of the columns, e.g. 0 1 3 5 for DB-IP lite files (default: 0 1 2 3)'
+        )
+        parser.add_argument(
+            '--skip-header',
+            action='store_true',
+            help='Ignore the first line of each file'
+        )
+
+    def handle(self, *args, **options):
+        output = options['output']
+        if not output:
+            raise CommandError('Set GEOIP_DATABASE_PATH or pass --output')
+
+        first, last, country, city = options['columns']
+
+        def read_ranges():
+            for path in options['csv_files']:
+                with open(path, newline='', encoding='utf-8') as csv_file:
+                    reader = csv.reader(csv_file)
+                    if options['skip_header']:
+                        next(reader, None)
+                    for row in reader:
+                        if row:
+                            yield row[first], row[last], row[country], row[city]
+
+        # Written aside then renamed, so running processes keep their mapping of the previous file
+        temporary = f"{output}.tmp"
+        try:
+            written, skipped = compile_database(read_ranges(), temporary)
+            GeoIPDatabase(temporary)
+        except (OSError, ValueError, IndexError) as e:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise CommandError(f'Cannot compile the GeoIP database: {e}')
+        os.replace(temporary, output)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written} ranges to {output} ({os.path.getsize(output)} bytes), "
+            f"skipped {skipped} overlapping ranges"
+        ))
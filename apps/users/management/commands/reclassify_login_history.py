@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+
+from apps.users.models import LoginHistory
+from utils.user_agent import parse_user_agent
+
+FIELDS = ('device_type', 'browser', 'os')
+
+
+class Command(BaseCommand):
+    help = 'Classify the device, browser and OS of the existing login history again from the stored user agents'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows read and updated per batch (default: 1000)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Count the rows that would change without updating them'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        scanned = changed = 0
+        last_id = None
+        while True:
+            queryset = LoginHistory.objects.order_by('id').only('id', 'user_agent', *FIELDS)
+            if last_id is not None:
+                queryset = queryset.filter(id__gt=last_id)
+            batch = list(queryset[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+            scanned += len(batch)
+
+            updated = []
+            for record in batch:
+                parsed = parse_user_agent(record.user_agent)
+                if (record.device_type, record.browser, record.os) != tuple(parsed):
+                    record.device_type, record.browser, record.os = parsed
+                    updated.append(record)
+            changed += len(updated)
+            if updated and not options['dry_run']:
+                LoginHistory.objects.bulk_update(updated, FIELDS)
+            self.stdout.write(f"{scanned} rows scanned, {changed} reclassified")
+
+            if len(batch) < batch_size:
+                break
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Would reclassify' if options['dry_run'] else 'Reclassified'} {changed} of {scanned} logins"
+        ))
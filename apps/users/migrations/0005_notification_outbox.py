@@ -0,0 +1,93 @@
+# Generated by Django 5.0.1 on 2026-10-18 12:04
+
+import django.db.models.deletion
+import django.utils.timezone
+import utils.main
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_bio_user_is_organizer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationOutbox',
+            fields=[
+                ('id', models.UUIDField(
+                    default=utils.main.generate_uuid, editable=False, help_text='Unique identifier for this object',
+                    primary_key=True, serialize=False,
+                )),
+                ('active', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('notification_type', models.CharField(
+                    choices=[
+                        ('registration_confirmation', 'Registration confirmation'),
+                        ('new_location_login', 'New location login'),
+                        ('new_event', 'New event'),
+                        ('event_cancelled', 'Event cancelled'),
+                        ('event_reminder', 'Event reminder'),
+                        ('upcoming_events_digest', 'Upcoming events digest'),
+                    ],
+                    max_length=50, verbose_name='Notification type',
+                )),
+                ('channel', models.CharField(
+                    choices=[('email', 'Email'), ('sms', 'SMS')], max_length=10, verbose_name='Channel',
+                )),
+                ('object_id', models.CharField(
+                    help_text='Id of the registration, login record, ... the notification is about', max_length=64,
+                    verbose_name='Object id',
+                )),
+                ('payload', models.JSONField(
+                    blank=True, default=dict, help_text='Data captured when the notification was queued',
+                    verbose_name='Payload',
+                )),
+                ('idempotency_key', models.CharField(
+                    help_text='Notification type, channel, recipient and object, queuing it again is a no-op',
+                    max_length=255, unique=True, verbose_name='Idempotency key',
+                )),
+                ('status', models.CharField(
+                    choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')],
+                    default='pending', max_length=20, verbose_name='Status',
+                )),
+                ('attempts', models.PositiveSmallIntegerField(
+                    default=0, help_text='Number of failed delivery attempts', verbose_name='Attempts',
+                )),
+                ('next_attempt_at', models.DateTimeField(
+                    default=django.utils.timezone.now,
+                    help_text='The dispatcher does not pick the notification up before this time',
+                    verbose_name='Next attempt at',
+                )),
+                ('locked_until', models.DateTimeField(
+                    blank=True,
+                    help_text='Claimed by a dispatcher until this time, another one takes it over afterwards',
+                    null=True, verbose_name='Locked until',
+                )),
+                ('last_error', models.TextField(blank=True, verbose_name='Last error')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Sent at')),
+                ('created_by', models.ForeignKey(
+                    editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL,
+                    related_name='created_%(class)s_set', to=settings.AUTH_USER_MODEL,
+                )),
+                ('recipient', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE, related_name='notification_outbox',
+                    to=settings.AUTH_USER_MODEL, verbose_name='Recipient',
+                )),
+                ('updated_by', models.ForeignKey(
+                    editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL,
+                    related_name='updated_%(class)s_set', to=settings.AUTH_USER_MODEL,
+                )),
+            ],
+            options={
+                'verbose_name': 'Notification Outbox',
+                'verbose_name_plural': 'Notification Outbox',
+                'db_table': 'notification_outbox',
+                'ordering': ['next_attempt_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='notificatio_status_7f28bd_idx')],
+            },
+        ),
+    ]
@@ -3,3 +3,4 @@ from apps.users.models.otp_code import OtpCode
 from apps.users.models.user import User, UserSocialAccount
 from apps.users.models.login_history import LoginHistory
 from apps.users.models.notification_settings import NotificationSettings
+from apps.users.models.notification_outbox import NotificationOutbox
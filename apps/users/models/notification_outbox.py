@@ -0,0 +1,127 @@
+from django.db import models
+from django.utils.timezone import now
+from django.utils.translation import gettext_lazy as _
+
+from apps.users.models.base_model import BaseModel
+
+
+class NotificationOutbox(BaseModel):
+    """
+    A notification waiting to be delivered on one channel to one recipient,
+    written in the transaction of the change that triggers it and drained by a dispatcher
+    """
+
+    TYPE_REGISTRATION_CONFIRMATION = 'registration_confirmation'
+    TYPE_NEW_LOCATION_LOGIN = 'new_location_login'
+    # Retries of the fan-outs deferred by a rate limit or an open circuit breaker
+    TYPE_NEW_EVENT = 'new_event'
+    TYPE_EVENT_CANCELLED = 'event_cancelled'
+    TYPE_EVENT_REMINDER = 'event_reminder'
+    TYPE_UPCOMING_EVENTS_DIGEST = 'upcoming_events_digest'
+    # Delivered by separate dispatchers, so that the retries of a fan-out never delay a security alert
+    TRANSACTIONAL_TYPES = (TYPE_REGISTRATION_CONFIRMATION, TYPE_NEW_LOCATION_LOGIN)
+    BULK_TYPES = (TYPE_NEW_EVENT, TYPE_EVENT_CANCELLED, TYPE_EVENT_REMINDER, TYPE_UPCOMING_EVENTS_DIGEST)
+
+    CHANNEL_EMAIL = 'email'
+    CHANNEL_SMS = 'sms'
+
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+
+    notification_type = models.CharField(
+        max_length=50,
+        choices=(
+            (TYPE_REGISTRATION_CONFIRMATION, 'Registration confirmation'),
+            (TYPE_NEW_LOCATION_LOGIN, 'New location login'),
+            (TYPE_NEW_EVENT, 'New event'),
+            (TYPE_EVENT_CANCELLED, 'Event cancelled'),
+            (TYPE_EVENT_REMINDER, 'Event reminder'),
+            (TYPE_UPCOMING_EVENTS_DIGEST, 'Upcoming events digest'),
+        ),
+        verbose_name=_("Notification type")
+    )
+    channel = models.CharField(
+        max_length=10,
+        choices=(
+            (CHANNEL_EMAIL, 'Email'),
+            (CHANNEL_SMS, 'SMS'),
+        ),
+        verbose_name=_("Channel")
+    )
+    recipient = models.ForeignKey(
+        'User',
+        on_delete=models.CASCADE,
+        related_name='notification_outbox',
+        verbose_name=_("Recipient")
+    )
+    object_id = models.CharField(
+        max_length=64,
+        verbose_name=_("Object id"),
+        help_text=_("Id of the registration, login record, ... the notification is about")
+    )
+    payload = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name=_("Payload"),
+        help_text=_("Data captured when the notification was queued")
+    )
+    idempotency_key = models.CharField(
+        max_length=255,
+        unique=True,
+        verbose_name=_("Idempotency key"),
+        help_text=_("Notification type, channel, recipient and object, queuing it again is a no-op")
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=(
+            (STATUS_PENDING, 'Pending'),
+            (STATUS_SENDING, 'Sending'),
+            (STATUS_SENT, 'Sent'),
+            (STATUS_FAILED, 'Failed'),
+        ),
+        default=STATUS_PENDING,
+        verbose_name=_("Status")
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name=_("Attempts"),
+        help_text=_("Number of failed delivery attempts")
+    )
+    next_attempt_at = models.DateTimeField(
+        default=now,
+        verbose_name=_("Next attempt at"),
+        help_text=_("The dispatcher does not pick the notification up before this time")
+    )
+    locked_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_("Locked until"),
+        help_text=_("Claimed by a dispatcher until this time, another one takes it over afterwards")
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name=_("Last error")
+    )
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_("Sent at")
+    )
+
+    class Meta:
+        db_table = 'notification_outbox'
+        verbose_name = _("Notification Outbox")
+        verbose_name_plural = _("Notification Outbox")
+        ordering = ['next_attempt_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.notification_type} ({self.channel}) - {self.status}"
+
+    @staticmethod
+    def build_idempotency_key(notification_type: str, channel: str, recipient_id, object_id) -> str:
+        return f"{notification_type}:{channel}:{recipient_id}:{object_id}"
@@ -1,5 +1,16 @@
+import base64
+import binascii
+import json
+import uuid
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class CustomPagination(PageNumberPagination):
@@ -24,3 +35,107 @@ class CustomPagination(PageNumberPagination):
             },
             'data': data
         })
+
+
+CURSOR_PARAMETER = OpenApiParameter(
+    name='cursor', type=str, required=False,
+    description=_("Opaque keyset cursor. Send it empty to get the first page without a total count."),
+)
+
+
+class KeysetPagination:
+    """
+    Cursor (keyset) pagination ordered by ``(created_at, id)``.
+
+    Unlike page number pagination it never runs a ``COUNT(*)`` and never uses
+    ``OFFSET``, so fetching page 10 000 costs the same as fetching page 1.
+    Querysets with an ordering of their own (search results ordered by rank)
+    are rejected rather than silently re-ordered.
+    """
+    cursor_query_param = 'cursor'
+    ordering = ('created_at', 'id')
+    page_size = 10
+    invalid_cursor_message = _('Invalid cursor')
+    ordered_queryset_message = _('Cursor pagination is not available on these results, use page numbers')
+
+    def paginate_queryset(self, queryset, request, page_size=None):
+        if queryset.query.order_by:
+            raise ValidationError({self.cursor_query_param: [self.ordered_queryset_message]})
+        self.request = request
+        self.page_size = page_size or self.page_size
+        self.cursor = self.decode_cursor(request)
+        first_field, second_field = self.ordering
+
+        if self.cursor is None:
+            self.reverse = False
+        else:
+            first_value, second_value, self.reverse = self.cursor
+            lookup = 'lt' if self.reverse else 'gt'
+            # The redundant range filter lets the (created_at, id) index seek straight to the cursor.
+            queryset = queryset.filter(**{f'{first_field}__{lookup}e': first_value}).filter(
+                Q(**{f'{first_field}__{lookup}': first_value})
+                | Q(**{f'{second_field}__{lookup}': second_value})
+            )
+
+        if self.reverse:
+            queryset = queryset.order_by(f'-{first_field}', f'-{second_field}')
+        else:
+            queryset = queryset.order_by(first_field, second_field)
+
+        results = list(queryset[:self.page_size + 1])
+        self.has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if self.reverse:
+            self.page.reverse()
+        return self.page
+
+    def get_next_link(self):
+        if not self.page:
+            return None
+        if self.reverse or self.has_more:
+            return self.encode_cursor(self.page[-1], reverse=False)
+        return None
+
+    def get_previous_link(self):
+        if not self.page:
+            return None
+        if (self.reverse and self.has_more) or (not self.reverse and self.cursor is not None):
+            return self.encode_cursor(self.page[0], reverse=True)
+        return None
+
+    def get_pagination_data(self):
+        return {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'count': None,
+            'current_page': None,
+            'total_pages': None,
+        }
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            if not isinstance(payload['c'], str) or not isinstance(payload['i'], str):
+                raise TypeError('Cursor values must be strings')
+            first_value = datetime.fromisoformat(payload['c'])
+            if first_value.tzinfo is None:
+                raise ValueError('Cursor timestamps must be timezone aware')
+            return first_value, uuid.UUID(payload['i']), bool(payload.get('r', False))
+        except (TypeError, ValueError, KeyError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+    def build_cursor(self, instance, reverse):
+        first_field, second_field = self.ordering
+        payload = {
+            'c': getattr(instance, first_field).isoformat(),
+            'i': str(getattr(instance, second_field)),
+            'r': reverse,
+        }
+        return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+    def encode_cursor(self, instance, reverse):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.build_cursor(instance, reverse))
@@ -1,11 +1,18 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from django.contrib.auth.signals import user_logged_in
 from crequest.middleware import CrequestMiddleware
+from oauth2_provider.models import AccessToken, Application
 
-from apps.users.models import LoginHistory, BaseModel
-from apps.users.tasks import send_new_location_login_alert_task, send_registration_otp_task
+from apps.users.authentication import evict_token_on_commit
+from apps.users.models import BaseModel, NotificationSettings, UserSocialAccount
+from apps.users.tasks import send_registration_otp_task
+from services import TokenService
+from services.login_history import record_login
+from services.notification_preferences import invalidate_notification_preferences_on_commit
+from utils.geoip import locate_ip
+from utils.response_cache import ORGANIZERS_NAMESPACE, invalidate_on_commit
 
 User = get_user_model()
 
@@ -16,10 +23,56 @@ def send_otp_on_registration(sender, instance, created, **kwargs):
         send_registration_otp_task.delay(instance.pk)
 
 
+@receiver(post_init, sender=User)
+def remember_organizer_flag(sender, instance, **kwargs):
+    # Read from __dict__ so deferred loads (e.g. .only('id')) don't trigger a query
+    instance._was_organizer = instance.__dict__.get('is_organizer', False)
+
+
+@receiver(post_save, sender=NotificationSettings)
+@receiver(post_delete, sender=NotificationSettings)
+def invalidate_cached_notification_preferences(sender, instance, **kwargs):
+    invalidate_notification_preferences_on_commit()
+
+
+@receiver(post_save, sender=AccessToken)
+@receiver(post_delete, sender=AccessToken)
+def evict_cached_access_token(sender, instance, created=False, **kwargs):
+    # Logout and password reset delete the user's tokens
+    if not created:
+        evict_token_on_commit(instance.token)
+
+
+@receiver(post_delete, sender=Application)
+def clear_default_application(sender, instance, **kwargs):
+    TokenService.clear_default_application()
+
+
+ORGANIZER_FIELDS = {
+    'is_organizer', 'email', 'username', 'first_name', 'last_name', 'profile_image', 'bio',
+}
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_organizers_response_cache(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not ORGANIZER_FIELDS.intersection(update_fields):
+        return
+    if instance.__dict__.get('is_organizer') or getattr(instance, '_was_organizer', False):
+        invalidate_on_commit(ORGANIZERS_NAMESPACE)
+    instance._was_organizer = instance.__dict__.get('is_organizer', False)
+
+
+@receiver(post_save, sender=UserSocialAccount)
+@receiver(post_delete, sender=UserSocialAccount)
+def invalidate_organizers_response_cache_on_social_account(sender, instance, **kwargs):
+    invalidate_on_commit(ORGANIZERS_NAMESPACE)
+
+
 @receiver(user_logged_in)
 def track_user_login(sender, request, user, **kwargs):
     """
-    Track user login and detect new locations
+    Track user login and detect new locations, see services.login_history
     """
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
     if x_forwarded_for:
@@ -29,59 +82,9 @@ def track_user_login(sender, request, user, **kwargs):
 
     user_agent = request.META.get('HTTP_USER_AGENT', '')
 
-    device_type = 'unknown'
-    browser = 'Unknown'
-    os = 'Unknown'
+    country, city = locate_ip(ip_address)
 
-    if user_agent:
-        user_agent_lower = user_agent.lower()
-        if 'mobile' in user_agent_lower or 'android' in user_agent_lower or 'iphone' in user_agent_lower:
-            device_type = 'mobile'
-        elif 'tablet' in user_agent_lower or 'ipad' in user_agent_lower:
-            device_type = 'tablet'
-        else:
-            device_type = 'desktop'
-
-        if 'chrome' in user_agent_lower and 'edg' not in user_agent_lower:
-            browser = 'Chrome'
-        elif 'firefox' in user_agent_lower:
-            browser = 'Firefox'
-        elif 'safari' in user_agent_lower and 'chrome' not in user_agent_lower:
-            browser = 'Safari'
-        elif 'edg' in user_agent_lower:
-            browser = 'Edge'
-
-        if 'windows' in user_agent_lower:
-            os = 'Windows'
-        elif 'mac' in user_agent_lower:
-            os = 'macOS'
-        elif 'linux' in user_agent_lower:
-            os = 'Linux'
-        elif 'android' in user_agent_lower:
-            os = 'Android'
-        elif 'iphone' in user_agent_lower or 'ipad' in user_agent_lower:
-            os = 'iOS'
-
-    country = ''
-    city = ''
-
-    is_new_location = LoginHistory.is_new_login_location(user, ip_address, country, city)
-
-    login_record = LoginHistory.objects.create(
-        user=user,
-        ip_address=ip_address,
-        user_agent=user_agent,
-        device_type=device_type,
-        browser=browser,
-        os=os,
-        country=country,
-        city=city,
-        is_new_location=is_new_location,
-        login_successful=True
-    )
-
-    if is_new_location:
-        send_new_location_login_alert_task.delay(login_record.pk)
+    record_login(user, ip_address, user_agent, country, city)
 
 
 @receiver(pre_save, sender=BaseModel)
@@ -1,12 +1,17 @@
 import logging
 
 from celery import shared_task
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.utils.timezone import now
 
 from apps.users.models.login_history import LoginHistory
+from apps.users.models.notification_outbox import NotificationOutbox
 from services import MailService, SMSService
-from services import NotificationService
+from services import OutboxService, TokenService
+from services.circuit_breaker import CircuitOpenError
+from services.login_history import get_login_history_buffer
 from services.notification_preferences import get_notification_preferences
 
 logger = logging.getLogger(__name__)
@@ -14,31 +19,6 @@ logger = logging.getLogger(__name__)
 User = get_user_model()
 
 
-@shared_task
-def send_user_created_notifications_task(user_id: int) -> None:
-    try:
-        user = User.objects.get(pk=user_id)
-    except User.DoesNotExist:
-        return
-
-    prefs = get_notification_preferences()
-    notification_service = NotificationService()
-
-    if prefs.send_welcome_email or prefs.send_welcome_sms:
-        notification_service.send_welcome_notification(
-            user,
-            send_sms=prefs.send_welcome_sms,
-            send_email=prefs.send_welcome_email,
-        )
-
-    if prefs.send_signup_email or prefs.send_signup_sms:
-        notification_service.send_signup_registration_notification(
-            user,
-            send_sms=prefs.send_signup_sms,
-            send_email=prefs.send_signup_email,
-        )
-
-
 @shared_task
 def send_new_location_login_alert_task(login_history_id: int) -> None:
     try:
@@ -61,28 +41,80 @@ def send_new_location_login_alert_task(login_history_id: int) -> None:
         location_string = login_record.ip_address
 
     login_info = {
-        'login_time': getattr(login_record, 'created_at', None) or now(),
+        'login_time': (getattr(login_record, 'created_at', None) or now()).isoformat(),
         'ip_address': login_record.ip_address,
         'location': location_string,
         'device': (login_record.device_type or '').capitalize() if login_record.device_type else None,
         'browser': login_record.browser if login_record.browser and login_record.browser != 'Unknown' else None,
     }
 
-    try:
-        NotificationService().send_new_location_login_alert(
+    channels = []
+    if prefs.send_new_location_login_email:
+        channels.append(NotificationOutbox.CHANNEL_EMAIL)
+    if prefs.send_new_location_login_sms and login_record.user.phone_number:
+        channels.append(NotificationOutbox.CHANNEL_SMS)
+
+    with transaction.atomic():
+        OutboxService.enqueue(
+            NotificationOutbox.TYPE_NEW_LOCATION_LOGIN,
             login_record.user,
-            login_info,
-            send_sms=prefs.send_new_location_login_sms,
-            send_email=prefs.send_new_location_login_email,
+            login_record.pk,
+            channels,
+            payload=login_info,
         )
         login_record.notification_sent = True
         login_record.save(update_fields=['notification_sent'])
-    except Exception:
-        logger.exception("Error sending new location login alert for LoginHistory id=%s", login_history_id)
+        # The user may be waiting for it, it does not wait behind the registration confirmations
+        transaction.on_commit(lambda: dispatch_notification_outbox_task.apply_async(queue="interactive"))
 
 
 @shared_task
-def send_email_otp_task(user_id: int) -> None:
+def dispatch_notification_outbox_task(bulk: bool = False) -> None:
+    """
+    Deliver the due notifications of the outbox, batch after batch until none is left.
+    Failed deliveries are retried by a later run, see CELERY_BEAT_SCHEDULE
+
+    :param bulk: Deliver the retries of the fan-outs (NotificationOutbox.BULK_TYPES) instead of
+        the other notifications, from the bulk queue
+    """
+    notification_types = NotificationOutbox.BULK_TYPES if bulk else NotificationOutbox.TRANSACTIONAL_TYPES
+    outbox_service = OutboxService()
+    while True:
+        claimed, sent = outbox_service.dispatch(notification_types=notification_types)
+        if claimed:
+            logger.info("Notification outbox: delivered %s of %s notifications", sent, claimed)
+        if claimed < settings.NOTIFICATION_OUTBOX_BATCH_SIZE:
+            return
+
+
+@shared_task
+def drain_login_history_task() -> None:
+    """
+    Write the logins buffered in Redis to LoginHistory, batch after batch until none is left
+    """
+    buffer = get_login_history_buffer()
+    if buffer is None:
+        return
+    while True:
+        drained = buffer.drain(settings.LOGIN_HISTORY_BATCH_SIZE)
+        if drained:
+            logger.info("Login history: wrote %s logins", drained)
+        if drained < settings.LOGIN_HISTORY_BATCH_SIZE:
+            return
+
+
+@shared_task
+def prune_expired_tokens_task() -> None:
+    """Delete the expired OAuth2 tokens, see TokenService.prune_expired"""
+    deleted = TokenService.prune_expired(settings.TOKEN_PRUNE_BATCH_SIZE)
+    logger.info(
+        "Pruned %s expired access tokens and %s refresh tokens",
+        deleted['access_tokens'], deleted['refresh_tokens'],
+    )
+
+
+@shared_task(bind=True, max_retries=10)
+def send_email_otp_task(self, user_id: int) -> None:
     try:
         user = User.objects.get(pk=user_id)
     except User.DoesNotExist:
@@ -90,25 +122,39 @@ def send_email_otp_task(user_id: int) -> None:
 
     try:
         MailService().send_otp(user)
+    except CircuitOpenError as e:
+        raise self.retry(countdown=e.retry_after)
     except Exception:
         logger.exception("Error sending OTP email to user id=%s", user_id)
 
 
-@shared_task
-def send_registration_otp_task(user_id: int) -> None:
+@shared_task(bind=True, max_retries=10)
+def send_registration_otp_task(
+    self, user_id: int, channels=(NotificationOutbox.CHANNEL_EMAIL, NotificationOutbox.CHANNEL_SMS),
+) -> None:
+    """
+    Send the registration OTP by email, and by SMS to users with a phone number. A channel deferred by
+    an open circuit breaker or the SMS rate limit is retried alone, so the other one is not sent twice
+    """
     try:
         user = User.objects.get(pk=user_id)
     except User.DoesNotExist:
         logger.error("User with id=%s not found for OTP sending", user_id)
         return
 
-    try:
-        MailService().send_otp(user)
-        logger.info("OTP email sent to user id=%s (%s)", user_id, user.email)
-    except Exception:
-        logger.exception("Error sending OTP email to user id=%s", user_id)
+    deferred_channels = []
+    retry_after = 0
+    if NotificationOutbox.CHANNEL_EMAIL in channels:
+        try:
+            MailService().send_otp(user)
+            logger.info("OTP email sent to user id=%s (%s)", user_id, user.email)
+        except CircuitOpenError as e:
+            deferred_channels.append(NotificationOutbox.CHANNEL_EMAIL)
+            retry_after = e.retry_after
+        except Exception:
+            logger.exception("Error sending OTP email to user id=%s", user_id)
 
-    if user.phone_number:
+    if NotificationOutbox.CHANNEL_SMS in channels and user.phone_number:
         try:
             sms_service = SMSService()
             if sms_service.is_configured():
@@ -117,6 +163,9 @@ def send_registration_otp_task(user_id: int) -> None:
                     result = sms_service.send_otp_sms(user.phone_number, latest_otp.otp_code)
                     if result.get('success'):
                         logger.info("OTP SMS sent to user id=%s (%s)", user_id, user.phone_number)
+                    elif result.get('retry_after'):
+                        deferred_channels.append(NotificationOutbox.CHANNEL_SMS)
+                        retry_after = max(retry_after, result['retry_after'])
                     else:
                         logger.warning("Failed to send OTP SMS to user id=%s: %s", user_id, result.get('error'))
                 else:
@@ -125,3 +174,6 @@ def send_registration_otp_task(user_id: int) -> None:
                 logger.warning("SMS service not configured, skipping SMS OTP for user id=%s", user_id)
         except Exception:
             logger.exception("Error sending OTP SMS to user id=%s", user_id)
+
+    if deferred_channels:
+        raise self.retry(args=[user_id], kwargs={'channels': deferred_channels}, countdown=retry_after)
@@ -0,0 +1,103 @@
+import secrets
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.timezone import now
+from oauth2_provider.models import AccessToken, Application
+from rest_framework.test import APIRequestFactory
+
+from apps.users import authentication
+from apps.users.authentication import CachedOAuth2Authentication, access_token_lookups_total
+
+User = get_user_model()
+
+
+def lookups(source):
+    return access_token_lookups_total.labels(source=source)._value.get()
+
+
+def clear_token_caches():
+    cache.clear()
+    authentication._local_entries.clear()
+
+
+class AccessTokenCacheTest(TestCase):
+    def setUp(self):
+        clear_token_caches()
+        self.addCleanup(clear_token_caches)
+        self.user = User.objects.create(username="ada", email="ada@example.com", is_active=True)
+        self.application = Application.objects.create(
+            name="Default",
+            client_type=Application.CLIENT_CONFIDENTIAL,
+            authorization_grant_type=Application.GRANT_PASSWORD,
+        )
+        self.access_token = self.create_token(now() + timedelta(days=1))
+
+    def create_token(self, expires):
+        return AccessToken.objects.create(
+            user=self.user, application=self.application, expires=expires, token=secrets.token_hex(16)
+        )
+
+    def authenticate(self, token):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        return CachedOAuth2Authentication().authenticate(request)
+
+    @override_settings(AUTH_TOKEN_LOCAL_TTL=5)
+    def test_repeated_requests_do_not_query_the_token(self):
+        database = lookups("database")
+        self.authenticate(self.access_token.token)
+        local = lookups("local")
+
+        with self.assertNumQueries(0):
+            user, access_token = self.authenticate(self.access_token.token)
+
+        self.assertEqual(str(user.pk), str(self.user.pk))
+        self.assertTrue(user.is_authenticated)
+        self.assertEqual(access_token.pk, self.access_token.pk)
+        self.assertEqual(lookups("database") - database, 1)
+        self.assertEqual(lookups("local") - local, 1)
+
+        # The user is only loaded when used
+        with self.assertNumQueries(1):
+            self.assertEqual(user.username, "ada")
+
+    def test_other_processes_read_the_shared_cache(self):
+        self.authenticate(self.access_token.token)
+        authentication._local_entries.clear()
+        cached = lookups("cache")
+
+        with self.assertNumQueries(0):
+            self.assertIsNotNone(self.authenticate(self.access_token.token))
+        self.assertEqual(lookups("cache") - cached, 1)
+
+    def test_logout_evicts_the_token(self):
+        header = {"HTTP_AUTHORIZATION": f"Bearer {self.access_token.token}"}
+        self.assertEqual(self.client.get(reverse('user-details'), **header).status_code, 200)
+
+        self.client.post(reverse('logout'), content_type="application/json", **header)
+
+        self.assertEqual(self.client.get(reverse('user-details'), **header).status_code, 401)
+
+    @override_settings(AUTH_TOKEN_LOCAL_TTL=0)
+    def test_local_cache_can_be_disabled(self):
+        self.authenticate(self.access_token.token)
+        cached = lookups("cache")
+
+        with self.assertNumQueries(0):
+            self.assertIsNotNone(self.authenticate(self.access_token.token))
+        self.assertEqual(lookups("cache") - cached, 1)
+        self.assertEqual(len(authentication._local_entries), 0)
+
+    @override_settings(AUTH_TOKEN_LOCAL_TTL=5)
+    def test_expired_token_is_not_served_from_the_cache(self):
+        access_token = self.create_token(now() + timedelta(seconds=30))
+        self.authenticate(access_token.token)
+        token_hash = authentication.hash_token(access_token.token)
+        expires_at, entry = authentication._local_entries[token_hash]
+        authentication._local_entries[token_hash] = (expires_at, {**entry, "expires": entry["expires"] - 60})
+        AccessToken.objects.filter(pk=access_token.pk).update(expires=now() - timedelta(seconds=30))
+
+        self.assertIsNone(self.authenticate(access_token.token))
@@ -0,0 +1,38 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from apps.events.models import AvailableSocialMedia
+from apps.users.models import UserSocialAccount
+
+User = get_user_model()
+
+
+class OrganizerConditionalGetTest(APITestCase):
+    url = "/api/v1/organizers/"
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.organizer = User.objects.create(username="ada", email="ada@example.com", is_organizer=True)
+
+    def test_list_returns_not_modified_for_matching_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_validators_follow_social_account_changes(self):
+        response = self.client.get(self.url)
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+
+        platform = AvailableSocialMedia.objects.create(name="GitHub", link="https://github.com")
+        with mock.patch("utils.response_cache.time.time", return_value=time.time() + 10), \
+                self.captureOnCommitCallbacks(execute=True):
+            UserSocialAccount.objects.create(user=self.organizer, platform=platform, link="https://github.com/ada")
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
@@ -0,0 +1,95 @@
+import io
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_in
+from django.core.management import CommandError, call_command
+from django.test import RequestFactory, TestCase, override_settings
+
+from apps.users.models import LoginHistory
+from utils.geoip import UNKNOWN_LOCATION, GeoIPDatabase, compile_database
+
+User = get_user_model()
+
+RANGES = [
+    ("41.202.192.0", "41.202.223.255", "Cameroon", "Douala"),
+    ("102.244.0.0", "102.244.255.255", "Cameroon", "Yaounde"),
+    # Integer form of 8.8.8.0 - 8.8.8.255
+    ("134744064", "134744319", "United States", "Mountain View"),
+    # Overlaps the first range
+    ("41.202.200.0", "41.202.200.255", "Nigeria", "Lagos"),
+    ("::ffff:154.72.160.0", "::ffff:154.72.175.255", "Cameroon", "Bafoussam"),
+    ("2c0f:f0f8::", "2c0f:f0f8:ffff:ffff:ffff:ffff:ffff:ffff", "Cameroon", "Douala"),
+]
+
+
+class GeoIPDatabaseTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "geoip.bin")
+
+    def test_lookup(self):
+        self.assertEqual(compile_database(RANGES, self.path), (5, 1))
+        database = GeoIPDatabase(self.path)
+
+        self.assertEqual(database.lookup("41.202.192.0"), ("Cameroon", "Douala"))
+        self.assertEqual(database.lookup("41.202.200.1"), ("Cameroon", "Douala"))
+        self.assertEqual(database.lookup("102.244.255.255"), ("Cameroon", "Yaounde"))
+        self.assertEqual(database.lookup("8.8.8.8"), ("United States", "Mountain View"))
+        self.assertEqual(database.lookup("154.72.161.1"), ("Cameroon", "Bafoussam"))
+        self.assertEqual(database.lookup("::ffff:41.202.193.4"), ("Cameroon", "Douala"))
+        self.assertEqual(database.lookup("2c0f:f0f8:1::1"), ("Cameroon", "Douala"))
+
+        for ip_address in ("41.202.224.0", "1.1.1.1", "0.0.0.0", "10.0.0.1", "2c0f:f0f9::1", "::1",
+                           "not an ip", "", None):
+            with self.subTest(ip_address=ip_address):
+                self.assertEqual(database.lookup(ip_address), UNKNOWN_LOCATION)
+
+    def test_compile_command(self):
+        csv_path = os.path.join(os.path.dirname(self.path), "ranges.csv")
+        with open(csv_path, "w", encoding="utf-8") as csv_file:
+            csv_file.write("country,first,last,city\n")
+            csv_file.write('CM,41.202.192.0,41.202.223.255,"Douala, Littoral"\n')
+
+        call_command("compile_geoip", csv_path, output=self.path, columns=[1, 2, 0, 3], skip_header=True,
+                     stdout=io.StringIO())
+        self.assertEqual(GeoIPDatabase(self.path).lookup("41.202.192.1"), ("CM", "Douala, Littoral"))
+
+        with open(csv_path, "w", encoding="utf-8") as csv_file:
+            csv_file.write("41.202.223.255,41.202.192.0,CM,Douala\n")
+        with self.assertRaises(CommandError):
+            call_command("compile_geoip", csv_path, output=self.path)
+        # The previous database is kept
+        self.assertEqual(GeoIPDatabase(self.path).lookup("41.202.192.1"), ("CM", "Douala, Littoral"))
+        self.assertFalse(os.path.exists(f"{self.path}.tmp"))
+
+
+@override_settings(REDIS_URL=None)
+class LoginLocationTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "geoip.bin")
+        compile_database(RANGES, path)
+
+        patcher = mock.patch('utils.geoip._geoip_database', GeoIPDatabase(path))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('apps.users.tasks.send_new_location_login_alert_task.delay')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.user = User.objects.create(username="ada", email="ada@example.com", is_active=True)
+
+    def test_login_is_located(self):
+        for ip_address in ("41.202.192.10", "10.0.0.1"):
+            request = RequestFactory().post("/", REMOTE_ADDR=ip_address)
+            user_logged_in.send(sender=User, request=request, user=self.user)
+
+        self.assertCountEqual(
+            LoginHistory.objects.values_list('ip_address', 'country', 'city'),
+            [("41.202.192.10", "Cameroon", "Douala"), ("10.0.0.1", "", "")],
+        )
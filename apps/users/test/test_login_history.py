@@ -0,0 +1,98 @@
+import os
+import time
+import unittest
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from apps.users.models import LoginHistory
+from services.login_history import BUFFER_KEY, KNOWN_LOCATIONS_KEY_PREFIX, LoginHistoryBuffer, record_login
+
+User = get_user_model()
+
+CHROME_UA = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+
+class LoginHistoryTestMixin:
+    def setUp(self):
+        self.user = User.objects.create(username="ada", email="ada@example.com", is_active=True)
+        patcher = mock.patch('apps.users.tasks.send_new_location_login_alert_task.delay')
+        self.alert = patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+@override_settings(REDIS_URL=None)
+class LoginHistoryWithoutRedisTest(LoginHistoryTestMixin, TestCase):
+    def test_login_is_written_right_away(self):
+        record_login(self.user, "10.0.0.1", CHROME_UA)
+        record_login(self.user, "10.0.0.1", CHROME_UA)
+
+        self.assertEqual(
+            list(LoginHistory.objects.order_by('created_at').values_list('is_new_location', 'browser')),
+            [(True, 'Chrome'), (False, 'Chrome')],
+        )
+        self.alert.assert_called_once()
+
+
+@unittest.skipUnless(os.getenv("REDIS_URL"), "REDIS_URL is not set")
+class LoginHistoryBufferTest(LoginHistoryTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        import redis
+
+        client = redis.Redis.from_url(os.getenv("REDIS_URL"))
+        self.known_key = f"{KNOWN_LOCATIONS_KEY_PREFIX}{self.user.pk}"
+        client.delete(BUFFER_KEY, self.known_key)
+        self.addCleanup(client.delete, BUFFER_KEY, self.known_key)
+        self.buffer = LoginHistoryBuffer(client)
+
+    def test_logins_are_buffered_then_written_in_batches(self):
+        self.assertTrue(self.buffer.record(self.user.pk, "10.0.0.1", CHROME_UA))
+        with self.assertNumQueries(0):
+            self.assertFalse(self.buffer.record(self.user.pk, "10.0.0.1", CHROME_UA))
+            self.assertTrue(self.buffer.record(self.user.pk, "10.0.0.2", CHROME_UA, "Cameroon", "Douala"))
+            self.assertFalse(self.buffer.record(self.user.pk, "10.0.0.3", CHROME_UA, "Cameroon", "Douala"))
+        self.assertFalse(LoginHistory.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.buffer.drain(batch_size=3), 3)
+            self.assertEqual(self.buffer.drain(batch_size=3), 1)
+        self.assertEqual(self.buffer.drain(batch_size=3), 0)
+
+        self.assertCountEqual(
+            LoginHistory.objects.values_list('ip_address', 'is_new_location', 'device_type'),
+            [
+                ("10.0.0.1", True, 'desktop'),
+                ("10.0.0.1", False, 'desktop'),
+                ("10.0.0.2", True, 'desktop'),
+                ("10.0.0.3", False, 'desktop'),
+            ],
+        )
+        self.assertEqual(self.alert.call_count, 2)
+
+    def test_known_locations_are_seeded_from_the_history(self):
+        LoginHistory.objects.create(user=self.user, ip_address="10.0.0.1", country="Cameroon", city="Yaounde")
+
+        self.assertFalse(self.buffer.record(self.user.pk, "10.0.0.1", CHROME_UA))
+        self.assertFalse(self.buffer.record(self.user.pk, "10.0.0.9", CHROME_UA, "Cameroon", "Yaounde"))
+        self.assertTrue(self.buffer.record(self.user.pk, "10.0.0.10", CHROME_UA, "Cameroon", "Douala"))
+
+    def test_logins_of_deleted_users_are_dropped(self):
+        self.buffer.record(self.user.pk, "10.0.0.1", CHROME_UA)
+        self.user.delete()
+
+        self.assertEqual(self.buffer.drain(batch_size=10), 1)
+        self.assertFalse(LoginHistory.objects.exists())
+
+    def test_created_at_is_the_login_time(self):
+        logged_in_at = time.time() - 600
+        with mock.patch('services.login_history.time.time', return_value=logged_in_at):
+            self.buffer.record(self.user.pk, "10.0.0.1", CHROME_UA)
+
+        self.assertEqual(self.buffer.drain(batch_size=10), 1)
+
+        self.assertAlmostEqual(LoginHistory.objects.get().created_at.timestamp(), logged_in_at, places=3)
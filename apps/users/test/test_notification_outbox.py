@@ -0,0 +1,129 @@
+from datetime import timedelta
+from unittest import mock
+
+from celery import current_app
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+
+from apps.users.models import LoginHistory, NotificationOutbox
+from apps.users.tasks import dispatch_notification_outbox_task, send_new_location_login_alert_task
+from services import MailService, OutboxService
+from services.notification_preferences import invalidate_notification_preferences
+
+User = get_user_model()
+
+
+@override_settings(NOTIFICATION_OUTBOX_MAX_ATTEMPTS=2, NOTIFICATION_OUTBOX_RETRY_DELAY=60)
+class NotificationOutboxTest(TestCase):
+    def setUp(self):
+        invalidate_notification_preferences()
+        self.user = User.objects.create(username="amina", email="amina@example.com", is_active=True)
+        self.login_record = LoginHistory.objects.create(
+            user=self.user, ip_address="41.202.219.1", country="Cameroon", city="Douala", is_new_location=True,
+        )
+        mail.outbox = []
+
+    def queue_alert(self):
+        OutboxService.enqueue(
+            NotificationOutbox.TYPE_NEW_LOCATION_LOGIN,
+            self.user,
+            self.login_record.pk,
+            [NotificationOutbox.CHANNEL_EMAIL],
+            payload={"login_time": now().isoformat(), "location": "Douala, Cameroon"},
+        )
+
+    def test_task_queues_the_alert_and_dispatches_it_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            send_new_location_login_alert_task(self.login_record.pk)
+
+        message = NotificationOutbox.objects.get()
+        self.assertEqual(message.status, NotificationOutbox.STATUS_SENT)
+        self.assertEqual(len(mail.outbox), 1)
+        self.login_record.refresh_from_db()
+        self.assertTrue(self.login_record.notification_sent)
+
+    def test_security_alerts_are_dispatched_from_the_interactive_queue(self):
+        with mock.patch.object(dispatch_notification_outbox_task, "apply_async") as apply_async, \
+                self.captureOnCommitCallbacks(execute=True):
+            send_new_location_login_alert_task(self.login_record.pk)
+
+        apply_async.assert_called_once_with(queue="interactive")
+        # The registration confirmations and the retries
+        route = current_app.amqp.router.route({}, dispatch_notification_outbox_task.name)
+        self.assertEqual(route["queue"].name, "transactional")
+
+    def test_queuing_the_same_notification_twice_is_a_no_op(self):
+        self.queue_alert()
+        self.queue_alert()
+
+        self.assertEqual(NotificationOutbox.objects.count(), 1)
+        self.assertEqual(OutboxService().dispatch(), (1, 1))
+        self.assertEqual(OutboxService().dispatch(), (0, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_failed_delivery_is_retried_with_backoff_then_given_up(self):
+        self.queue_alert()
+
+        with mock.patch.object(MailService, "send_new_location_login_alert", side_effect=OSError("SMTP down")):
+            self.assertEqual(OutboxService().dispatch(), (1, 0))
+            message = NotificationOutbox.objects.get()
+            self.assertEqual(message.status, NotificationOutbox.STATUS_PENDING)
+            self.assertEqual(message.attempts, 1)
+            self.assertGreater(message.next_attempt_at, now() + timedelta(seconds=40))
+
+            # Not due yet
+            self.assertEqual(OutboxService().dispatch(), (0, 0))
+
+            NotificationOutbox.objects.update(next_attempt_at=now())
+            OutboxService().dispatch()
+
+        message.refresh_from_db()
+        self.assertEqual(message.status, NotificationOutbox.STATUS_FAILED)
+        self.assertEqual(message.attempts, 2)
+        self.assertEqual(message.last_error, "SMTP down")
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_sms_without_phone_number_is_not_retried(self):
+        OutboxService.enqueue(
+            NotificationOutbox.TYPE_NEW_LOCATION_LOGIN, self.user, self.login_record.pk,
+            [NotificationOutbox.CHANNEL_SMS],
+        )
+
+        self.assertEqual(OutboxService().dispatch(), (1, 0))
+        message = NotificationOutbox.objects.get()
+        self.assertEqual(message.status, NotificationOutbox.STATUS_FAILED)
+        self.assertEqual(message.attempts, 0)
+
+    def test_batch_is_claimed_before_the_provider_is_called(self):
+        self.queue_alert()
+        send_alert = MailService.send_new_location_login_alert
+        statuses = []
+
+        def record_status(service, *args, **kwargs):
+            statuses.append(NotificationOutbox.objects.values_list("status", flat=True).get())
+            # Another dispatcher does not pick the claimed notification up
+            self.assertEqual(OutboxService().dispatch(), (0, 0))
+            return send_alert(service, *args, **kwargs)
+
+        with mock.patch.object(MailService, "send_new_location_login_alert", autospec=True, side_effect=record_status):
+            self.assertEqual(OutboxService().dispatch(), (1, 1))
+
+        self.assertEqual(statuses, [NotificationOutbox.STATUS_SENDING])
+        message = NotificationOutbox.objects.get()
+        self.assertEqual(message.status, NotificationOutbox.STATUS_SENT)
+        self.assertIsNone(message.locked_until)
+
+    def test_notification_left_sending_is_delivered_once_its_lease_expires(self):
+        self.queue_alert()
+        NotificationOutbox.objects.update(
+            status=NotificationOutbox.STATUS_SENDING, locked_until=now() + timedelta(minutes=5),
+        )
+
+        self.assertEqual(OutboxService().dispatch(), (0, 0))
+
+        NotificationOutbox.objects.update(locked_until=now() - timedelta(seconds=1))
+        self.assertEqual(OutboxService().dispatch(), (1, 1))
+        self.assertEqual(NotificationOutbox.objects.get().status, NotificationOutbox.STATUS_SENT)
+        self.assertEqual(len(mail.outbox), 1)
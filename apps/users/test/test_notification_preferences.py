@@ -0,0 +1,62 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.users.models import NotificationSettings
+from services import notification_preferences
+from services.notification_preferences import (
+    CACHE_KEY,
+    get_notification_preferences,
+    invalidate_notification_preferences,
+    notification_preferences_lookups_total,
+)
+
+
+def lookups(source):
+    return notification_preferences_lookups_total.labels(source=source)._value.get()
+
+
+class NotificationPreferencesCacheTest(TestCase):
+    def setUp(self):
+        invalidate_notification_preferences()
+        self.addCleanup(invalidate_notification_preferences)
+
+    def test_repeated_lookups_do_not_query_the_database(self):
+        NotificationSettings.objects.create(send_welcome_sms=True)
+        database = lookups("database")
+
+        with self.assertNumQueries(1):
+            self.assertTrue(get_notification_preferences().send_welcome_sms)
+        with self.assertNumQueries(0):
+            for _ in range(5):
+                self.assertTrue(get_notification_preferences().send_welcome_sms)
+
+        self.assertEqual(lookups("database") - database, 1)
+
+    def test_other_processes_read_the_shared_cache(self):
+        NotificationSettings.objects.create(send_welcome_sms=True)
+        get_notification_preferences()
+        cached = lookups("cache")
+
+        # Drop only this process's snapshot, as a freshly started worker would see it
+        notification_preferences._local_snapshot = None
+        with self.assertNumQueries(0):
+            self.assertTrue(get_notification_preferences().send_welcome_sms)
+
+        self.assertEqual(lookups("cache") - cached, 1)
+
+    def test_saving_the_settings_invalidates_the_cache(self):
+        settings_row = NotificationSettings.objects.create(send_welcome_sms=False)
+        self.assertFalse(get_notification_preferences().send_welcome_sms)
+
+        settings_row.send_welcome_sms = True
+        with self.captureOnCommitCallbacks(execute=True):
+            settings_row.save()
+
+        self.assertIsNone(cache.get(CACHE_KEY))
+        self.assertTrue(get_notification_preferences().send_welcome_sms)
+
+    def test_defaults_without_settings_row_are_cached(self):
+        with self.assertNumQueries(1):
+            self.assertTrue(get_notification_preferences().send_welcome_email)
+        with self.assertNumQueries(0):
+            get_notification_preferences()
@@ -0,0 +1,47 @@
+import time
+from unittest import mock
+
+from celery.exceptions import Retry
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.users.models import NotificationOutbox
+from apps.users.tasks import send_registration_otp_task
+from services import SMSService
+from services.circuit_breaker import SMTP_CIRCUIT
+
+User = get_user_model()
+
+
+class RegistrationOtpTest(TestCase):
+    def setUp(self):
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create(username="amina", email="amina@example.com", phone_number="+237670000001")
+        cache.clear()
+        mail.outbox = []
+        retry = mock.patch.object(send_registration_otp_task, "retry", side_effect=Retry())
+        self.retry = retry.start()
+        self.addCleanup(retry.stop)
+
+    def test_email_is_retried_while_the_smtp_circuit_is_open(self):
+        cache.set(f"circuit:{SMTP_CIRCUIT}:opened_at", time.time(), timeout=None)
+
+        with self.assertRaises(Retry):
+            send_registration_otp_task(self.user.pk, channels=[NotificationOutbox.CHANNEL_EMAIL])
+
+        self.assertEqual(self.retry.call_args.kwargs["kwargs"], {"channels": [NotificationOutbox.CHANNEL_EMAIL]})
+        self.assertGreater(self.retry.call_args.kwargs["countdown"], 0)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_only_the_rate_limited_sms_is_retried(self):
+        rate_limited = {"success": False, "rate_limited": True, "retry_after": 3.0}
+        with mock.patch.object(SMSService, "is_configured", return_value=True), \
+                mock.patch.object(SMSService, "send_otp_sms", return_value=rate_limited):
+            with self.assertRaises(Retry):
+                send_registration_otp_task(self.user.pk)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(self.retry.call_args.kwargs["kwargs"], {"channels": [NotificationOutbox.CHANNEL_SMS]})
+        self.assertEqual(self.retry.call_args.kwargs["countdown"], 3.0)
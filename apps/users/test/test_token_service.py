@@ -0,0 +1,71 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils.timezone import now
+from oauth2_provider.models import AccessToken, RefreshToken
+
+from apps.users import authentication
+from services import TokenService
+from services.token_service import DEFAULT_APPLICATION_VERSION_KEY
+
+User = get_user_model()
+
+
+def clear_caches():
+    TokenService.clear_default_application()
+    cache.clear()
+    authentication._local_entries.clear()
+
+
+class TokenServiceTest(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.addCleanup(clear_caches)
+        self.user = User.objects.create(username="ada", email="ada@example.com", is_active=True)
+
+    def test_login_tokens_are_issued_in_one_query(self):
+        TokenService().issue(self.user)
+
+        with self.assertNumQueries(1):
+            tokens = TokenService().issue(self.user)
+
+        access_token = AccessToken.objects.get(token=tokens['access_token'].token)
+        refresh_token = RefreshToken.objects.get(token=tokens['refresh_token'].token)
+        self.assertEqual(access_token.pk, tokens['access_token'].pk)
+        self.assertEqual(refresh_token.access_token_id, access_token.pk)
+        self.assertEqual(str(access_token.user_id), str(self.user.pk))
+        self.assertEqual(access_token.application.name, "Default")
+        self.assertTrue(access_token.is_valid())
+
+    def test_expired_tokens_are_pruned_in_batches(self):
+        service = TokenService()
+        live = service.issue(self.user)
+        expired = [service.issue(self.user) for _ in range(3)]
+        logged_out = service.issue(self.user)
+        AccessToken.objects.filter(
+            pk__in=[tokens['access_token'].pk for tokens in expired]
+        ).update(expires=now() - timedelta(minutes=1))
+        AccessToken.objects.filter(pk=logged_out['access_token'].pk).delete()
+
+        deleted = TokenService.prune_expired(batch_size=2)
+
+        self.assertEqual(deleted, {'refresh_tokens': 4, 'access_tokens': 3})
+        self.assertQuerySetEqual(AccessToken.objects.values_list('pk', flat=True), [live['access_token'].pk])
+        self.assertQuerySetEqual(RefreshToken.objects.values_list('pk', flat=True), [live['refresh_token'].pk])
+
+    def test_application_deleted_by_another_process_is_resolved_again(self):
+        application = TokenService.get_default_application()
+        deleted_pk = application.pk
+        # The deletion happens in another process, this one only sees the shared version change
+        with mock.patch.object(TokenService, "clear_default_application"):
+            application.delete()
+        cache.set(DEFAULT_APPLICATION_VERSION_KEY, time.time_ns(), timeout=None)
+
+        tokens = TokenService().issue(self.user)
+
+        self.assertNotEqual(tokens['access_token'].application_id, deleted_pk)
+        self.assertTrue(AccessToken.objects.filter(pk=tokens['access_token'].pk).exists())
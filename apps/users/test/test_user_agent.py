@@ -0,0 +1,61 @@
+import json
+import os
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from apps.users.models import LoginHistory
+from utils.user_agent import UserAgent, parse_user_agent
+
+User = get_user_model()
+
+with open(os.path.join(os.path.dirname(__file__), 'fixtures', 'user_agents.json')) as fixture:
+    USER_AGENTS = json.load(fixture)
+
+EDGE_UA = next(case['user_agent'] for case in USER_AGENTS if 'Edg/' in case['user_agent'])
+IPAD_UA = next(case['user_agent'] for case in USER_AGENTS if 'iPad' in case['user_agent'])
+
+
+class UserAgentTest(SimpleTestCase):
+    def test_real_user_agents_are_classified(self):
+        for case in USER_AGENTS:
+            with self.subTest(user_agent=case['user_agent']):
+                self.assertEqual(
+                    parse_user_agent(case['user_agent']),
+                    UserAgent(case['device_type'], case['browser'], case['os']),
+                )
+
+    def test_results_are_cached_by_user_agent(self):
+        parse_user_agent.cache_clear()
+
+        parse_user_agent(EDGE_UA)
+        parse_user_agent(EDGE_UA)
+
+        self.assertEqual(parse_user_agent.cache_info().hits, 1)
+
+
+class ReclassifyLoginHistoryTest(TestCase):
+    def test_logins_are_reclassified_in_batches(self):
+        user = User.objects.create(username="ada", email="ada@example.com", is_active=True)
+        edge = LoginHistory.objects.create(
+            user=user, ip_address="10.0.0.1", user_agent=EDGE_UA, device_type='desktop', browser='Chrome',
+            os='Windows',
+        )
+        ipad = LoginHistory.objects.create(
+            user=user, ip_address="10.0.0.1", user_agent=IPAD_UA, device_type='mobile', browser='Safari',
+            os='macOS',
+        )
+        correct = LoginHistory.objects.create(
+            user=user, ip_address="10.0.0.1", user_agent="", device_type='unknown', browser='Unknown', os='Unknown',
+        )
+
+        call_command('reclassify_login_history', batch_size=2, stdout=StringIO())
+
+        edge.refresh_from_db()
+        ipad.refresh_from_db()
+        correct.refresh_from_db()
+        self.assertEqual((edge.device_type, edge.browser, edge.os), ('desktop', 'Edge', 'Windows'))
+        self.assertEqual((ipad.device_type, ipad.browser, ipad.os), ('tablet', 'Safari', 'iOS'))
+        self.assertEqual((correct.device_type, correct.browser, correct.os), ('unknown', 'Unknown', 'Unknown'))
@@ -8,7 +8,7 @@ from rest_framework import status
 from rest_framework.parsers import JSONParser
 from rest_framework.views import APIView
 
-from apps.users.helpers.auth import generate_tokens, get_serializer
+from apps.users.helpers.auth import get_serializer
 from apps.users.models import OtpCode
 from apps.users.serializers import (
     UserRegistrationSerializer, SuccessResponseSerializer,
@@ -18,6 +18,7 @@ from apps.users.serializers import (
     EmailVerificationSerializer
 )
 from mixins import APIResponseMixin
+from services import TokenService
 from utils.auth import authenticate_user
 
 User = get_user_model()
@@ -82,7 +83,7 @@ class LoginView(APIResponseMixin, APIView):
                 status_code=status.HTTP_400_BAD_REQUEST,
             )
 
-        tokens = generate_tokens(self, user)
+        tokens = TokenService().issue(user)
         response_data = {
             "access_token": tokens['access_token'].token,
             "refresh_token": tokens['refresh_token'].token,
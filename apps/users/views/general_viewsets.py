@@ -2,6 +2,8 @@ from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
+from apps.users.pagination import KeysetPagination
+
 
 class BaseModelViewSet(ModelViewSet):
     """
@@ -15,7 +17,14 @@ class BaseModelViewSet(ModelViewSet):
     ):
         """
         Custom paginated response method.
+
+        A ``cursor`` query parameter switches to keyset pagination, which skips the count query.
         """
+        if KeysetPagination.cursor_query_param in request.query_params:
+            return self.cursor_paginated_response(
+                queryset, request, serializer_class, message=message, status_code=status_code,
+            )
+
         page = self.paginate_queryset(queryset)
         serializer = serializer_class(page, many=True)
         response_data = {
@@ -35,3 +44,27 @@ class BaseModelViewSet(ModelViewSet):
             "results": serializer.data
         }
         return Response(response_data, status=status_code)
+
+    def cursor_paginated_response(
+            self, queryset, request,
+            serializer_class, message="Success",
+            status_code=status.HTTP_200_OK,
+    ):
+        """
+        Keyset paginated response ordered by ``(created_at, id)``.
+        """
+        paginator = KeysetPagination()
+        page_size = self.paginator.get_page_size(request) if self.paginator else None
+        page = paginator.paginate_queryset(queryset, request, page_size=page_size)
+        serializer = serializer_class(page, many=True)
+        response_data = {
+            "status": True,
+            "message": message,
+            "status_code": status_code,
+            "page": None,
+            "page_size": paginator.page_size,
+            "total": None,
+            "pagination": paginator.get_pagination_data(),
+            "results": serializer.data
+        }
+        return Response(response_data, status=status_code)
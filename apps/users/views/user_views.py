@@ -9,6 +9,8 @@ from rest_framework.views import APIView
 
 from apps.users.serializers import UserSerializer, SuccessResponseSerializer, ErrorResponseSerializer, OrganizerSerializer
 from mixins import APIResponseMixin
+from utils.conditional_get import conditional_get
+from utils.response_cache import ORGANIZERS_NAMESPACE, cached_response
 
 User = get_user_model()
 
@@ -90,6 +92,8 @@ class OrganizersListView(APIResponseMixin, APIView):
             ),
         }
     )
+    @conditional_get(User.objects.filter(is_organizer=True), namespace=ORGANIZERS_NAMESPACE)
+    @cached_response(ORGANIZERS_NAMESPACE)
     def get(self, request):
         organizers = User.objects.filter(is_organizer=True).prefetch_related('social_accounts__platform')
         serializer = OrganizerSerializer(organizers, many=True)
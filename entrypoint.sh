@@ -34,4 +34,11 @@ else:
 END
 fi
 
+# Celery workers export the metrics of their pool processes through this directory,
+# it must be empty when they start
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+  rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+  mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
 exec "$@"
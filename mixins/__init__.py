@@ -1 +1,2 @@
-from .api_response_mixin import APIResponseMixin
\ No newline at end of file
+from .api_response_mixin import APIResponseMixin
+from .query_plan_mixin import QueryPlanMixin
@@ -5,6 +5,8 @@ from rest_framework.pagination import PageNumberPagination
 from rest_framework.request import Request
 from rest_framework.response import Response
 
+from apps.users.pagination import KeysetPagination
+
 
 class APIResponseMixin:
     """
@@ -58,6 +60,10 @@ class APIResponseMixin:
         """
         Returns a paginated response with next and previous URLs.
 
+        Passing a ``cursor`` query parameter (it may be empty for the first page)
+        switches to keyset pagination ordered by ``(created_at, id)``: no count is
+        computed, so ``count``, ``current_page`` and ``total_pages`` are null.
+
         :param request: The DRF request object.
         :param queryset: The queryset to paginate.
         :param serializer_class: The serializer class to use for the data.
@@ -66,6 +72,12 @@ class APIResponseMixin:
         :param status_code: HTTP status code, default is 200 OK.
         :return: DRF Response object with standardized pagination format.
         """
+        if KeysetPagination.cursor_query_param in request.query_params:
+            return self.cursor_paginated_response(
+                request, queryset, serializer_class, message=message, page_size=page_size,
+                status_code=status_code,
+            )
+
         paginator = PageNumberPagination()
         paginator.page_size = page_size
 
@@ -90,3 +102,31 @@ class APIResponseMixin:
             }
         }
         return Response(response_data, status=status.HTTP_200_OK)
+
+    def cursor_paginated_response(
+            self, request: Request, queryset: Any, serializer_class: Any,
+            message: str = "Success", page_size: int = 10,
+            status_code: int = status.HTTP_200_OK,
+    ) -> Response:
+        """
+        Returns a keyset paginated response using the same envelope as `paginated_response`.
+
+        :param request: The DRF request object.
+        :param queryset: The queryset to paginate.
+        :param serializer_class: The serializer class to use for the data.
+        :param message: A string message describing the success.
+        :param page_size: Number of items per page.
+        :param status_code: HTTP status code, default is 200 OK.
+        :return: DRF Response object with standardized pagination format.
+        """
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(queryset, request, page_size=page_size)
+
+        response_data = {
+            "status": True,
+            "message": message,
+            "data": serializer_class(page, many=True).data,
+            "status_code": status_code,
+            "pagination": paginator.get_pagination_data(),
+        }
+        return Response(response_data, status=status.HTTP_200_OK)
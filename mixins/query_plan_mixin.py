@@ -0,0 +1,32 @@
+from typing import Any
+
+
+class QueryPlanMixin:
+    """
+    A viewset mixin that applies the query plan declared by the serializer in use.
+
+    Serializers declare the relations they read with ``select_related_fields`` and
+    ``prefetch_related_fields``, so the queryset loads them up front instead of
+    issuing one query per row during serialization.
+    """
+
+    @staticmethod
+    def apply_query_plan(queryset: Any, serializer_class: Any) -> Any:
+        """
+        Applies the serializer's select_related/prefetch_related plan to a queryset.
+
+        :param queryset: The queryset to optimize.
+        :param serializer_class: The serializer class that will render the queryset.
+        :return: The queryset with the plan applied.
+        """
+        select_related_fields = getattr(serializer_class, "select_related_fields", ())
+        prefetch_related_fields = getattr(serializer_class, "prefetch_related_fields", ())
+        if select_related_fields:
+            queryset = queryset.select_related(*select_related_fields)
+        if prefetch_related_fields:
+            queryset = queryset.prefetch_related(*prefetch_related_fields)
+        return queryset
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        return self.apply_query_plan(queryset, self.get_serializer_class())
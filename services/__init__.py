@@ -1,4 +1,6 @@
 from .mail_service import MailService
 from .sms_service import SMSService, SMSTemplates
 from .notification_service import NotificationService
-from .calendar_service import CalendarService
\ No newline at end of file
+from .calendar_service import CalendarService
+from .outbox_service import OutboxService
+from .token_service import TokenService
@@ -1,16 +1,70 @@
 import logging
+import threading
+from collections import OrderedDict
 from datetime import timedelta
 from icalendar import Calendar, Event as CalEvent
+from django.core.cache import cache
 from django.utils.timezone import now
 
+from utils.response_cache import EVENTS_NAMESPACE, get_namespace_version
+
 logger = logging.getLogger(__name__)
 
+ICS_CACHE_TIMEOUT = 60 * 60 * 24
+ICS_LOCAL_CACHE_SIZE = 128
+
 
 class CalendarService:
     """
     Service for generating calendar event files (.ics) that can be imported
     into Google Calendar, Outlook, Apple Calendar, etc.
     """
+    _local_cache = OrderedDict()
+    _local_cache_lock = threading.Lock()
+
+    def get_event_ics(self, event) -> bytes:
+        """
+        Get the .ics content of an event, generating it at most once per event version
+
+        Payloads are memoized in-process and in the shared cache, keyed by the event id,
+        its updated_at and the events cache namespace version (bumped when tags or speakers change).
+
+        Args:
+            event: Event model instance
+
+        Returns:
+            bytes: The .ics file content
+        """
+        try:
+            version = get_namespace_version(EVENTS_NAMESPACE)
+        except Exception:
+            logger.exception("Error reading the events cache version, generating the .ics file")
+            return self.generate_event_ics(event)
+
+        key = f"event-ics:{event.id}:{event.updated_at.timestamp()}:v{version}"
+        with self._local_cache_lock:
+            ics_content = self._local_cache.get(key)
+            if ics_content is not None:
+                self._local_cache.move_to_end(key)
+                return ics_content
+
+        try:
+            ics_content = cache.get(key)
+        except Exception:
+            logger.exception("Error reading the .ics cache for event %s", event.id)
+            ics_content = None
+        if ics_content is None:
+            ics_content = self.generate_event_ics(event)
+            try:
+                cache.set(key, ics_content, timeout=ICS_CACHE_TIMEOUT)
+            except Exception:
+                logger.exception("Error writing the .ics cache for event %s", event.id)
+
+        with self._local_cache_lock:
+            self._local_cache[key] = ics_content
+            while len(self._local_cache) > ICS_LOCAL_CACHE_SIZE:
+                self._local_cache.popitem(last=False)
+        return ics_content
 
     def generate_event_ics(self, event) -> bytes:
         """
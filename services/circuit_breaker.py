@@ -0,0 +1,166 @@
+import logging
+import threading
+import time
+from typing import Dict
+
+from django.conf import settings
+from django.core.cache import cache
+from django_prometheus.conf import NAMESPACE
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+SMTP_CIRCUIT = "smtp"
+TWILIO_CIRCUIT = "twilio"
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+STATE_VALUES = {STATE_CLOSED: 0, STATE_OPEN: 1, STATE_HALF_OPEN: 2}
+
+circuit_breaker_state = Gauge(
+    "circuit_breaker_state",
+    "State of the provider circuit breaker as last seen by this process: 0 closed, 1 open, 2 half-open",
+    ["provider"],
+    namespace=NAMESPACE,
+)
+circuit_breaker_trips_total = Counter(
+    "circuit_breaker_trips_total",
+    "Times the provider circuit breaker opened",
+    ["provider"],
+    namespace=NAMESPACE,
+)
+circuit_breaker_short_circuits_total = Counter(
+    "circuit_breaker_short_circuits_total",
+    "Calls refused without reaching the provider because its circuit breaker was open",
+    ["provider"],
+    namespace=NAMESPACE,
+)
+
+
+class CircuitOpenError(Exception):
+    """The provider's circuit is open, the call should be retried after retry_after seconds"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"The {name} circuit breaker is open")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker whose state is kept in the cache (Redis in production), so every worker
+    process stops calling a provider as soon as one of them has seen it fail repeatedly.
+
+    Closed: calls go through, failure_threshold failures within failure_window seconds open the circuit.
+    Open: calls raise CircuitOpenError for reset_timeout seconds.
+    Half-open: a single call, across all workers, probes the provider; its success closes the circuit,
+    its failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = None, failure_window: int = None,
+                 reset_timeout: int = None):
+        self.name = name
+        self.failure_threshold = failure_threshold or settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD
+        self.failure_window = failure_window or settings.CIRCUIT_BREAKER_FAILURE_WINDOW
+        self.reset_timeout = reset_timeout or settings.CIRCUIT_BREAKER_RESET_TIMEOUT
+        self._failures_key = f"circuit:{name}:failures"
+        self._opened_at_key = f"circuit:{name}:opened_at"
+        self._probe_key = f"circuit:{name}:probe"
+        # Per thread: whether the last call saw state to clear on success, and whether it is the half-open probe
+        self._local = threading.local()
+
+    def state(self) -> str:
+        """
+        Get the state of the circuit
+        :return: One of STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN
+        """
+        opened_at = cache.get(self._opened_at_key)
+        if opened_at is None:
+            return STATE_CLOSED
+        if time.time() - opened_at < self.reset_timeout:
+            return STATE_OPEN
+        return STATE_HALF_OPEN
+
+    def before_call(self):
+        """
+        Check the circuit before calling the provider
+        :raise CircuitOpenError: when the circuit is open, or half-open and another call is probing
+        """
+        try:
+            values = cache.get_many([self._failures_key, self._opened_at_key])
+        except Exception:
+            # Without the shared state, let calls through rather than stop every notification
+            logger.warning("Circuit breaker state unavailable for %s", self.name, exc_info=True)
+            self._local.dirty = self._local.probing = False
+            return
+
+        self._local.probing = False
+        opened_at = values.get(self._opened_at_key)
+        self._local.dirty = bool(values)
+        if opened_at is None:
+            self._set_state(STATE_CLOSED)
+            return
+
+        remaining = opened_at + self.reset_timeout - time.time()
+        if remaining > 0:
+            self._short_circuit(STATE_OPEN)
+            raise CircuitOpenError(self.name, remaining)
+        if not cache.add(self._probe_key, 1, timeout=self.reset_timeout):
+            self._short_circuit(STATE_HALF_OPEN)
+            raise CircuitOpenError(self.name, self.reset_timeout)
+        self._local.probing = True
+        self._set_state(STATE_HALF_OPEN)
+
+    def record_success(self):
+        if not getattr(self._local, 'dirty', False):
+            return
+        self._local.dirty = self._local.probing = False
+        try:
+            cache.delete_many([self._failures_key, self._opened_at_key, self._probe_key])
+        except Exception:
+            logger.warning("Could not close the %s circuit breaker", self.name, exc_info=True)
+            return
+        self._set_state(STATE_CLOSED)
+
+    def record_failure(self):
+        try:
+            cache.add(self._failures_key, 0, timeout=self.failure_window)
+            failures = cache.incr(self._failures_key)
+            self._local.dirty = True
+            if getattr(self._local, 'probing', False):
+                self._local.probing = False
+                cache.set(self._opened_at_key, time.time(), timeout=None)
+                cache.delete(self._probe_key)
+            elif failures < self.failure_threshold or not cache.add(self._opened_at_key, time.time(), timeout=None):
+                return
+        except Exception:
+            logger.warning("Could not record a failure of %s", self.name, exc_info=True)
+            return
+
+        logger.error("Opening the %s circuit breaker for %s seconds", self.name, self.reset_timeout)
+        circuit_breaker_trips_total.labels(provider=self.name).inc()
+        self._set_state(STATE_OPEN)
+
+    def _short_circuit(self, state: str):
+        circuit_breaker_short_circuits_total.labels(provider=self.name).inc()
+        self._set_state(state)
+
+    def _set_state(self, state: str):
+        circuit_breaker_state.labels(provider=self.name).set(STATE_VALUES[state])
+
+
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+_circuit_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """
+    Get the circuit breaker of a provider
+    :param name: SMTP_CIRCUIT or TWILIO_CIRCUIT
+    :return: CircuitBreaker
+    """
+    with _circuit_breakers_lock:
+        if name not in _circuit_breakers:
+            _circuit_breakers[name] = CircuitBreaker(name)
+        return _circuit_breakers[name]
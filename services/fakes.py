@@ -0,0 +1,70 @@
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from twilio.base.exceptions import TwilioRestException
+
+
+@dataclass
+class FakeMessage:
+    sid: str
+    status: str
+    body: str
+    from_: str
+    to: str
+
+
+class FakeMessages:
+    def __init__(self, client):
+        self.client = client
+
+    def create(self, body: str, from_: str, to: str) -> FakeMessage:
+        with self.client.lock:
+            self.client.in_flight += 1
+            self.client.max_in_flight = max(self.client.max_in_flight, self.client.in_flight)
+        try:
+            if self.client.latency:
+                time.sleep(self.client.latency)
+            return self._create(body, from_, to)
+        finally:
+            with self.client.lock:
+                self.client.in_flight -= 1
+
+    def _create(self, body: str, from_: str, to: str) -> FakeMessage:
+        with self.client.lock:
+            if self.client.failures:
+                self.client.failures -= 1
+                raise TwilioRestException(
+                    self.client.failure_status, "/Messages.json", msg="Fake Twilio failure", method="POST",
+                    code=20429 if self.client.failure_status == 429 else None,
+                )
+            message = FakeMessage(
+                sid=f"SM{next(self.client.counter):032d}", status="queued", body=body, from_=from_, to=to,
+            )
+            self.client.sent.append(message)
+            return message
+
+
+class FakeTwilioClient:
+    """
+    Stand-in for twilio.rest.Client in tests and load tests, it records the messages instead of sending them
+    :param failures: Number of next messages.create calls that raise a TwilioRestException
+    :param failure_status: HTTP status of those exceptions, 429 for a rate limit
+    :param latency: Seconds each call takes, like the round trip to the Twilio API
+    """
+
+    def __init__(self, failures: int = 0, failure_status: int = 429, latency: float = 0):
+        self.lock = threading.Lock()
+        self.counter = itertools.count(1)
+        self.failures = failures
+        self.failure_status = failure_status
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.sent: List[FakeMessage] = []
+        self.messages = FakeMessages(self)
+
+    def sent_to(self, to: Optional[str] = None) -> List[FakeMessage]:
+        return [message for message in self.sent if to is None or message.to == to]
@@ -0,0 +1,227 @@
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+
+from utils.main import generate_uuid
+from utils.user_agent import parse_user_agent
+
+logger = logging.getLogger(__name__)
+
+BUFFER_KEY = "login-history:buffer"
+KNOWN_LOCATIONS_KEY_PREFIX = "login-history:known:"
+# Member of a known locations set telling it was seeded from the database, so it is never empty
+SEEDED_MEMBER = "*"
+# Latest logins a known locations set is seeded from
+SEED_LOGINS = 1000
+
+# Record a login: check the location against the user's known locations, remember it and buffer
+# the login. Returns -1 without recording anything when the known locations are not in Redis yet.
+RECORD_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return -1
+end
+local new_ip = redis.call('SADD', KEYS[1], ARGV[1])
+local new_location = 1
+if ARGV[2] ~= '' then
+    new_location = redis.call('SADD', KEYS[1], ARGV[2])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+local is_new = 0
+if new_ip == 1 and new_location == 1 then
+    is_new = 1
+end
+redis.call('RPUSH', KEYS[2], is_new .. ARGV[4])
+return is_new
+"""
+
+# Take the `count` oldest records of the buffer
+POP_SCRIPT = """
+local records = redis.call('LRANGE', KEYS[1], 0, ARGV[1] - 1)
+redis.call('LTRIM', KEYS[1], #records, -1)
+return records
+"""
+
+
+def _ip_member(ip_address: str) -> str:
+    return f"ip:{ip_address}"
+
+
+def _location_member(country: str, city: str) -> str:
+    return f"location:{country}|{city}" if country else ''
+
+
+class LoginHistoryBuffer:
+    """
+    Logins buffered in Redis and written to LoginHistory in batches by drain().
+
+    Recording a login is one round trip: the new location check runs against the user's known
+    IP addresses and locations, a Redis set seeded from their latest SEED_LOGINS logins on first use
+    and kept for LOGIN_KNOWN_LOCATIONS_TTL seconds after the last login.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._record = client.register_script(RECORD_SCRIPT)
+        self._pop = client.register_script(POP_SCRIPT)
+
+    def record(self, user_id, ip_address: str, user_agent: str, country: str = '', city: str = '') -> bool:
+        """
+        Buffer a successful login
+        :return: Whether it is from a new location
+        """
+        known_key = f"{KNOWN_LOCATIONS_KEY_PREFIX}{user_id}"
+        # Keys are short, the buffer holds one of these per login until the next drain
+        record = json.dumps({
+            'id': generate_uuid(),
+            'u': str(user_id),
+            'ip': ip_address,
+            'ua': user_agent,
+            'c': country,
+            'ci': city,
+            't': time.time(),
+        }, separators=(',', ':'))
+        args = [_ip_member(ip_address), _location_member(country, city), settings.LOGIN_KNOWN_LOCATIONS_TTL, record]
+
+        is_new = self._record(keys=[known_key, BUFFER_KEY], args=args)
+        if is_new == -1:
+            self._seed(user_id, known_key)
+            is_new = self._record(keys=[known_key, BUFFER_KEY], args=args)
+        return is_new == 1
+
+    def _seed(self, user_id, known_key: str):
+        from apps.users.models import LoginHistory
+
+        known = set()
+        rows = LoginHistory.objects.filter(user_id=user_id, login_successful=True).order_by(
+            '-created_at'
+        ).values_list('ip_address', 'country', 'city')[:SEED_LOGINS]
+        for ip_address, country, city in rows:
+            known.add(_ip_member(ip_address))
+            if country:
+                known.add(_location_member(country, city))
+        pipe = self.client.pipeline()
+        pipe.sadd(known_key, SEEDED_MEMBER, *known)
+        pipe.expire(known_key, settings.LOGIN_KNOWN_LOCATIONS_TTL)
+        pipe.execute()
+
+    def drain(self, batch_size: int) -> int:
+        """
+        Write one batch of buffered logins to LoginHistory and queue the new location alerts.
+        created_at is the time of the login, not of the drain. Records are taken from Redis before being
+        written and put back if the write fails, their ids make writing one twice a no-op
+        :return: Number of logins taken from the buffer
+        """
+        from apps.users.models import LoginHistory, User
+        from apps.users.tasks import send_new_location_login_alert_task
+
+        records = self._pop(keys=[BUFFER_KEY], args=[batch_size])
+        if not records:
+            return 0
+
+        logins = []
+        for raw in records:
+            raw = raw.decode() if isinstance(raw, bytes) else raw
+            logins.append((raw[0] == '1', json.loads(raw[1:])))
+        # Users deleted since they logged in
+        user_ids = {str(pk) for pk in User.objects.filter(pk__in={data['u'] for _, data in logins})
+                    .values_list('pk', flat=True)}
+
+        drained_at = time.time()
+        rows = []
+        for is_new_location, data in logins:
+            if data['u'] not in user_ids:
+                continue
+            user_agent = parse_user_agent(data['ua'])
+            rows.append(LoginHistory(
+                id=data['id'],
+                user_id=data['u'],
+                ip_address=data['ip'],
+                user_agent=data['ua'],
+                device_type=user_agent.device_type,
+                browser=user_agent.browser,
+                os=user_agent.os,
+                country=data['c'],
+                city=data['ci'],
+                is_new_location=is_new_location,
+                login_successful=True,
+                created_at=datetime.fromtimestamp(data.get('t', drained_at), timezone.utc),
+            ))
+
+        try:
+            with transaction.atomic():
+                created_at = [row.created_at for row in rows]
+                LoginHistory.objects.bulk_create(rows, ignore_conflicts=True)
+                # auto_now_add overwrites created_at on insert, put the login times back
+                for row, value in zip(rows, created_at):
+                    row.created_at = value
+                LoginHistory.objects.bulk_update(rows, ['created_at'])
+                for row in rows:
+                    if row.is_new_location:
+                        transaction.on_commit(lambda pk=row.pk: send_new_location_login_alert_task.delay(pk))
+        except Exception:
+            self.client.rpush(BUFFER_KEY, *records)
+            raise
+        return len(records)
+
+
+_login_history_buffer = None
+_login_history_buffer_lock = threading.Lock()
+
+
+def get_login_history_buffer() -> Optional[LoginHistoryBuffer]:
+    """
+    Get the login buffer, None without REDIS_URL: logins are then written as they happen
+    :return: LoginHistoryBuffer or None
+    """
+    global _login_history_buffer
+    if not settings.REDIS_URL:
+        return None
+    with _login_history_buffer_lock:
+        if _login_history_buffer is None:
+            import redis
+
+            _login_history_buffer = LoginHistoryBuffer(redis.Redis.from_url(settings.REDIS_URL))
+        return _login_history_buffer
+
+
+def record_login_now(user, ip_address: str, user_agent: str, country: str = '', city: str = ''):
+    """Write a login to LoginHistory right away, without the buffer"""
+    from apps.users.models import LoginHistory
+    from apps.users.tasks import send_new_location_login_alert_task
+
+    parsed = parse_user_agent(user_agent)
+    is_new_location = LoginHistory.is_new_login_location(user, ip_address, country, city)
+    login_record = LoginHistory.objects.create(
+        user=user,
+        ip_address=ip_address,
+        user_agent=user_agent,
+        device_type=parsed.device_type,
+        browser=parsed.browser,
+        os=parsed.os,
+        country=country,
+        city=city,
+        is_new_location=is_new_location,
+        login_successful=True
+    )
+    if is_new_location:
+        send_new_location_login_alert_task.delay(login_record.pk)
+
+
+def record_login(user, ip_address: str, user_agent: str, country: str = '', city: str = ''):
+    """
+    Record a successful login, through the buffer when Redis is available
+    """
+    buffer = get_login_history_buffer()
+    if buffer is not None:
+        try:
+            buffer.record(user.pk, ip_address, user_agent, country, city)
+            return
+        except Exception:
+            logger.warning("Login history buffer unavailable, writing the login now", exc_info=True)
+    record_login_now(user, ip_address, user_agent, country, city)
@@ -1,13 +1,41 @@
+import logging
+import smtplib
+import time
+from contextlib import contextmanager
 from datetime import timedelta
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from django.conf import settings
-from django.core.mail import EmailMessage
+from django.core.mail import EmailMessage, get_connection
 from django.template.loader import render_to_string
+from django.utils.html import conditional_escape
 from django.utils.timezone import now
 
+from services import metrics
+from services.circuit_breaker import SMTP_CIRCUIT, CircuitOpenError, get_circuit_breaker
 from utils import generate_otp
 
+logger = logging.getLogger(__name__)
+
+# Errors after which the SMTP session is reopened and the message sent again
+RECONNECT_ERRORS = (
+    smtplib.SMTPServerDisconnected,
+    smtplib.SMTPConnectError,
+    ConnectionError,
+    TimeoutError,
+)
+
+# SMTP reply code of a server closing the session because it is unavailable
+SERVICE_UNAVAILABLE = 421
+
+# Rendered in place of the recipient's name so a digest body can be rendered once for everyone
+RECIPIENT_NAME_PLACEHOLDER = "__digest_recipient_name__"
+
+
+class _RecipientPlaceholder:
+    first_name = RECIPIENT_NAME_PLACEHOLDER
+    username = RECIPIENT_NAME_PLACEHOLDER
+
 
 class MailService:
     def __init__(self, from_email=None):
@@ -16,27 +44,152 @@ class MailService:
             self.mail.from_email = from_email
         else:
             self.mail.from_email = settings.DEFAULT_FROM_EMAIL
+        self.connection = None
+        self._connection_open = False
+        self.batch_size = settings.EMAIL_BATCH_SIZE
+        self.reconnect_attempts = settings.EMAIL_RECONNECT_ATTEMPTS
+        self._sent_on_connection = 0
+
+    @contextmanager
+    def batch(self, batch_size: Optional[int] = None, reconnect_attempts: Optional[int] = None):
+        """
+        Send every email of the block over one long-lived connection instead of one connection per email
+
+        The connection is recycled every batch_size messages (SMTP servers cap messages per session)
+        and reopened when it drops. Nested calls reuse the outer batch.
+
+        :param batch_size: Messages per connection, defaults to settings.EMAIL_BATCH_SIZE
+        :param reconnect_attempts: Reconnections per message, defaults to settings.EMAIL_RECONNECT_ATTEMPTS
+        """
+        if self.connection is not None:
+            yield self
+            return
+
+        self.batch_size = batch_size or settings.EMAIL_BATCH_SIZE
+        if reconnect_attempts is not None:
+            self.reconnect_attempts = reconnect_attempts
+        self.connection = get_connection()
+        self._connection_open = False
+        try:
+            yield self
+        finally:
+            connection, self.connection = self.connection, None
+            self.batch_size = settings.EMAIL_BATCH_SIZE
+            self.reconnect_attempts = settings.EMAIL_RECONNECT_ATTEMPTS
+            if self._connection_open:
+                self._connection_open = False
+                try:
+                    connection.close()
+                except Exception:
+                    logger.exception("Error closing the email connection")
+
+    def _open_connection(self):
+        """
+        Open the batch connection, closing the previous session first (recycling or after an error)
+        """
+        try:
+            self.connection.close()
+        except Exception:
+            pass
+        self._connection_open = False
+        self.connection.open()
+        self._connection_open = True
+        self._sent_on_connection = 0
+
+    def _render(self, notification_type: str, template_name: str, context: dict) -> str:
+        with metrics.notification_render_seconds.labels(
+            type=notification_type, channel=metrics.CHANNEL_EMAIL
+        ).time():
+            return render_to_string(template_name, context=context)
+
+    def _send(self, notification_type: str = metrics.OTHER):
+        """
+        Send the current message, unless the SMTP circuit breaker is open
+        :param notification_type: Label of the notification in the metrics, see services.metrics
+        :raise CircuitOpenError: when the SMTP server has been failing, the message should be retried later
+        """
+        breaker = get_circuit_breaker(SMTP_CIRCUIT)
+        try:
+            breaker.before_call()
+        except CircuitOpenError:
+            metrics.record_notification(notification_type, metrics.CHANNEL_EMAIL, metrics.OUTCOME_DEFERRED)
+            raise
+
+        started = time.perf_counter()
+        try:
+            sent = self._send_message()
+        except RECONNECT_ERRORS:
+            # Connection errors and timeouts: the server is down or unreachable
+            breaker.record_failure()
+            metrics.record_provider_call(notification_type, metrics.CHANNEL_EMAIL, started, metrics.OUTCOME_FAILED)
+            raise
+        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused) as e:
+            # The server answered: only this message failed (refused sender or recipients, rejected data...),
+            # unless the server says it is unavailable
+            if getattr(e, 'smtp_code', None) == SERVICE_UNAVAILABLE:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            metrics.record_provider_call(notification_type, metrics.CHANNEL_EMAIL, started, metrics.OUTCOME_FAILED)
+            raise
+        except Exception:
+            metrics.record_provider_call(notification_type, metrics.CHANNEL_EMAIL, started, metrics.OUTCOME_FAILED)
+            raise
+        breaker.record_success()
+        metrics.record_provider_call(notification_type, metrics.CHANNEL_EMAIL, started, metrics.OUTCOME_SENT)
+        return sent
+
+    def _send_message(self):
+        """
+        Send the current message, through the batch connection when one is open
+        """
+        if self.connection is None:
+            return self.mail.send()
+
+        for attempt in range(self.reconnect_attempts + 1):
+            try:
+                if not self._connection_open or self._sent_on_connection >= self.batch_size:
+                    self._open_connection()
+                sent = self.connection.send_messages([self.mail])
+                self._sent_on_connection += 1
+                return sent
+            except RECONNECT_ERRORS:
+                self._connection_open = False
+                if attempt == self.reconnect_attempts:
+                    raise
+                logger.warning("Email connection lost, reconnecting (attempt %s)", attempt + 1)
 
     def send_mail(self, subject, message, to, attashment=None, context=None):
         self.mail.subject = subject
         if message.endswith('.html'):
-            self.mail.body = render_to_string(message, context=context)
+            self.mail.body = self._render(metrics.OTHER, message, context=context)
             self.mail.content_subtype = 'html'
         else:
             self.mail.body = message
         self.mail.to = to
         if attashment:
             self.mail.attach(attashment.name, attashment.read(), attashment.content_type)
-        self.mail.send()
+        self._send(metrics.OTHER)
+
+    def _attach_calendar(self, event, calendar: Optional[Tuple[str, bytes]] = None):
+        """
+        Attach the event's .ics file, replacing the one attached for the previous recipient
+
+        :param event: The event
+        :param calendar: A (filename, content) tuple computed once for a whole fan-out, see Event.get_calendar_ics
+        """
+        filename, ics_content = calendar or event.get_calendar_ics()
+        self.mail.attachments = []
+        self.mail.attach(filename, ics_content, 'text/calendar')
 
     def send_otp(self, reciever):
         self.mail.subject = "OTP Code"
         otp = generate_otp()
         reciever.otp_codes.create(otp_code=otp, expires_at=now() + timedelta(minutes=10))
-        self.mail.body = render_to_string("mails/otp.html", context={"otp": otp})
+        self.mail.body = self._render(metrics.OTP, "mails/otp.html", context={"otp": otp})
         self.mail.content_subtype = 'html'
         self.mail.to = [reciever.email]
-        self.mail.send()
+        self._send(metrics.OTP)
 
     def verify_otp(self, reciever, otp_code):
         otp = reciever.otp_codes.filter(otp_code=otp_code).first()
@@ -48,28 +201,29 @@ class MailService:
     def send_welcome_email(self, user, site_url: str = "https://djangocameroon.org"):
         """Send welcome email to new user"""
         self.mail.subject = "Welcome to Django Cameroon!"
-        self.mail.body = render_to_string("mails/welcome.html", context={
+        self.mail.body = self._render(metrics.WELCOME, "mails/welcome.html", context={
             "user": user,
             "site_url": site_url
         })
         self.mail.content_subtype = 'html'
         self.mail.to = [user.email]
-        self.mail.send()
+        self._send(metrics.WELCOME)
 
     def send_signup_confirmation_email(self, user, site_url: str = "https://djangocameroon.org"):
         """Send signup/registration confirmation email to new user."""
         self.mail.subject = "Your Django Cameroon account is ready"
-        self.mail.body = render_to_string("mails/signup_confirmation.html", context={
+        self.mail.body = self._render(metrics.SIGNUP, "mails/signup_confirmation.html", context={
             "user": user,
             "site_url": site_url
         })
         self.mail.content_subtype = 'html'
         self.mail.to = [user.email]
-        self.mail.send()
+        self._send(metrics.SIGNUP)
 
-    def send_event_notification(self, user, event, site_url: str = "https://djangocameroon.org"):
+    def send_event_notification(self, user, event, site_url: str = "https://djangocameroon.org",
+                                calendar: Optional[Tuple[str, bytes]] = None):
         self.mail.subject = f"New Event: {event.title}"
-        self.mail.body = render_to_string("mails/event_notification.html", context={
+        self.mail.body = self._render(metrics.NEW_EVENT, "mails/event_notification.html", context={
             "user": user,
             "event": event,
             "site_url": site_url
@@ -77,17 +231,16 @@ class MailService:
         self.mail.content_subtype = 'html'
         self.mail.to = [user.email]
 
-        filename, ics_content = event.get_calendar_ics()
-        self.mail.attach(filename, ics_content, 'text/calendar')
+        self._attach_calendar(event, calendar)
 
-        self.mail.send()
+        self._send(metrics.NEW_EVENT)
 
     def send_event_cancelled(self, user, event, cancellation_reason: Optional[str] = None,
                             reschedule_info: Optional[str] = None,
                             site_url: str = "https://djangocameroon.org"):
         """Send notification about event cancellation"""
         self.mail.subject = f"Event Cancelled: {event.title}"
-        self.mail.body = render_to_string("mails/event_cancelled.html", context={
+        self.mail.body = self._render(metrics.CANCELLATION, "mails/event_cancelled.html", context={
             "user": user,
             "event": event,
             "cancellation_reason": cancellation_reason,
@@ -96,11 +249,12 @@ class MailService:
         })
         self.mail.content_subtype = 'html'
         self.mail.to = [user.email]
-        self.mail.send()
+        self._send(metrics.CANCELLATION)
 
-    def send_event_reminder(self, user, event, site_url: str = "https://djangocameroon.org"):
+    def send_event_reminder(self, user, event, site_url: str = "https://djangocameroon.org",
+                            calendar: Optional[Tuple[str, bytes]] = None):
         self.mail.subject = f"Reminder: {event.title}"
-        self.mail.body = render_to_string("mails/event_reminder.html", context={
+        self.mail.body = self._render(metrics.REMINDER, "mails/event_reminder.html", context={
             "user": user,
             "event": event,
             "site_url": site_url
@@ -108,27 +262,42 @@ class MailService:
         self.mail.content_subtype = 'html'
         self.mail.to = [user.email]
 
-        filename, ics_content = event.get_calendar_ics()
-        self.mail.attach(filename, ics_content, 'text/calendar')
+        self._attach_calendar(event, calendar)
 
-        self.mail.send()
+        self._send(metrics.REMINDER)
 
-    def send_upcoming_events(self, user, events: List, site_url: str = "https://djangocameroon.org"):
-        """Send digest of upcoming events"""
-        self.mail.subject = "Upcoming Events This Month - Django Cameroon"
-        self.mail.body = render_to_string("mails/upcoming_events.html", context={
-            "user": user,
+    def render_upcoming_events(self, events: List, site_url: str = "https://djangocameroon.org") -> str:
+        """
+        Render the digest body once for every recipient, the greeting holds RECIPIENT_NAME_PLACEHOLDER
+
+        :param events: The events of the digest
+        :param site_url: The site url used in links
+        :return: The body to pass to send_upcoming_events
+        """
+        return self._render(metrics.DIGEST, "mails/upcoming_events.html", context={
+            "user": _RecipientPlaceholder(),
             "events": events,
             "site_url": site_url
         })
+
+    def send_upcoming_events(self, user, events: List, site_url: str = "https://djangocameroon.org",
+                             rendered_body: Optional[str] = None):
+        """Send digest of upcoming events, rendered_body comes from render_upcoming_events"""
+        if rendered_body is None:
+            rendered_body = self.render_upcoming_events(events, site_url)
+        self.mail.subject = "Upcoming Events This Month - Django Cameroon"
+        self.mail.body = rendered_body.replace(
+            RECIPIENT_NAME_PLACEHOLDER, conditional_escape(user.first_name or user.username)
+        )
         self.mail.content_subtype = 'html'
         self.mail.to = [user.email]
-        self.mail.send()
+        self._send(metrics.DIGEST)
 
     def send_registration_confirmation(self, user, event, registration,
-                                      site_url: str = "https://djangocameroon.org"):
+                                       site_url: str = "https://djangocameroon.org",
+                                       calendar: Optional[Tuple[str, bytes]] = None):
         self.mail.subject = f"Registration Confirmed: {event.title}"
-        self.mail.body = render_to_string("mails/registration_confirmation.html", context={
+        self.mail.body = self._render(metrics.REGISTRATION, "mails/registration_confirmation.html", context={
             "user": user,
             "event": event,
             "registration": registration,
@@ -137,16 +306,15 @@ class MailService:
         self.mail.content_subtype = 'html'
         self.mail.to = [user.email]
 
-        filename, ics_content = event.get_calendar_ics()
-        self.mail.attach(filename, ics_content, 'text/calendar')
+        self._attach_calendar(event, calendar)
 
-        self.mail.send()
+        self._send(metrics.REGISTRATION)
 
     def send_new_location_login_alert(self, user, login_info: dict,
                                      site_url: str = "https://djangocameroon.org"):
         """Send security alert for new location login"""
         self.mail.subject = "Security Alert: New Login Detected"
-        self.mail.body = render_to_string("mails/new_location_login.html", context={
+        self.mail.body = self._render(metrics.LOGIN_ALERT, "mails/new_location_login.html", context={
             "user": user,
             "login_time": login_info.get('login_time'),
             "ip_address": login_info.get('ip_address'),
@@ -157,4 +325,4 @@ class MailService:
         })
         self.mail.content_subtype = 'html'
         self.mail.to = [user.email]
-        self.mail.send()
+        self._send(metrics.LOGIN_ALERT)
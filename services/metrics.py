@@ -0,0 +1,166 @@
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from celery import current_task
+from django.conf import settings
+from django_prometheus.conf import NAMESPACE
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram, multiprocess, start_http_server
+
+logger = logging.getLogger(__name__)
+
+# Notification types
+WELCOME = "welcome"
+SIGNUP = "signup"
+OTP = "otp"
+NEW_EVENT = "new_event"
+REMINDER = "reminder"
+DIGEST = "digest"
+CANCELLATION = "cancellation"
+REGISTRATION = "registration"
+LOGIN_ALERT = "login_alert"
+OTHER = "other"
+
+CHANNEL_EMAIL = "email"
+CHANNEL_SMS = "sms"
+
+OUTCOME_SENT = "sent"
+# The provider refused or failed the message
+OUTCOME_FAILED = "failed"
+# Not attempted because of a rate limit or an open circuit breaker, the message is retried later
+OUTCOME_DEFERRED = "deferred"
+# Not attempted because the channel is not configured
+OUTCOME_SKIPPED = "skipped"
+
+# Task message header holding the time the notification was requested, see stamp_enqueued_at
+ENQUEUED_AT_HEADER = "enqueued_at"
+
+notifications_total = Counter(
+    "notifications_total",
+    "Notifications handed to a provider, or given up on before, by outcome",
+    ["type", "channel", "outcome"],
+    namespace=NAMESPACE,
+)
+notification_render_seconds = Histogram(
+    "notification_render_seconds",
+    "Time spent rendering a notification template",
+    ["type", "channel"],
+    namespace=NAMESPACE,
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+notification_provider_seconds = Histogram(
+    "notification_provider_seconds",
+    "Duration of the SMTP or Twilio call sending a notification",
+    ["type", "channel"],
+    namespace=NAMESPACE,
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+notification_end_to_end_seconds = Histogram(
+    "notification_end_to_end_seconds",
+    "Time from the request of a notification to its acceptance by the provider",
+    ["type", "channel"],
+    namespace=NAMESPACE,
+    buckets=(0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600),
+)
+
+_enqueued_at: ContextVar[Optional[float]] = ContextVar("notification_enqueued_at", default=None)
+
+
+@contextmanager
+def enqueued_since(timestamp: float):
+    """
+    Measure the end-to-end latency of the notifications sent in the block from timestamp
+    :param timestamp: Unix time the notification was requested at, e.g. the creation of its outbox row
+    """
+    token = _enqueued_at.set(timestamp)
+    try:
+        yield
+    finally:
+        _enqueued_at.reset(token)
+
+
+def get_enqueued_at() -> Optional[float]:
+    """
+    Get the time the notification being sent was requested at
+    :return: The enqueued_since timestamp, else the enqueue time of the current task, else None
+    """
+    enqueued_at = _enqueued_at.get()
+    if enqueued_at is None and current_task:
+        enqueued_at = getattr(current_task.request, ENQUEUED_AT_HEADER, None)
+    return enqueued_at
+
+
+def stamp_enqueued_at(headers: dict):
+    """
+    Stamp a task message with the time its notification was requested, connected to before_task_publish.
+    A task published by another task (fan-out chunks, outbox dispatch) inherits the time of its parent,
+    so that the end-to-end latency covers the whole chain
+    :param headers: Headers of the message being published
+    """
+    if headers is not None and ENQUEUED_AT_HEADER not in headers:
+        headers[ENQUEUED_AT_HEADER] = get_enqueued_at() or time.time()
+
+
+def record_notification(notification_type: str, channel: str, outcome: str, enqueued_at: Optional[float] = None):
+    """
+    Count a notification, and observe its end-to-end latency when it was sent
+    :param enqueued_at: Time it was requested at, from get_enqueued_at by default
+    """
+    notifications_total.labels(type=notification_type, channel=channel, outcome=outcome).inc()
+    if outcome != OUTCOME_SENT:
+        return
+    enqueued_at = enqueued_at or get_enqueued_at()
+    if enqueued_at:
+        notification_end_to_end_seconds.labels(type=notification_type, channel=channel).observe(
+            max(0.0, time.time() - enqueued_at)
+        )
+
+
+def record_provider_call(notification_type: str, channel: str, started: float, outcome: str,
+                         enqueued_at: Optional[float] = None):
+    """
+    Observe a provider call and count its notification
+    :param started: time.perf_counter() before the call
+    """
+    notification_provider_seconds.labels(type=notification_type, channel=channel).observe(
+        time.perf_counter() - started
+    )
+    record_notification(notification_type, channel, outcome, enqueued_at)
+
+
+def start_worker_exporter(port: Optional[int] = None):
+    """
+    Serve the metrics of a Celery worker over HTTP for the celery scrape job of monitoring/prometheus.yml
+
+    The prefork pool sends the notifications from child processes: with PROMETHEUS_MULTIPROC_DIR set
+    to an empty directory before the worker starts (entrypoint.sh does it), every process writes its
+    metrics there and the exporter aggregates them.
+    :param port: Defaults to settings.WORKER_METRICS_PORT, 0 disables the exporter
+    """
+    port = settings.WORKER_METRICS_PORT if port is None else port
+    if not port:
+        return
+
+    multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        logger.warning("PROMETHEUS_MULTIPROC_DIR is not set, the metrics of the pool processes are not exported")
+        registry = REGISTRY
+
+    try:
+        start_http_server(port, registry=registry)
+    except OSError:
+        logger.exception("Could not serve the worker metrics on port %s", port)
+        return
+    logger.info("Serving the worker metrics on port %s", port)
+
+
+def mark_process_dead(pid: int):
+    """Drop the live gauges of a pool process that exited, connected to worker_process_shutdown"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
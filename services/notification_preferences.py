@@ -1,4 +1,25 @@
-from dataclasses import dataclass
+import threading
+import time
+from dataclasses import asdict, dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django_prometheus.conf import NAMESPACE
+from prometheus_client import Counter
+
+CACHE_KEY = "notification-preferences:v1"
+
+notification_preferences_lookups_total = Counter(
+    "notification_preferences_lookups_total",
+    "Notification preferences lookups by the layer that answered, local and cache lookups avoided a query",
+    ["source"],
+    namespace=NAMESPACE,
+)
+
+_local_lock = threading.Lock()
+_local_snapshot = None
+_local_expires_at = 0.0
 
 
 @dataclass(frozen=True)
@@ -21,8 +42,8 @@ class NotificationPreferences:
     send_new_location_login_sms: bool
 
 
-def get_notification_preferences() -> NotificationPreferences:
-    base = NotificationPreferences(
+def _default_notification_preferences() -> NotificationPreferences:
+    return NotificationPreferences(
         send_welcome_email=True,
         send_welcome_sms=False,
         send_signup_email=False,
@@ -41,13 +62,21 @@ def get_notification_preferences() -> NotificationPreferences:
         send_new_location_login_sms=True,
     )
 
+
+def _load_notification_preferences():
+    """
+    Read the preferences from the database
+    :return: the preferences, and whether they may be cached (not a fallback after a database error)
+    """
+    base = _default_notification_preferences()
+
     try:
         from django.db.utils import OperationalError, ProgrammingError
         from apps.users.models import NotificationSettings
 
         obj = NotificationSettings.get_solo()
         if not obj:
-            return base
+            return base, True
 
         return NotificationPreferences(
             send_welcome_email=obj.send_welcome_email,
@@ -66,8 +95,73 @@ def get_notification_preferences() -> NotificationPreferences:
             send_registration_confirmation_sms=obj.send_registration_confirmation_sms,
             send_new_location_login_email=obj.send_new_location_login_email,
             send_new_location_login_sms=obj.send_new_location_login_sms,
-        )
+        ), True
     except (OperationalError, ProgrammingError):
-        return base
+        return base, False
+    except Exception:
+        return base, False
+
+
+def _set_local_snapshot(preferences: NotificationPreferences):
+    global _local_snapshot, _local_expires_at
+    with _local_lock:
+        _local_snapshot = preferences
+        _local_expires_at = time.monotonic() + settings.NOTIFICATION_PREFERENCES_LOCAL_TTL
+
+
+def get_notification_preferences() -> NotificationPreferences:
+    """
+    Get the notification preferences, from the process snapshot, then the shared cache, then the database.
+    A save of NotificationSettings drops the shared entry, other processes pick it up
+    once their snapshot expires (NOTIFICATION_PREFERENCES_LOCAL_TTL)
+    :return: NotificationPreferences
+    """
+    with _local_lock:
+        if _local_snapshot is not None and time.monotonic() < _local_expires_at:
+            notification_preferences_lookups_total.labels(source="local").inc()
+            return _local_snapshot
+
+    try:
+        cached = cache.get(CACHE_KEY)
     except Exception:
-        return base
\ No newline at end of file
+        cached = None
+    if cached is not None:
+        try:
+            preferences = NotificationPreferences(**cached)
+        except TypeError:
+            # Written by a release with other fields, reload it
+            preferences = None
+        if preferences is not None:
+            notification_preferences_lookups_total.labels(source="cache").inc()
+            _set_local_snapshot(preferences)
+            return preferences
+
+    notification_preferences_lookups_total.labels(source="database").inc()
+    preferences, cacheable = _load_notification_preferences()
+    if cacheable:
+        try:
+            cache.set(CACHE_KEY, asdict(preferences), settings.NOTIFICATION_PREFERENCES_CACHE_TIMEOUT)
+        except Exception:
+            pass
+        _set_local_snapshot(preferences)
+    return preferences
+
+
+def invalidate_notification_preferences():
+    """
+    Drop the cached preferences of this process and the shared cache
+    """
+    global _local_snapshot
+    with _local_lock:
+        _local_snapshot = None
+    try:
+        cache.delete(CACHE_KEY)
+    except Exception:
+        pass
+
+
+def invalidate_notification_preferences_on_commit():
+    """
+    Invalidate once the current transaction commits, so a concurrent read cannot cache the old row again
+    """
+    transaction.on_commit(invalidate_notification_preferences)
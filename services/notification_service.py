@@ -1,6 +1,9 @@
 import logging
-from typing import List, Optional
+import uuid
+from typing import Callable, Dict, List, Optional, Set, Tuple
 from django.utils.timezone import now
+from services import metrics
+from services.circuit_breaker import CircuitOpenError
 from services.mail_service import MailService
 from services.sms_service import SMSService
 
@@ -13,48 +16,125 @@ class NotificationService:
     Unified notification service for sending both email and SMS notifications
     """
 
-    def __init__(self, site_url: str = "https://djangocameroon.org"):
-        self.mail_service = MailService()
-        self.sms_service = SMSService()
+    def __init__(self, site_url: str = "https://djangocameroon.org", mail_service: Optional[MailService] = None,
+                 sms_service: Optional[SMSService] = None):
+        self.mail_service = mail_service or MailService()
+        self.sms_service = sms_service or SMSService()
         self.site_url = site_url
 
-    def send_welcome_notification(self, user, send_sms: bool = False, send_email: bool = True):
+    def _send_emails_to_users(self, users: List, send: Callable, description: str) -> Tuple[Set, Set]:
         """
-        Send welcome notification to new user
+        Send an email to every user on one SMTP connection
 
         Args:
-            user: User object
-            send_sms: Whether to send SMS notification (requires phone_number on user)
+            users: List of User objects
+            send: Called with each user, sends its email
+            description: What the email is, for the logs
+
+        Returns:
+            tuple: (failed, deferred) user ids, deferred the users the email was not sent to because
+            the SMTP circuit breaker is open, to retry later
         """
-        if send_email:
-            try:
-                self.mail_service.send_welcome_email(user, self.site_url)
-            except Exception:
-                logger.exception("Error sending welcome email to %s", getattr(user, 'email', None))
+        failed_ids, deferred_ids = set(), set()
+        with self.mail_service.batch():
+            for user in users:
+                try:
+                    send(user)
+                except CircuitOpenError:
+                    deferred_ids.add(user.pk)
+                except Exception:
+                    failed_ids.add(user.pk)
+                    logger.exception("Error sending %s email to %s", description, getattr(user, 'email', None))
+        return failed_ids, deferred_ids
 
-        if send_sms and hasattr(user, 'phone_number') and user.phone_number:
-            try:
-                user_name = user.first_name or user.username
-                self.sms_service.send_welcome_sms(user.phone_number, user_name)
-            except Exception as e:
-                logger.exception("Error sending welcome SMS to %s", getattr(user, 'phone_number', None))
+    def _send_sms_to_users(self, users: List, message: str, notification_type: str) -> Tuple[Set, Set]:
+        """
+        Send the same SMS to every user with a phone number, concurrently
 
-    def send_signup_registration_notification(self, user, send_sms: bool = False, send_email: bool = True):
-        """Send signup/registration confirmation (email + optional SMS)."""
-        if send_email:
-            try:
-                self.mail_service.send_signup_confirmation_email(user, self.site_url)
-            except Exception:
-                logger.exception("Error sending signup confirmation email to %s", getattr(user, 'email', None))
+        Args:
+            users: List of User objects
+            message: The SMS
+            notification_type: What the SMS is, for the logs and the metrics, see services.metrics
 
-        if send_sms and hasattr(user, 'phone_number') and user.phone_number:
-            try:
-                user_name = user.first_name or user.username
-                self.sms_service.send_signup_confirmation_sms(user.phone_number, user_name)
-            except Exception:
-                logger.exception("Error sending signup confirmation SMS to %s", getattr(user, 'phone_number', None))
+        Returns:
+            tuple: (failed, deferred) user ids, deferred the users the SMS was not sent to because of
+            the rate limit or the Twilio circuit breaker, to retry later
+        """
+        recipients = [user for user in users if getattr(user, 'phone_number', None)]
+        results = self.sms_service.send_bulk(
+            [(user.phone_number, message) for user in recipients], notification_type=notification_type
+        )
+
+        failed_ids, deferred_ids = set(), set()
+        for user, result in zip(recipients, results):
+            if result.get('success'):
+                continue
+            if result.get('retry_after'):
+                deferred_ids.add(user.pk)
+                continue
+            failed_ids.add(user.pk)
+            logger.error(
+                "Error sending %s SMS to %s: %s", notification_type, user.phone_number, result.get('error')
+            )
+        return failed_ids, deferred_ids
+
+    @staticmethod
+    def _queue_retries(notification_type: str, users: List, deferred: Dict[str, Set], object_id,
+                       payload: Optional[dict] = None) -> Set:
+        """
+        Queue the deferred notifications of a fan-out in the outbox, its dispatcher retries them
 
-    def send_event_notification(self, users: List, event, send_sms: bool = False, send_email: bool = True):
+        Args:
+            notification_type: One of the NotificationOutbox.TYPE_* values
+            users: The users of the fan-out
+            deferred: Ids of the deferred users per NotificationOutbox.CHANNEL_* value
+            object_id: Id of the object the notification is about
+            payload: JSON serializable data needed to deliver it
+
+        Returns:
+            set: Ids of the users with a notification queued
+        """
+        from services.outbox_service import OutboxService
+
+        deliveries = [
+            (user, channel) for channel, user_ids in deferred.items() for user in users if user.pk in user_ids
+        ]
+        if deliveries:
+            OutboxService.enqueue_many(notification_type, deliveries, object_id, payload)
+            logger.info("Queued %s deferred %s notifications for a retry", len(deliveries), notification_type)
+        return {user.pk for user, _ in deliveries}
+
+    def render_event_notification_sms(self, event) -> str:
+        """Render the new event SMS, the same for every recipient"""
+        return self.sms_service.render_event_notification_sms(
+            event.title,
+            event.date.strftime("%b %d, %Y at %I:%M %p"),
+            f"{event.location.name}, {event.location.city.name}",
+            event_url=f"{self.site_url.rstrip('/')}/events/{event.slug}",
+        )
+
+    def render_event_cancelled_sms(self, event) -> str:
+        """Render the event cancellation SMS, the same for every recipient"""
+        return self.sms_service.render_event_cancelled_sms(
+            event.title,
+            event.date.strftime("%b %d, %Y"),
+            event_url=f"{self.site_url.rstrip('/')}/events/{event.slug}",
+        )
+
+    def render_event_reminder_sms(self, event) -> str:
+        """Render the event reminder SMS, the same for every recipient"""
+        time_diff = event.date - now()
+        hours_until = int(time_diff.total_seconds() / 3600)
+        return self.sms_service.render_event_reminder_sms(
+            event.title,
+            event.date.strftime("%b %d, %Y at %I:%M %p"),
+            hours_until,
+            event_url=f"{self.site_url.rstrip('/')}/events/{event.slug}",
+        )
+
+    def send_event_notification(
+        self, users: List, event, send_sms: bool = False, send_email: bool = True
+    ) -> Tuple[int, int, Set]:
         """
         Send event notification to multiple users
 
@@ -62,36 +142,43 @@ class NotificationService:
             users: List of User objects
             event: Event object
             send_sms: Whether to send SMS notifications
+
+        Returns:
+            tuple: (sent, failed, deferred), sent and failed user counts (a user failed if any of its
+            notifications failed), deferred the ids of the users with a notification queued in the
+            outbox for a retry, counted as sent
         """
-        for user in users:
-            if send_email:
-                try:
-                    self.mail_service.send_event_notification(user, event, self.site_url)
-                except Exception:
-                    logger.exception("Error sending event notification email to %s", getattr(user, 'email', None))
+        from apps.users.models import NotificationOutbox
 
-            if send_sms and hasattr(user, 'phone_number') and user.phone_number:
-                try:
-                    event_date = event.date.strftime("%b %d, %Y at %I:%M %p")
-                    event_location = f"{event.location.name}, {event.location.city.name}"
-                    event_url = f"{self.site_url.rstrip('/')}/events/{event.slug}"
-                    self.sms_service.send_event_notification_sms(
-                        user.phone_number,
-                        event.title,
-                        event_date,
-                        event_location,
-                        event_url=event_url,
-                    )
-                except Exception as e:
-                    logger.exception("Error sending event notification SMS to %s", getattr(user, 'phone_number', None))
+        users = list(users)
+        failed_ids = set()
+        deferred = {}
+        if send_email:
+            calendar = event.get_calendar_ics()
+            failed_ids, deferred[NotificationOutbox.CHANNEL_EMAIL] = self._send_emails_to_users(
+                users,
+                lambda user: self.mail_service.send_event_notification(user, event, self.site_url, calendar=calendar),
+                "event notification",
+            )
+
+        if send_sms:
+            failed, deferred[NotificationOutbox.CHANNEL_SMS] = self._send_sms_to_users(
+                users, self.render_event_notification_sms(event), metrics.NEW_EVENT
+            )
+            failed_ids |= failed
+
+        deferred_ids = self._queue_retries(
+            NotificationOutbox.TYPE_NEW_EVENT, users, deferred, event.pk
+        ) - failed_ids
+        return len(users) - len(failed_ids), len(failed_ids), deferred_ids
 
     def send_event_cancelled_notification(
-            self, users: List, event,
-            cancellation_reason: Optional[str] = None,
-            reschedule_info: Optional[str] = None,
-            send_sms: bool = True,
-            send_email: bool = True
-        ):
+        self, users: List, event,
+        cancellation_reason: Optional[str] = None,
+        reschedule_info: Optional[str] = None,
+        send_sms: bool = True,
+        send_email: bool = True
+    ) -> Tuple[int, int, Set]:
         """
         Send event cancellation notification
 
@@ -101,30 +188,39 @@ class NotificationService:
             cancellation_reason: Reason for cancellation
             reschedule_info: Information about rescheduling
             send_sms: Whether to send SMS notifications (default True for cancellations)
+
+        Returns:
+            tuple: (sent, failed, deferred), see send_event_notification
         """
-        for user in users:
-            if send_email:
-                try:
-                    self.mail_service.send_event_cancelled(
-                        user, event, cancellation_reason, reschedule_info, self.site_url
-                    )
-                except Exception:
-                    logger.exception("Error sending cancellation email to %s", getattr(user, 'email', None))
+        from apps.users.models import NotificationOutbox
 
-            if send_sms and hasattr(user, 'phone_number') and user.phone_number:
-                try:
-                    event_date = event.date.strftime("%b %d, %Y")
-                    event_url = f"{self.site_url.rstrip('/')}/events/{event.slug}"
-                    self.sms_service.send_event_cancelled_sms(
-                        user.phone_number,
-                        event.title,
-                        event_date,
-                        event_url=event_url,
-                    )
-                except Exception as e:
-                    logger.exception("Error sending cancellation SMS to %s", getattr(user, 'phone_number', None))
-
-    def send_event_reminder(self, users: List, event, send_sms: bool = True, send_email: bool = True):
+        users = list(users)
+        failed_ids = set()
+        deferred = {}
+        if send_email:
+            failed_ids, deferred[NotificationOutbox.CHANNEL_EMAIL] = self._send_emails_to_users(
+                users,
+                lambda user: self.mail_service.send_event_cancelled(
+                    user, event, cancellation_reason, reschedule_info, self.site_url
+                ),
+                "cancellation",
+            )
+
+        if send_sms:
+            failed, deferred[NotificationOutbox.CHANNEL_SMS] = self._send_sms_to_users(
+                users, self.render_event_cancelled_sms(event), metrics.CANCELLATION
+            )
+            failed_ids |= failed
+
+        deferred_ids = self._queue_retries(
+            NotificationOutbox.TYPE_EVENT_CANCELLED, users, deferred, event.pk,
+            payload={'cancellation_reason': cancellation_reason, 'reschedule_info': reschedule_info},
+        ) - failed_ids
+        return len(users) - len(failed_ids), len(failed_ids), deferred_ids
+
+    def send_event_reminder(
+        self, users: List, event, send_sms: bool = True, send_email: bool = True
+    ) -> Tuple[int, int, Set]:
         """
         Send event reminder to registered users
 
@@ -132,31 +228,67 @@ class NotificationService:
             users: List of registered users
             event: Event object
             send_sms: Whether to send SMS reminders (default True)
+
+        Returns:
+            tuple: (sent, failed, deferred), see send_event_notification
         """
-        time_diff = event.date - now()
-        hours_until = int(time_diff.total_seconds() / 3600)
+        from apps.users.models import NotificationOutbox
 
-        for user in users:
-            if send_email:
-                try:
-                    self.mail_service.send_event_reminder(user, event, self.site_url)
-                except Exception:
-                    logger.exception("Error sending reminder email to %s", getattr(user, 'email', None))
-            if send_sms and hasattr(user, 'phone_number') and user.phone_number:
-                try:
-                    event_date = event.date.strftime("%b %d, %Y at %I:%M %p")
-                    event_url = f"{self.site_url.rstrip('/')}/events/{event.slug}"
-                    self.sms_service.send_event_reminder_sms(
-                        user.phone_number,
-                        event.title,
-                        event_date,
-                        hours_until,
-                        event_url=event_url,
-                    )
-                except Exception as e:
-                    logger.exception("Error sending reminder SMS to %s", getattr(user, 'phone_number', None))
-
-    def send_upcoming_events_digest(self, users: List, events: List, send_sms: bool = False, send_email: bool = True):
+        users = list(users)
+        failed_ids = set()
+        deferred = {}
+        if send_email:
+            calendar = event.get_calendar_ics()
+            failed_ids, deferred[NotificationOutbox.CHANNEL_EMAIL] = self._send_emails_to_users(
+                users,
+                lambda user: self.mail_service.send_event_reminder(user, event, self.site_url, calendar=calendar),
+                "reminder",
+            )
+
+        if send_sms:
+            failed, deferred[NotificationOutbox.CHANNEL_SMS] = self._send_sms_to_users(
+                users, self.render_event_reminder_sms(event), metrics.REMINDER
+            )
+            failed_ids |= failed
+
+        deferred_ids = self._queue_retries(
+            NotificationOutbox.TYPE_EVENT_REMINDER, users, deferred, event.pk
+        ) - failed_ids
+        return len(users) - len(failed_ids), len(failed_ids), deferred_ids
+
+    def prepare_upcoming_events_digest(self, events: List, send_sms: bool = False, send_email: bool = True) -> dict:
+        """
+        Render the parts of the digest shared by every recipient, once per campaign
+
+        Args:
+            events: List of Event objects
+            send_sms: Whether the SMS digest will be sent
+            send_email: Whether the email digest will be sent
+
+        Returns:
+            dict: Pass it as `prepared` to send_upcoming_events_digest
+        """
+        event_items = []
+        for ev in events[:3]:
+            when = getattr(ev, 'date', None)
+            when_text = when.strftime("%b %d") if when else "TBA"
+            title = getattr(ev, 'title', 'Event')
+            slug = getattr(ev, 'slug', None)
+            url = f"{self.site_url.rstrip('/')}/events/{slug}" if slug else f"{self.site_url.rstrip('/')}/events"
+            event_items.append({"title": title, "when": when_text, "url": url})
+
+        return {
+            "event_items": event_items,
+            "email_body": self.mail_service.render_upcoming_events(events, self.site_url) if send_email else None,
+            "sms_message": (
+                self.sms_service.render_upcoming_events_digest_sms(event_items, self.site_url) if send_sms else None
+            ),
+        }
+
+    def send_upcoming_events_digest(
+        self, users: List, events: List, send_sms: bool = False, send_email: bool = True,
+        prepared: Optional[dict] = None,
+    ) -> Tuple[int, int, Set]:
         """
         Send digest of upcoming events
 
@@ -164,32 +296,42 @@ class NotificationService:
             users: List of User objects
             events: List of Event objects
             send_sms: Whether to send SMS (default False for digests)
+            prepared: Output of prepare_upcoming_events_digest, rendered here when missing
+
+        Returns:
+            tuple: (sent, failed, deferred), see send_event_notification
         """
-        for user in users:
-            if send_email:
-                try:
-                    self.mail_service.send_upcoming_events(user, events, self.site_url)
-                except Exception:
-                    logger.exception("Error sending events digest email to %s", getattr(user, 'email', None))
+        if prepared is None:
+            prepared = self.prepare_upcoming_events_digest(events, send_sms=send_sms, send_email=send_email)
 
-            if send_sms and hasattr(user, 'phone_number') and user.phone_number:
-                try:
-                    event_items = []
-                    for ev in events[:3]:
-                        when = getattr(ev, 'date', None)
-                        when_text = when.strftime("%b %d") if when else "TBA"
-                        title = getattr(ev, 'title', 'Event')
-                        slug = getattr(ev, 'slug', None)
-                        url = f"{self.site_url.rstrip('/')}/events/{slug}" if slug else f"{self.site_url.rstrip('/')}/events"
-                        event_items.append({"title": title, "when": when_text, "url": url})
-
-                    self.sms_service.send_upcoming_events_digest_sms(
-                        user.phone_number,
-                        event_items=event_items,
-                        site_url=self.site_url,
-                    )
-                except Exception:
-                    logger.exception("Error sending events digest SMS to %s", getattr(user, 'phone_number', None))
+        from apps.users.models import NotificationOutbox
+
+        users = list(users)
+        failed_ids = set()
+        deferred = {}
+        if send_email:
+            failed_ids, deferred[NotificationOutbox.CHANNEL_EMAIL] = self._send_emails_to_users(
+                users,
+                lambda user: self.mail_service.send_upcoming_events(
+                    user, events, self.site_url, rendered_body=prepared["email_body"]
+                ),
+                "events digest",
+            )
+
+        if send_sms:
+            failed, deferred[NotificationOutbox.CHANNEL_SMS] = self._send_sms_to_users(
+                users, prepared["sms_message"], metrics.DIGEST
+            )
+            failed_ids |= failed
+
+        event_ids = sorted(str(event.pk) for event in events)
+        deferred_ids = self._queue_retries(
+            NotificationOutbox.TYPE_UPCOMING_EVENTS_DIGEST, users, deferred,
+            # The same digest is queued once per user, whichever campaign batch defers it
+            uuid.uuid5(uuid.NAMESPACE_URL, ",".join(event_ids)),
+            payload={'event_ids': event_ids},
+        ) - failed_ids
+        return len(users) - len(failed_ids), len(failed_ids), deferred_ids
 
     def send_registration_confirmation(self, user, event, registration, send_sms: bool = True, send_email: bool = True):
         """
@@ -0,0 +1,352 @@
+import logging
+import random
+from datetime import timedelta
+from typing import Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import now
+
+from services import metrics
+from services.circuit_breaker import CircuitOpenError
+from services.mail_service import MailService
+from services.notification_service import NotificationService
+from services.sms_service import SMSService
+
+logger = logging.getLogger(__name__)
+
+
+class UndeliverableNotification(Exception):
+    """The notification can never be delivered, retrying it is pointless"""
+
+
+class RetryLater(Exception):
+    """The provider cannot take the notification now, it should be retried after retry_after seconds"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class OutboxService:
+    """
+    Queue notifications in the outbox and deliver them.
+
+    A notification is queued in the transaction of the change that triggers it, once per channel,
+    and delivered by dispatch(). Each batch is claimed with SELECT ... FOR UPDATE SKIP LOCKED and
+    marked as sending until a lease expires, in a short transaction: the providers are called once
+    it is committed, so several workers can dispatch at the same time without holding row locks
+    during the calls or sending a notification twice. A notification left sending by a dead worker
+    is delivered again once its lease has expired.
+    """
+
+    def __init__(self, site_url: str = "https://djangocameroon.org"):
+        self.mail_service = MailService()
+        self.sms_service = SMSService()
+        self.site_url = site_url
+
+    @property
+    def notification_service(self) -> NotificationService:
+        """Renders the fan-out notifications, with the services of this outbox"""
+        return NotificationService(self.site_url, mail_service=self.mail_service, sms_service=self.sms_service)
+
+    @classmethod
+    def enqueue(cls, notification_type: str, recipient, object_id, channels: Iterable[str],
+                payload: Optional[dict] = None) -> None:
+        """
+        Queue a notification, queuing the same notification again is a no-op
+
+        Args:
+            notification_type: One of the NotificationOutbox.TYPE_* values
+            recipient: User object
+            object_id: Id of the object the notification is about
+            channels: NotificationOutbox.CHANNEL_* values to deliver it on
+            payload: JSON serializable data needed to deliver it
+        """
+        cls.enqueue_many(notification_type, [(recipient, channel) for channel in channels], object_id, payload)
+
+    @staticmethod
+    def enqueue_many(notification_type: str, deliveries: Iterable[Tuple[object, str]], object_id,
+                     payload: Optional[dict] = None) -> None:
+        """
+        Queue the same notification for many recipients in one statement, e.g. the retries of a fan-out
+
+        Args:
+            notification_type: One of the NotificationOutbox.TYPE_* values
+            deliveries: (recipient, channel) pairs, recipient a User object (only its pk is used)
+            object_id: Id of the object the notification is about
+            payload: JSON serializable data needed to deliver it
+        """
+        from apps.users.models import NotificationOutbox
+
+        NotificationOutbox.objects.bulk_create(
+            [
+                NotificationOutbox(
+                    notification_type=notification_type,
+                    channel=channel,
+                    recipient=recipient,
+                    object_id=str(object_id),
+                    payload=payload or {},
+                    idempotency_key=NotificationOutbox.build_idempotency_key(
+                        notification_type, channel, recipient.pk, object_id
+                    ),
+                )
+                for recipient, channel in deliveries
+            ],
+            ignore_conflicts=True,
+        )
+
+    def dispatch(self, batch_size: Optional[int] = None,
+                 notification_types: Optional[Iterable[str]] = None) -> Tuple[int, int]:
+        """
+        Deliver one batch of due notifications
+
+        Args:
+            batch_size: Maximum number of notifications to claim, NOTIFICATION_OUTBOX_BATCH_SIZE by default
+            notification_types: Only deliver these NotificationOutbox.TYPE_* values, all of them by default
+
+        Returns:
+            tuple: (claimed, sent) notification counts
+        """
+        from apps.users.models import NotificationOutbox
+
+        batch_size = batch_size or settings.NOTIFICATION_OUTBOX_BATCH_SIZE
+        due = NotificationOutbox.objects.filter(
+            Q(status=NotificationOutbox.STATUS_PENDING, next_attempt_at__lte=now())
+            | Q(status=NotificationOutbox.STATUS_SENDING, locked_until__lte=now())
+        )
+        if notification_types is not None:
+            due = due.filter(notification_type__in=list(notification_types))
+        with transaction.atomic():
+            messages = list(
+                due
+                .select_for_update(skip_locked=True, of=('self',))
+                .select_related('recipient')
+                .order_by('next_attempt_at')[:batch_size]
+            )
+            if not messages:
+                return 0, 0
+
+            locked_until = now() + timedelta(seconds=settings.NOTIFICATION_OUTBOX_LEASE)
+            NotificationOutbox.objects.filter(pk__in=[message.pk for message in messages]).update(
+                status=NotificationOutbox.STATUS_SENDING, locked_until=locked_until, updated_at=now(),
+            )
+
+        sent = 0
+        with self.mail_service.batch():
+            for message in messages:
+                message.status = NotificationOutbox.STATUS_PENDING
+                try:
+                    with metrics.enqueued_since(message.created_at.timestamp()):
+                        self._deliver(message)
+                except (UndeliverableNotification, ObjectDoesNotExist) as e:
+                    message.status = NotificationOutbox.STATUS_FAILED
+                    message.last_error = str(e) or e.__class__.__name__
+                    logger.warning("Dropping undeliverable notification %s: %s", message.idempotency_key, e)
+                except (RetryLater, CircuitOpenError) as e:
+                    # Rate limit or provider outage, requeue it without using up an attempt
+                    message.last_error = str(e)
+                    message.next_attempt_at = now() + timedelta(seconds=e.retry_after)
+                except Exception as e:
+                    self._schedule_retry(message, e)
+                    logger.exception("Error delivering notification %s", message.idempotency_key)
+                else:
+                    message.status = NotificationOutbox.STATUS_SENT
+                    message.sent_at = now()
+                    message.last_error = ''
+                    sent += 1
+                self._release(message, locked_until)
+        return len(messages), sent
+
+    @staticmethod
+    def _release(message, locked_until):
+        """Record the outcome of a delivery, unless another dispatcher took the notification over"""
+        from apps.users.models import NotificationOutbox
+
+        NotificationOutbox.objects.filter(
+            pk=message.pk, status=NotificationOutbox.STATUS_SENDING, locked_until=locked_until,
+        ).update(
+            status=message.status,
+            attempts=message.attempts,
+            next_attempt_at=message.next_attempt_at,
+            last_error=message.last_error,
+            sent_at=message.sent_at,
+            locked_until=None,
+            updated_at=now(),
+        )
+
+    def _schedule_retry(self, message, error: Exception):
+        from apps.users.models import NotificationOutbox
+
+        message.attempts += 1
+        message.last_error = str(error) or error.__class__.__name__
+        message.updated_at = now()
+        if message.attempts >= settings.NOTIFICATION_OUTBOX_MAX_ATTEMPTS:
+            message.status = NotificationOutbox.STATUS_FAILED
+            return
+
+        # Exponential backoff with jitter, so the messages failed by one outage do not all retry together
+        delay = min(
+            settings.NOTIFICATION_OUTBOX_RETRY_DELAY * 2 ** (message.attempts - 1),
+            settings.NOTIFICATION_OUTBOX_MAX_RETRY_DELAY,
+        )
+        message.next_attempt_at = now() + timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+    def _deliver(self, message):
+        from apps.users.models import NotificationOutbox
+
+        message.updated_at = now()
+        if message.channel == NotificationOutbox.CHANNEL_SMS:
+            if not message.recipient.phone_number:
+                raise UndeliverableNotification("Recipient has no phone number")
+            if not self.sms_service.is_configured():
+                raise UndeliverableNotification("SMS service not configured")
+
+        deliver = {
+            NotificationOutbox.TYPE_REGISTRATION_CONFIRMATION: self._deliver_registration_confirmation,
+            NotificationOutbox.TYPE_NEW_LOCATION_LOGIN: self._deliver_new_location_login,
+            NotificationOutbox.TYPE_NEW_EVENT: self._deliver_new_event,
+            NotificationOutbox.TYPE_EVENT_CANCELLED: self._deliver_event_cancelled,
+            NotificationOutbox.TYPE_EVENT_REMINDER: self._deliver_event_reminder,
+            NotificationOutbox.TYPE_UPCOMING_EVENTS_DIGEST: self._deliver_upcoming_events_digest,
+        }.get(message.notification_type)
+        if deliver is None:
+            raise UndeliverableNotification(f"Unknown notification type {message.notification_type}")
+        deliver(message)
+
+    def _deliver_registration_confirmation(self, message):
+        from apps.events.models import EventRegistration
+        from apps.users.models import NotificationOutbox
+
+        registration = EventRegistration.objects.select_related('event__location__city__region').get(
+            pk=message.object_id
+        )
+        event = registration.event
+        if message.channel == NotificationOutbox.CHANNEL_EMAIL:
+            self.mail_service.send_registration_confirmation(message.recipient, event, registration, self.site_url)
+            return
+
+        result = self.sms_service.send_registration_confirmation_sms(
+            message.recipient.phone_number,
+            event.title,
+            getattr(registration, 'registration_code', None),
+            event_url=f"{self.site_url.rstrip('/')}/events/{event.slug}",
+        )
+        self._raise_for_sms_result(result)
+
+    def _deliver_new_location_login(self, message):
+        from apps.users.models import NotificationOutbox
+
+        login_info = dict(message.payload)
+        login_info['login_time'] = parse_datetime(login_info.get('login_time') or '') or message.created_at
+        if message.channel == NotificationOutbox.CHANNEL_EMAIL:
+            self.mail_service.send_new_location_login_alert(message.recipient, login_info, self.site_url)
+            return
+
+        result = self.sms_service.send_new_location_login_sms(
+            message.recipient.phone_number,
+            login_info.get('location', 'Unknown location'),
+            login_info['login_time'].strftime("%b %d at %I:%M %p"),
+        )
+        self._raise_for_sms_result(result)
+
+    @staticmethod
+    def _get_event(message, upcoming: bool = True):
+        from apps.events.models import Event
+
+        event = Event.objects.select_related('location__city__region').get(pk=message.object_id)
+        if upcoming and event.date <= now():
+            raise UndeliverableNotification("The event has already started")
+        return event
+
+    def _deliver_new_event(self, message):
+        from apps.users.models import NotificationOutbox
+
+        event = self._get_event(message)
+        if message.channel == NotificationOutbox.CHANNEL_EMAIL:
+            self.mail_service.send_event_notification(
+                message.recipient, event, self.site_url, calendar=event.get_calendar_ics()
+            )
+            return
+
+        result = self.sms_service.send_sms(
+            message.recipient.phone_number,
+            self.notification_service.render_event_notification_sms(event),
+            notification_type=metrics.NEW_EVENT,
+        )
+        self._raise_for_sms_result(result)
+
+    def _deliver_event_cancelled(self, message):
+        from apps.users.models import NotificationOutbox
+
+        event = self._get_event(message, upcoming=False)
+        if message.channel == NotificationOutbox.CHANNEL_EMAIL:
+            self.mail_service.send_event_cancelled(
+                message.recipient,
+                event,
+                message.payload.get('cancellation_reason'),
+                message.payload.get('reschedule_info'),
+                self.site_url,
+            )
+            return
+
+        result = self.sms_service.send_sms(
+            message.recipient.phone_number,
+            self.notification_service.render_event_cancelled_sms(event),
+            notification_type=metrics.CANCELLATION,
+        )
+        self._raise_for_sms_result(result)
+
+    def _deliver_event_reminder(self, message):
+        from apps.users.models import NotificationOutbox
+
+        event = self._get_event(message)
+        if message.channel == NotificationOutbox.CHANNEL_EMAIL:
+            self.mail_service.send_event_reminder(
+                message.recipient, event, self.site_url, calendar=event.get_calendar_ics()
+            )
+            return
+
+        result = self.sms_service.send_sms(
+            message.recipient.phone_number,
+            self.notification_service.render_event_reminder_sms(event),
+            notification_type=metrics.REMINDER,
+        )
+        self._raise_for_sms_result(result)
+
+    def _deliver_upcoming_events_digest(self, message):
+        from apps.events.models import Event
+        from apps.users.models import NotificationOutbox
+
+        events = list(
+            Event.objects.filter(id__in=message.payload.get('event_ids', []), date__gte=now())
+            .select_related('location__city')
+            .order_by('date')
+        )
+        if not events:
+            raise UndeliverableNotification("Every event of the digest has already started")
+
+        send_email = message.channel == NotificationOutbox.CHANNEL_EMAIL
+        prepared = self.notification_service.prepare_upcoming_events_digest(
+            events, send_sms=not send_email, send_email=send_email,
+        )
+        if send_email:
+            self.mail_service.send_upcoming_events(
+                message.recipient, events, self.site_url, rendered_body=prepared["email_body"]
+            )
+            return
+
+        result = self.sms_service.send_sms(
+            message.recipient.phone_number, prepared["sms_message"], notification_type=metrics.DIGEST,
+        )
+        self._raise_for_sms_result(result)
+
+    @staticmethod
+    def _raise_for_sms_result(result: dict):
+        if result.get('retry_after'):
+            raise RetryLater(result.get('error'), result['retry_after'])
+        if not result.get('success'):
+            raise RuntimeError(result.get('error') or 'SMS not sent')
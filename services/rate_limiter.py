@@ -0,0 +1,191 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "rate-limit:"
+
+# Take `tokens` from every bucket or from none. Buckets refill continuously at `rate` tokens per second
+# up to `capacity`. Returns "0" when the tokens were taken, else the seconds until they all would be.
+# Uses the Redis clock so that workers with drifting clocks share the same view of the buckets.
+TAKE_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local requested = tonumber(ARGV[1])
+local wait = 0
+local levels = {}
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2])
+    local capacity = tonumber(ARGV[i * 2 + 1])
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    levels[i] = tokens
+    if tokens < requested then
+        wait = math.max(wait, (requested - tokens) / rate)
+    end
+end
+if wait == 0 then
+    for i, key in ipairs(KEYS) do
+        local rate = tonumber(ARGV[i * 2])
+        local capacity = tonumber(ARGV[i * 2 + 1])
+        redis.call('HSET', key, 'tokens', levels[i] - requested, 'ts', now)
+        redis.call('EXPIRE', key, math.ceil(capacity / rate) + 1)
+    end
+end
+return tostring(wait)
+"""
+
+
+@dataclass(frozen=True)
+class Bucket:
+    key: str
+    rate: float
+    capacity: float
+
+
+class LocalTokenBuckets:
+    """
+    Token buckets kept in this process, the stand-in for Redis in development and tests
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._levels: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, buckets: Sequence[Bucket], tokens: float = 1) -> float:
+        """
+        Take tokens from every bucket, or from none if one of them is short
+        :param buckets: The buckets to take from
+        :param tokens: Number of tokens to take from each bucket
+        :return: 0 when the tokens were taken, else the seconds to wait until they can be
+        """
+        with self._lock:
+            now = self.clock()
+            wait = 0.0
+            levels = []
+            for bucket in buckets:
+                level, ts = self._levels.get(bucket.key, (bucket.capacity, now))
+                level = min(bucket.capacity, level + max(0.0, now - ts) * bucket.rate)
+                levels.append(level)
+                if level < tokens:
+                    wait = max(wait, (tokens - level) / bucket.rate)
+            if wait == 0:
+                for bucket, level in zip(buckets, levels):
+                    self._levels[bucket.key] = (level - tokens, now)
+            return wait
+
+
+class RedisTokenBuckets:
+    """
+    Token buckets kept in Redis, shared by every worker process
+    """
+
+    def __init__(self, client):
+        self._take = client.register_script(TAKE_SCRIPT)
+
+    def take(self, buckets: Sequence[Bucket], tokens: float = 1) -> float:
+        """
+        Take tokens from every bucket, or from none if one of them is short
+        :param buckets: The buckets to take from
+        :param tokens: Number of tokens to take from each bucket
+        :return: 0 when the tokens were taken, else the seconds to wait until they can be
+        """
+        args: List[float] = [tokens]
+        for bucket in buckets:
+            args.extend([bucket.rate, bucket.capacity])
+        return float(self._take(keys=[f"{KEY_PREFIX}{bucket.key}" for bucket in buckets], args=args))
+
+
+class RateLimiter:
+    """
+    Block until the buckets have tokens, for at most max_wait seconds.
+    When the shared backend is unreachable, the limit is applied per process instead.
+    """
+
+    def __init__(self, backend, max_wait: float = 10, sleep: Callable[[float], None] = time.sleep,
+                 fallback: Optional[LocalTokenBuckets] = None):
+        self.backend = backend
+        self.max_wait = max_wait
+        self.sleep = sleep
+        self.fallback = fallback or LocalTokenBuckets()
+
+    def acquire(self, buckets: Sequence[Bucket], tokens: float = 1, max_wait: Optional[float] = None) -> float:
+        """
+        Take tokens from the buckets, waiting for them if needed
+        :param buckets: The buckets to take from
+        :param tokens: Number of tokens to take from each bucket
+        :param max_wait: Longest time to wait, the limiter's max_wait by default
+        :return: 0 when the tokens were taken, else the seconds still to wait (nothing was taken),
+            the caller should requeue the work for later
+        """
+        if not buckets:
+            return 0
+        max_wait = self.max_wait if max_wait is None else max_wait
+        waited = 0.0
+        while True:
+            wait = self._take(buckets, tokens)
+            if wait <= 0:
+                return 0
+            if waited + wait > max_wait:
+                return wait
+            self.sleep(wait)
+            waited += wait
+
+    def _take(self, buckets: Sequence[Bucket], tokens: float) -> float:
+        if self.backend is not self.fallback:
+            try:
+                return self.backend.take(buckets, tokens)
+            except Exception:
+                logger.warning("Rate limiter backend unavailable, limiting per process", exc_info=True)
+        return self.fallback.take(buckets, tokens)
+
+
+_sms_rate_limiter = None
+_sms_rate_limiter_lock = threading.Lock()
+
+
+def get_sms_rate_limiter() -> RateLimiter:
+    """
+    Get the rate limiter of SMSService, backed by Redis when REDIS_URL is set
+    :return: RateLimiter
+    """
+    global _sms_rate_limiter
+    with _sms_rate_limiter_lock:
+        if _sms_rate_limiter is None:
+            fallback = LocalTokenBuckets()
+            if settings.REDIS_URL:
+                import redis
+
+                backend = RedisTokenBuckets(redis.Redis.from_url(settings.REDIS_URL))
+            else:
+                backend = fallback
+            _sms_rate_limiter = RateLimiter(backend, max_wait=settings.SMS_RATE_LIMIT_MAX_WAIT, fallback=fallback)
+        return _sms_rate_limiter
+
+
+def sms_buckets(from_number: str, to_number: str) -> List[Bucket]:
+    """
+    Buckets an SMS is counted against: its sender number, and the destination country
+    if a limit is configured for it (the longest matching calling code wins)
+    :param from_number: Twilio sender number
+    :param to_number: Destination in E.164 format
+    :return: A list of buckets
+    """
+    sender = settings.SMS_RATE_LIMIT_PER_SENDER
+    buckets = [Bucket(f"sms:sender:{from_number}", float(sender["rate"]), float(sender["capacity"]))]
+
+    digits = to_number.lstrip('+')
+    prefixes = [prefix for prefix in settings.SMS_RATE_LIMIT_PER_COUNTRY if digits.startswith(prefix)]
+    if prefixes:
+        prefix = max(prefixes, key=len)
+        country = settings.SMS_RATE_LIMIT_PER_COUNTRY[prefix]
+        buckets.append(Bucket(f"sms:country:{prefix}", float(country["rate"]), float(country["capacity"])))
+    return buckets
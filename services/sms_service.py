@@ -1,9 +1,21 @@
+import math
 import os
-from typing import Optional
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Iterable, List, Optional, Tuple
+from django.conf import settings
 from django.template.loader import render_to_string
+from twilio.http.http_client import TwilioHttpClient
 from twilio.rest import Client
 from twilio.base.exceptions import TwilioRestException
 
+from services import metrics
+from services.circuit_breaker import TWILIO_CIRCUIT, CircuitOpenError, get_circuit_breaker
+from services.rate_limiter import RateLimiter, get_sms_rate_limiter, sms_buckets
+
 
 class SMSTemplates:
     """SMS message templates for various notifications"""
@@ -85,78 +97,242 @@ class SMSTemplates:
         return f"Upcoming events: {'; '.join(parts)} More: {site_url}/events"
 
 
+class TwilioClientPool:
+    """
+    Idle Twilio clients of one sender, kept with their HTTP connections across send_bulk calls.
+    A client is used by one thread at a time, TwilioHttpClient keeps the last response on itself
+    """
+
+    def __init__(self, build):
+        self._build = build
+        self._idle = queue.LifoQueue()
+
+    @contextmanager
+    def client(self):
+        try:
+            client = self._idle.get_nowait()
+        except queue.Empty:
+            client = self._build()
+        try:
+            yield client
+        finally:
+            self._idle.put(client)
+
+
+_client_pools = {}
+_client_pools_lock = threading.Lock()
+
+
+def get_twilio_client_pool(account_sid: Optional[str], from_number: Optional[str], build) -> TwilioClientPool:
+    """
+    Get the process wide client pool of a sender
+    :param build: Builds a client of the account when the pool has no idle one
+    """
+    with _client_pools_lock:
+        pool = _client_pools.get((account_sid, from_number))
+        if pool is None:
+            pool = _client_pools[(account_sid, from_number)] = TwilioClientPool(build)
+        return pool
+
+
 class SMSService:
     """Service for sending SMS notifications via Twilio"""
 
-    def __init__(self):
+    def __init__(self, client=None, rate_limiter: Optional[RateLimiter] = None):
+        """
+        Args:
+            client: Twilio client, built from the TWILIO_* environment variables by default
+            rate_limiter: Limiter shared by every SMSService, see get_sms_rate_limiter
+        """
         self.account_sid = os.getenv('TWILIO_SID')
         self.auth_token = os.getenv('TWILIO_AUTH_TOKEN')
         self.verify_service_sid = os.getenv('TWILIO_VERIFY_SERVICE_SID')
         self.from_number = os.getenv('TWILIO_PHONE_NUMBER')
+        self.rate_limiter = rate_limiter or get_sms_rate_limiter()
+
+        # An injected client is shared by the send_bulk threads, else they take theirs from the sender's pool
+        self._shared_client = client is not None
+        self.client = client if client is not None else self._build_client()
+        self._local = threading.local()
 
+    def _build_client(self):
         if self.account_sid and self.auth_token:
-            self.client = Client(self.account_sid, self.auth_token)
-        else:
-            self.client = None
+            http_client = TwilioHttpClient(timeout=settings.TWILIO_READ_TIMEOUT)
+            # requests takes a (connect, read) tuple, the constructor only validates a number
+            http_client.timeout = (settings.TWILIO_CONNECT_TIMEOUT, settings.TWILIO_READ_TIMEOUT)
+            return Client(self.account_sid, self.auth_token, http_client=http_client)
+        return None
 
     def is_configured(self) -> bool:
         """Check if Twilio is properly configured"""
         return self.client is not None and self.from_number is not None
 
-    def render_sms_template(self, template_name: str, context: dict, fallback_message: str) -> str:
+    def render_sms_template(self, template_name: str, context: dict, fallback_message: str,
+                            notification_type: str = metrics.OTHER) -> str:
         try:
-            message = render_to_string(template_name, context=context)
+            with metrics.notification_render_seconds.labels(
+                type=notification_type, channel=metrics.CHANNEL_SMS
+            ).time():
+                message = render_to_string(template_name, context=context)
             message = message.strip("\n")
             lines = [ln.rstrip() for ln in message.splitlines()]
             return "\n".join(lines).strip()
         except Exception:
             return fallback_message
 
-    def send_sms(self, to_number: str, message: str) -> dict:
+    def send_sms(self, to_number: str, message: str, notification_type: str = metrics.OTHER,
+                 enqueued_at: Optional[float] = None) -> dict:
         """
         Send an SMS message
 
         Args:
             to_number: Phone number in E.164 format (e.g., +237XXXXXXXXX)
             message: Message content (max 160 chars for single SMS)
+            notification_type: Label of the notification in the metrics, see services.metrics
+            enqueued_at: Time the notification was requested at, metrics.get_enqueued_at() by default
 
         Returns:
-            dict with status and message_sid or error
+            dict with status and message_sid or error. When the sender or destination is over its
+            rate limit (rate_limited) or the Twilio circuit breaker is open (circuit_open), retry_after
+            gives the seconds to wait before retrying
         """
         if not self.is_configured():
+            metrics.record_notification(notification_type, metrics.CHANNEL_SMS, metrics.OUTCOME_SKIPPED)
             return {
                 'success': False,
                 'error': 'SMS service not configured. Please set TWILIO credentials in .env'
             }
 
+        breaker = get_circuit_breaker(TWILIO_CIRCUIT)
         try:
-            # Ensure phone number is in E.164 format
-            if not to_number.startswith('+'):
-                to_number = f'+{to_number}'
+            breaker.before_call()
+        except CircuitOpenError as e:
+            metrics.record_notification(notification_type, metrics.CHANNEL_SMS, metrics.OUTCOME_DEFERRED)
+            return {
+                'success': False,
+                'error': str(e),
+                'circuit_open': True,
+                'retry_after': e.retry_after,
+            }
+
+        # Ensure phone number is in E.164 format
+        if not to_number.startswith('+'):
+            to_number = f'+{to_number}'
+
+        try:
+            retry_after = self.rate_limiter.acquire(sms_buckets(self.from_number, to_number))
+        except Exception as e:
+            breaker.record_failure()
+            metrics.record_notification(notification_type, metrics.CHANNEL_SMS, metrics.OUTCOME_FAILED)
+            return {
+                'success': False,
+                'error': f'Unexpected error: {str(e)}'
+            }
+        if retry_after:
+            metrics.record_notification(notification_type, metrics.CHANNEL_SMS, metrics.OUTCOME_DEFERRED)
+            return {
+                'success': False,
+                'error': 'SMS rate limit reached',
+                'rate_limited': True,
+                'retry_after': retry_after,
+            }
 
-            message = self.client.messages.create(
+        started = time.perf_counter()
+        try:
+            client = getattr(self._local, 'client', None) or self.client
+            message = client.messages.create(
                 body=message,
                 from_=self.from_number,
                 to=to_number
             )
 
+            breaker.record_success()
+            metrics.record_provider_call(
+                notification_type, metrics.CHANNEL_SMS, started, metrics.OUTCOME_SENT, enqueued_at
+            )
             return {
                 'success': True,
                 'message_sid': message.sid,
                 'status': message.status
             }
         except TwilioRestException as e:
-            return {
+            result = {
                 'success': False,
                 'error': str(e),
                 'error_code': e.code
             }
+            outcome = metrics.OUTCOME_FAILED
+            if e.status == 429:
+                result['rate_limited'] = True
+                result['retry_after'] = settings.SMS_RATE_LIMIT_MAX_WAIT
+                outcome = metrics.OUTCOME_DEFERRED
+            elif e.status >= 500:
+                breaker.record_failure()
+            else:
+                # A rejected message (invalid number, ...) means Twilio is up
+                breaker.record_success()
+            metrics.record_provider_call(notification_type, metrics.CHANNEL_SMS, started, outcome)
+            return result
         except Exception as e:
+            # Connection errors and timeouts
+            breaker.record_failure()
+            metrics.record_provider_call(notification_type, metrics.CHANNEL_SMS, started, metrics.OUTCOME_FAILED)
             return {
                 'success': False,
                 'error': f'Unexpected error: {str(e)}'
             }
 
+    def send_bulk(self, messages: Iterable[Tuple[str, str]], max_in_flight: Optional[int] = None,
+                  notification_type: str = metrics.OTHER) -> List[dict]:
+        """
+        Send many SMS concurrently, on Twilio clients of the sender's pool that keep their HTTP connections
+        across calls
+
+        Args:
+            messages: (to_number, message) pairs
+            max_in_flight: Maximum number of concurrent Twilio requests, SMS_MAX_IN_FLIGHT by default.
+                Never more than the sender rate times SMS_EXPECTED_LATENCY, which keeps the sender at its rate
+            notification_type: Label of the notifications in the metrics, see services.metrics
+
+        Returns:
+            list of send_sms results in the order of messages, each with the `to` number it was sent to
+        """
+        messages = list(messages)
+        if not messages:
+            return []
+
+        # The pool threads do not see the current task
+        enqueued_at = metrics.get_enqueued_at()
+
+        pool = None
+        if not self._shared_client and self.is_configured():
+            pool = get_twilio_client_pool(self.account_sid, self.from_number, self._build_client)
+
+        def send(item):
+            if pool is None:
+                return self.send_sms(*item, notification_type=notification_type, enqueued_at=enqueued_at)
+            with pool.client() as client:
+                self._local.client = client
+                try:
+                    return self.send_sms(*item, notification_type=notification_type, enqueued_at=enqueued_at)
+                finally:
+                    self._local.client = None
+
+        # Little's law: rate x latency requests in flight keep the sender at its rate, the token bucket paces
+        # them. Threads beyond that would only wait on the limiter, long enough to exceed SMS_RATE_LIMIT_MAX_WAIT
+        # and be reported rate limited
+        needed = math.ceil(float(settings.SMS_RATE_LIMIT_PER_SENDER["rate"]) * settings.SMS_EXPECTED_LATENCY)
+        max_in_flight = max(1, min(max_in_flight or settings.SMS_MAX_IN_FLIGHT, needed, len(messages)))
+        if max_in_flight == 1:
+            results = [send(item) for item in messages]
+        else:
+            with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="sms") as executor:
+                results = list(executor.map(send, messages))
+
+        for (to_number, _), result in zip(messages, results):
+            result['to'] = to_number
+        return results
+
     def send_welcome_sms(self, to_number: str, user_name: str) -> dict:
         """Send welcome SMS to new user"""
         fallback = SMSTemplates.welcome(user_name)
@@ -164,8 +340,9 @@ class SMSService:
             "sms/welcome.txt",
             context={"user_name": user_name},
             fallback_message=fallback,
+            notification_type=metrics.WELCOME,
         )
-        return self.send_sms(to_number, message)
+        return self.send_sms(to_number, message, notification_type=metrics.WELCOME)
 
     def send_signup_confirmation_sms(self, to_number: str, user_name: str) -> dict:
         """Send signup/registration confirmation SMS"""
@@ -174,8 +351,9 @@ class SMSService:
             "sms/signup_confirmation.txt",
             context={"user_name": user_name},
             fallback_message=fallback,
+            notification_type=metrics.SIGNUP,
         )
-        return self.send_sms(to_number, message)
+        return self.send_sms(to_number, message, notification_type=metrics.SIGNUP)
 
     def send_event_notification_sms(
         self,
@@ -186,8 +364,19 @@ class SMSService:
         event_url: Optional[str] = None,
     ) -> dict:
         """Send event notification SMS"""
+        message = self.render_event_notification_sms(event_title, event_date, event_location, event_url=event_url)
+        return self.send_sms(to_number, message, notification_type=metrics.NEW_EVENT)
+
+    def render_event_notification_sms(
+        self,
+        event_title: str,
+        event_date: str,
+        event_location: str,
+        event_url: Optional[str] = None,
+    ) -> str:
+        """Render the event notification SMS, the same for every recipient"""
         fallback = SMSTemplates.event_notification(event_title, event_date, event_location, event_url=event_url)
-        message = self.render_sms_template(
+        return self.render_sms_template(
             "sms/event_notification.txt",
             context={
                 "event_title": event_title,
@@ -196,8 +385,8 @@ class SMSService:
                 "event_url": event_url,
             },
             fallback_message=fallback,
+            notification_type=metrics.NEW_EVENT,
         )
-        return self.send_sms(to_number, message)
 
     def send_event_cancelled_sms(
         self,
@@ -207,13 +396,18 @@ class SMSService:
         event_url: Optional[str] = None,
     ) -> dict:
         """Send event cancellation SMS"""
+        message = self.render_event_cancelled_sms(event_title, event_date, event_url=event_url)
+        return self.send_sms(to_number, message, notification_type=metrics.CANCELLATION)
+
+    def render_event_cancelled_sms(self, event_title: str, event_date: str, event_url: Optional[str] = None) -> str:
+        """Render the event cancellation SMS, the same for every recipient"""
         fallback = SMSTemplates.event_cancelled(event_title, event_date, event_url=event_url)
-        message = self.render_sms_template(
+        return self.render_sms_template(
             "sms/event_cancelled.txt",
             context={"event_title": event_title, "event_date": event_date, "event_url": event_url},
             fallback_message=fallback,
+            notification_type=metrics.CANCELLATION,
         )
-        return self.send_sms(to_number, message)
 
     def send_event_reminder_sms(
         self,
@@ -224,6 +418,17 @@ class SMSService:
         event_url: Optional[str] = None,
     ) -> dict:
         """Send event reminder SMS"""
+        message = self.render_event_reminder_sms(event_title, event_date, hours_until, event_url=event_url)
+        return self.send_sms(to_number, message, notification_type=metrics.REMINDER)
+
+    def render_event_reminder_sms(
+        self,
+        event_title: str,
+        event_date: str,
+        hours_until: int,
+        event_url: Optional[str] = None,
+    ) -> str:
+        """Render the event reminder SMS, the same for every recipient"""
         if hours_until <= 1:
             time_text = "in less than 1 hour"
         elif hours_until < 24:
@@ -233,7 +438,7 @@ class SMSService:
             time_text = f"in {days} day{'s' if days > 1 else ''}"
 
         fallback = SMSTemplates.event_reminder(event_title, event_date, hours_until, event_url=event_url)
-        message = self.render_sms_template(
+        return self.render_sms_template(
             "sms/event_reminder.txt",
             context={
                 "event_title": event_title,
@@ -242,8 +447,8 @@ class SMSService:
                 "event_url": event_url,
             },
             fallback_message=fallback,
+            notification_type=metrics.REMINDER,
         )
-        return self.send_sms(to_number, message)
 
     def send_registration_confirmation_sms(self, to_number: str, event_title: str,
                                           registration_code: Optional[str] = None,
@@ -258,8 +463,9 @@ class SMSService:
                 "event_url": event_url,
             },
             fallback_message=fallback,
+            notification_type=metrics.REGISTRATION,
         )
-        return self.send_sms(to_number, message)
+        return self.send_sms(to_number, message, notification_type=metrics.REGISTRATION)
 
     def send_new_location_login_sms(self, to_number: str, location: str, time: str) -> dict:
         """Send new location login alert SMS"""
@@ -268,8 +474,9 @@ class SMSService:
             "sms/new_location_login.txt",
             context={"location": location, "time": time},
             fallback_message=fallback,
+            notification_type=metrics.LOGIN_ALERT,
         )
-        return self.send_sms(to_number, message)
+        return self.send_sms(to_number, message, notification_type=metrics.LOGIN_ALERT)
 
     def send_otp_sms(self, to_number: str, otp_code: str) -> dict:
         """Send OTP code via SMS"""
@@ -278,19 +485,27 @@ class SMSService:
             "sms/otp.txt",
             context={"otp_code": otp_code},
             fallback_message=fallback,
+            notification_type=metrics.OTP,
         )
-        return self.send_sms(to_number, message)
+        return self.send_sms(to_number, message, notification_type=metrics.OTP)
 
-    def send_upcoming_events_digest_sms(self, to_number: str, event_items: list[dict], site_url: str) -> dict:
-        """Send a short upcoming-events digest via SMS (keeps content compact)."""
+    def render_upcoming_events_digest_sms(self, event_items: list[dict], site_url: str) -> str:
+        """Render the upcoming-events digest SMS, it is the same for every recipient."""
         cleaned_site = site_url.replace("https://", "").replace("http://", "").rstrip("/")
         fallback = SMSTemplates.upcoming_events_digest(event_items, site_url=cleaned_site)
-        message = self.render_sms_template(
+        return self.render_sms_template(
             "sms/upcoming_events_digest.txt",
             context={"event_items": event_items[:3], "site_url": cleaned_site},
             fallback_message=fallback,
+            notification_type=metrics.DIGEST,
         )
-        return self.send_sms(to_number, message)
+
+    def send_upcoming_events_digest_sms(self, to_number: str, event_items: list[dict], site_url: str,
+                                        message: Optional[str] = None) -> dict:
+        """Send a short upcoming-events digest via SMS (keeps content compact)."""
+        if message is None:
+            message = self.render_upcoming_events_digest_sms(event_items, site_url)
+        return self.send_sms(to_number, message, notification_type=metrics.DIGEST)
 
     def verify_phone_number(self, phone_number: str) -> dict:
         """
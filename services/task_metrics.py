@@ -0,0 +1,114 @@
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from django_prometheus.conf import NAMESPACE
+from prometheus_client import Counter, Gauge, Histogram
+
+# Task message header holding the time the message was published, see stamp_published_at
+PUBLISHED_AT_HEADER = "published_at"
+
+celery_task_runtime_seconds = Histogram(
+    "celery_task_runtime_seconds",
+    "Duration of a task run, by final state (SUCCESS, FAILURE, RETRY)",
+    ["task", "state"],
+    namespace=NAMESPACE,
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+celery_task_queue_wait_seconds = Histogram(
+    "celery_task_queue_wait_seconds",
+    "Time a task message waited in its queue, from its publication (or its ETA) to the start of the run",
+    ["task", "queue"],
+    namespace=NAMESPACE,
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800),
+)
+celery_tasks_in_flight = Gauge(
+    "celery_tasks_in_flight",
+    "Tasks running right now",
+    ["task", "queue"],
+    namespace=NAMESPACE,
+    multiprocess_mode="livesum",
+)
+celery_task_failures_total = Counter(
+    "celery_task_failures_total",
+    "Task runs that raised an exception",
+    ["task", "exception"],
+    namespace=NAMESPACE,
+)
+celery_task_retries_total = Counter(
+    "celery_task_retries_total",
+    "Task runs that asked to be retried",
+    ["task"],
+    namespace=NAMESPACE,
+)
+
+# Start of the runs of this process, by task id
+_runs: Dict[str, tuple] = {}
+_runs_lock = threading.Lock()
+
+
+def stamp_published_at(headers: dict):
+    """
+    Stamp a task message with its publication time, connected to before_task_publish.
+    Unlike the enqueued_at header of services.metrics, a retry or a child task gets a new one
+    :param headers: Headers of the message being published
+    """
+    if headers is not None:
+        headers[PUBLISHED_AT_HEADER] = time.time()
+
+
+def _queue(task) -> str:
+    delivery_info = getattr(task.request, 'delivery_info', None) or {}
+    return delivery_info.get('routing_key') or ''
+
+
+def _queued_since(request) -> Optional[float]:
+    published_at = getattr(request, PUBLISHED_AT_HEADER, None)
+    if published_at is None:
+        # Eager runs and messages published without the signal
+        return None
+    eta = getattr(request, 'eta', None)
+    if eta:
+        # The wait until a countdown or ETA is intended, not queueing
+        try:
+            published_at = max(published_at, datetime.fromisoformat(eta).timestamp())
+        except (TypeError, ValueError):
+            pass
+    return published_at
+
+
+def task_started(task_id: str, task):
+    """Connected to task_prerun: observe the queue wait and count the task as in flight"""
+    queue = _queue(task)
+    queued_since = _queued_since(task.request)
+    if queued_since is not None:
+        celery_task_queue_wait_seconds.labels(task=task.name, queue=queue).observe(
+            max(0.0, time.time() - queued_since)
+        )
+    celery_tasks_in_flight.labels(task=task.name, queue=queue).inc()
+    with _runs_lock:
+        _runs[task_id] = (time.perf_counter(), queue)
+
+
+def task_finished(task_id: str, task, state: Optional[str]):
+    """Connected to task_postrun: observe the runtime, the run is no longer in flight"""
+    with _runs_lock:
+        run = _runs.pop(task_id, None)
+    if run is None:
+        return
+    started, queue = run
+    celery_task_runtime_seconds.labels(task=task.name, state=state or 'UNKNOWN').observe(
+        time.perf_counter() - started
+    )
+    celery_tasks_in_flight.labels(task=task.name, queue=queue).dec()
+
+
+def task_failed(task, exception: BaseException):
+    """Connected to task_failure"""
+    celery_task_failures_total.labels(task=task.name, exception=exception.__class__.__name__).inc()
+
+
+def task_retried(task):
+    """Connected to task_retry"""
+    celery_task_retries_total.labels(task=task.name).inc()
@@ -0,0 +1,172 @@
+import secrets
+import threading
+import time
+from datetime import timedelta
+from typing import Dict, Optional, Tuple
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils.timezone import now
+from oauth2_provider.models import AccessToken, Application, RefreshToken
+
+DEFAULT_APPLICATION_NAME = "Default"
+ACCESS_TOKEN_LIFETIME = timedelta(days=1)
+
+# Both tokens in one statement: the refresh token is inserted with the id of the access token
+ISSUE_SQL = """
+    WITH access_token AS (
+        INSERT INTO {access} (user_id, application_id, token, expires, scope, created, updated)
+        VALUES (%(user)s, %(application)s, %(access_token)s, %(expires)s, '', %(now)s, %(now)s)
+        RETURNING id
+    )
+    INSERT INTO {refresh} (user_id, application_id, token, access_token_id, created, updated)
+    SELECT %(user)s, %(application)s, %(refresh_token)s, id, %(now)s, %(now)s FROM access_token
+    RETURNING access_token_id, id
+"""
+
+# No refresh grant is exposed, a refresh token is dead once its access token is deleted or expired
+PRUNE_REFRESH_TOKENS_SQL = """
+    DELETE FROM {refresh} WHERE id IN (
+        SELECT r.id
+        FROM {refresh} r
+        LEFT JOIN {access} a ON a.id = r.access_token_id
+        WHERE (a.id IS NULL OR a.expires < %(now)s)
+          AND NOT EXISTS (SELECT 1 FROM {access} s WHERE s.source_refresh_token_id = r.id)
+        LIMIT %(limit)s
+        FOR UPDATE OF r SKIP LOCKED
+    )
+"""
+PRUNE_ACCESS_TOKENS_SQL = """
+    DELETE FROM {access} WHERE id IN (
+        SELECT a.id
+        FROM {access} a
+        WHERE a.expires < %(now)s
+          AND NOT EXISTS (SELECT 1 FROM {refresh} r WHERE r.access_token_id = a.id)
+        LIMIT %(limit)s
+        FOR UPDATE OF a SKIP LOCKED
+    )
+"""
+
+# Bumped in the shared cache when an application is deleted, each process resolves the default
+# application again once the version it resolved it under has changed
+DEFAULT_APPLICATION_VERSION_KEY = "oauth2-default-application:version"
+
+_default_application_lock = threading.Lock()
+# (version, application)
+_default_application: Optional[Tuple[Optional[int], Application]] = None
+
+
+def _tables() -> dict:
+    return {'access': AccessToken._meta.db_table, 'refresh': RefreshToken._meta.db_table}
+
+
+class TokenService:
+    """
+    Issue the OAuth2 tokens of a login and prune the expired ones.
+
+    Logins all use the "Default" application, resolved once per process until an application is deleted.
+    """
+
+    @staticmethod
+    def _get_default_application_version() -> Optional[int]:
+        try:
+            return cache.get(DEFAULT_APPLICATION_VERSION_KEY)
+        except Exception:
+            return None
+
+    @staticmethod
+    def get_default_application() -> Application:
+        global _default_application
+        version = TokenService._get_default_application_version()
+        resolved = _default_application
+        if resolved is None or resolved[0] != version:
+            with _default_application_lock:
+                resolved = _default_application
+                if resolved is None or resolved[0] != version:
+                    application, _ = Application.objects.get_or_create(name=DEFAULT_APPLICATION_NAME)
+                    resolved = _default_application = (version, application)
+        return resolved[1]
+
+    @staticmethod
+    def clear_default_application() -> None:
+        """
+        Resolve the default application again on next use, in every process: connected to the deletion
+        of an application, the shared version is bumped now and again once the deletion commits, so a
+        process resolving it in between does not keep the deleted one
+        """
+        global _default_application
+        _default_application = None
+
+        def bump():
+            try:
+                cache.set(DEFAULT_APPLICATION_VERSION_KEY, time.time_ns(), timeout=None)
+            except Exception:
+                pass
+
+        bump()
+        transaction.on_commit(bump)
+
+    def issue(self, user) -> Dict[str, object]:
+        """
+        Create an access token and its refresh token for the user, in a single query.
+        The access token is cached once committed, the first request with it needs no lookup
+
+        :return: dict with the access_token and refresh_token model instances
+        """
+        from apps.users.authentication import cache_token
+
+        application = self.get_default_application()
+        issued_at = now()
+        access_token = AccessToken(
+            user=user,
+            application=application,
+            token=secrets.token_hex(16),
+            expires=issued_at + ACCESS_TOKEN_LIFETIME,
+            scope='',
+            created=issued_at,
+            updated=issued_at,
+        )
+        refresh_token = RefreshToken(
+            user=user,
+            application=application,
+            token=secrets.token_hex(16),
+            access_token=access_token,
+            created=issued_at,
+            updated=issued_at,
+        )
+        params = {
+            'user': user.pk,
+            'application': application.pk,
+            'access_token': access_token.token,
+            'refresh_token': refresh_token.token,
+            'expires': access_token.expires,
+            'now': issued_at,
+        }
+        with connection.cursor() as cursor:
+            cursor.execute(ISSUE_SQL.format(**_tables()), params)
+            access_token.pk, refresh_token.pk = cursor.fetchone()
+        for token in (access_token, refresh_token):
+            token._state.adding = False
+            token._state.db = connection.alias
+        transaction.on_commit(lambda: cache_token(access_token))
+        return {'access_token': access_token, 'refresh_token': refresh_token}
+
+    @staticmethod
+    def prune_expired(batch_size: int) -> Dict[str, int]:
+        """
+        Delete the expired tokens, batch_size rows per statement.
+        Cached access tokens are not evicted: the cache never keeps a token past its expiry
+
+        :return: Number of refresh and access tokens deleted
+        """
+        deleted = {'refresh_tokens': 0, 'access_tokens': 0}
+        for key, sql in (('refresh_tokens', PRUNE_REFRESH_TOKENS_SQL), ('access_tokens', PRUNE_ACCESS_TOKENS_SQL)):
+            sql = sql.format(**_tables())
+            while True:
+                with connection.cursor() as cursor:
+                    cursor.execute(sql, {'now': now(), 'limit': batch_size})
+                    count = cursor.rowcount
+                deleted[key] += count
+                if count < batch_size:
+                    break
+        return deleted
@@ -0,0 +1,108 @@
+import calendar
+import hashlib
+from functools import wraps
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from utils.response_cache import get_namespace_changed_at, get_namespace_version
+
+
+def get_list_validators(queryset):
+    """
+    Get the validators of a list endpoint in a single aggregate query
+
+    :param queryset: The queryset the endpoint serializes
+    :return: A (last_modified, count) tuple, last_modified is None for an empty list
+    """
+    validators = queryset.order_by().aggregate(last_modified=Max("updated_at"), count=Count("pk"))
+    return validators["last_modified"], validators["count"]
+
+
+def get_detail_validators(queryset, pk):
+    """
+    Get the validators of a detail endpoint
+
+    :param queryset: The queryset the object is looked up in
+    :param pk: The primary key from the URL
+    :return: A (last_modified, 1) tuple, or None when the object does not exist
+    """
+    try:
+        last_modified = queryset.filter(pk=pk).order_by().values_list("updated_at", flat=True).first()
+    except (ValueError, ValidationError):
+        return None
+    if last_modified is None:
+        return None
+    return last_modified, 1
+
+
+def build_etag(request, last_modified, count, version=None) -> str:
+    language = request.headers.get("Accept-Language", "")
+    stamp = last_modified.isoformat() if last_modified else ""
+    digest = hashlib.sha256(
+        f"{request.get_full_path()}|{language}|{count}|{stamp}|{version}".encode("utf-8")
+    ).hexdigest()
+    return quote_etag(digest[:32])
+
+
+def conditional_get(queryset=None, detail=False, namespace=None, lookup_kwarg="pk"):
+    """
+    Answer If-None-Match / If-Modified-Since with 304 Not Modified before the view serializes anything
+
+    The ETag is built from the request path, Accept-Language and max(updated_at) and the row count
+    (updated_at alone for details). When a response cache namespace is given its version is folded in
+    and Last-Modified is at least the time of its last bump, so changes to related rows (tags, speakers,
+    social accounts...) also change both validators. A list endpoint with a namespace takes its validators
+    from the namespace alone, its version moves on every write the cached responses depend on, so the
+    table is not aggregated on each request, cursor pages and cache hits included.
+
+    :param queryset: The queryset the endpoint serializes, defaults to the view's get_queryset()
+    :param detail: Whether the endpoint returns a single object looked up by lookup_kwarg
+    :param namespace: Optional response cache namespace, see utils.response_cache
+    :param lookup_kwarg: The URL kwarg holding the primary key of a detail endpoint
+    """
+
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view_method(self, request, *args, **kwargs)
+
+            if detail or not namespace:
+                base_queryset = queryset.all() if queryset is not None else self.get_queryset()
+                base_queryset = base_queryset.select_related(None).prefetch_related(None)
+                if detail:
+                    validators = get_detail_validators(base_queryset, kwargs.get(lookup_kwarg))
+                    if validators is None:
+                        return view_method(self, request, *args, **kwargs)
+                else:
+                    validators = get_list_validators(base_queryset)
+            else:
+                validators = (None, None)
+
+            last_modified, count = validators
+            version = None
+            if namespace:
+                version = get_namespace_version(namespace)
+                changed_at = get_namespace_changed_at(namespace)
+                last_modified = max(last_modified, changed_at) if last_modified else changed_at
+            etag = build_etag(request, last_modified, count, version)
+            timestamp = calendar.timegm(last_modified.utctimetuple()) if last_modified else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = view_method(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+
+            response.headers["ETag"] = etag
+            if timestamp is not None:
+                response.headers["Last-Modified"] = http_date(timestamp)
+            patch_vary_headers(response, ("Accept-Language",))
+            return response
+
+        return wrapper
+
+    return decorator
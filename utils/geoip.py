@@ -0,0 +1,194 @@
+import ipaddress
+import logging
+import mmap
+import socket
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_right
+from typing import Iterable, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# File layout, little-endian, every section starts on an 8 byte boundary:
+#   header: magic, version, IPv4 range count, IPv6 range count, location count
+#   IPv4 ranges: first addresses (uint32, sorted), last addresses (uint32), location indexes (uint32)
+#   IPv6 ranges: the same with the upper 64 bits of the addresses (uint64), location indexes (uint32)
+#   locations: offsets (uint32, location count + 1) into a UTF-8 blob of "country<TAB>city" entries
+HEADER = struct.Struct('<8sIIII')
+MAGIC = b'GEOIPRNG'
+VERSION = 1
+
+UNKNOWN_LOCATION = ('', '')
+
+IPV4_MAPPED = ipaddress.ip_network('::ffff:0:0/96')
+IPV4_MAPPED_PREFIX = IPV4_MAPPED.network_address.packed[:12]
+
+
+def _pad(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+class GeoIPDatabase:
+    """
+    IP ranges compiled by the compile_geoip command, memory-mapped and binary searched in place.
+    The file is never parsed or copied, its pages are shared by every process of the host.
+    IPv6 ranges are only told apart by their upper 64 bits, the routing prefix.
+    """
+
+    def __init__(self, path: str):
+        if sys.byteorder != 'little':
+            raise OSError("The GeoIP database format is little-endian")
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        magic, version, v4_count, v6_count, location_count = HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a GeoIP database of version {VERSION}")
+
+        offset = HEADER.size
+        self._v4_starts, offset = self._section(view, offset, 'I', v4_count)
+        self._v4_ends, offset = self._section(view, offset, 'I', v4_count)
+        self._v4_locations, offset = self._section(view, offset, 'I', v4_count)
+        self._v6_starts, offset = self._section(view, offset, 'Q', v6_count)
+        self._v6_ends, offset = self._section(view, offset, 'Q', v6_count)
+        self._v6_locations, offset = self._section(view, offset, 'I', v6_count)
+        location_offsets, offset = self._section(view, offset, 'I', location_count + 1)
+
+        # Decoded once, lookups hand out these tuples
+        blob = view[offset:]
+        self.locations = tuple(
+            tuple(str(blob[location_offsets[index]:location_offsets[index + 1]], 'utf-8').split('\t', 1))
+            for index in range(location_count)
+        )
+        self.range_count = v4_count + v6_count
+
+    @staticmethod
+    def _section(view: memoryview, offset: int, typecode: str, count: int):
+        size = array(typecode).itemsize * count
+        return view[offset:offset + size].cast(typecode), _pad(offset + size)
+
+    def lookup(self, ip_address: str) -> Tuple[str, str]:
+        """
+        :return: (country, city) of the range holding the address, empty strings when there is none
+        """
+        try:
+            key = int.from_bytes(socket.inet_pton(socket.AF_INET, ip_address), 'big')
+            starts, ends, locations = self._v4_starts, self._v4_ends, self._v4_locations
+        except (OSError, TypeError):
+            try:
+                packed = socket.inet_pton(socket.AF_INET6, ip_address)
+            except (OSError, TypeError):
+                return UNKNOWN_LOCATION
+            if packed[:12] == IPV4_MAPPED_PREFIX:
+                key = int.from_bytes(packed[12:], 'big')
+                starts, ends, locations = self._v4_starts, self._v4_ends, self._v4_locations
+            else:
+                key = int.from_bytes(packed[:8], 'big')
+                starts, ends, locations = self._v6_starts, self._v6_ends, self._v6_locations
+
+        index = bisect_right(starts, key) - 1
+        if index < 0 or ends[index] < key:
+            return UNKNOWN_LOCATION
+        return self.locations[locations[index]]
+
+
+def compile_database(ranges: Iterable[Tuple[str, str, str, str]], path: str) -> Tuple[int, int]:
+    """
+    Write a GeoIP database
+
+    :param ranges: (first address, last address, country, city) of each range, addresses as text or integers
+    :param path: File to write
+    :return: Number of ranges written, number of ranges skipped because they overlap a previous one
+    """
+    families = {4: [], 6: []}
+    for first, last, country, city in ranges:
+        first, last = _parse_address(first), _parse_address(last)
+        # LoginHistory.country and city length
+        country, city = country.strip()[:100], city.strip()[:100]
+        if first.version != last.version or int(last) < int(first):
+            raise ValueError(f"Invalid range {first} - {last}")
+        if first.version == 6 and first in IPV4_MAPPED and last in IPV4_MAPPED:
+            first, last = first.ipv4_mapped, last.ipv4_mapped
+        if first.version == 4:
+            families[4].append((int(first), int(last), country, city))
+        else:
+            families[6].append((int(first) >> 64, int(last) >> 64, country, city))
+
+    location_indexes = {}
+    sections = []
+    written = skipped = 0
+    for version, typecode in ((4, 'I'), (6, 'Q')):
+        starts, ends, locations = array(typecode), array(typecode), array('I')
+        for first, last, country, city in sorted(families[version]):
+            if ends and first <= ends[-1]:
+                skipped += 1
+                continue
+            starts.append(first)
+            ends.append(last)
+            locations.append(location_indexes.setdefault((country, city), len(location_indexes)))
+        written += len(starts)
+        sections += [starts, ends, locations]
+
+    blob = bytearray()
+    location_offsets = array('I', [0])
+    for country, city in location_indexes:
+        blob += f"{country}\t{city}".encode()
+        location_offsets.append(len(blob))
+    sections.append(location_offsets)
+
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(sections[0]), len(sections[3]), len(location_indexes)))
+        for section in sections:
+            file.write(b'\0' * (_pad(file.tell()) - file.tell()))
+            if sys.byteorder != 'little':
+                section.byteswap()
+            file.write(section.tobytes())
+        file.write(b'\0' * (_pad(file.tell()) - file.tell()))
+        file.write(blob)
+    return written, skipped
+
+
+def _parse_address(value):
+    value = str(value).strip()
+    if value.isdigit():
+        # Integer addresses, as in IP2Location files
+        number = int(value)
+        return ipaddress.IPv4Address(number) if number < 2 ** 32 else ipaddress.IPv6Address(number)
+    return ipaddress.ip_address(value)
+
+
+_geoip_database = None
+_geoip_database_lock = threading.Lock()
+
+
+def get_geoip_database() -> Optional[GeoIPDatabase]:
+    """
+    Get the database at GEOIP_DATABASE_PATH, None when it is not set or cannot be opened
+    :return: GeoIPDatabase or None
+    """
+    global _geoip_database
+    if _geoip_database is None and settings.GEOIP_DATABASE_PATH:
+        with _geoip_database_lock:
+            if _geoip_database is None:
+                try:
+                    _geoip_database = GeoIPDatabase(settings.GEOIP_DATABASE_PATH)
+                except (OSError, ValueError):
+                    logger.exception("Cannot open the GeoIP database, logins will not be located")
+                    # Not retried until the process restarts
+                    _geoip_database = False
+    return _geoip_database or None
+
+
+def locate_ip(ip_address: str) -> Tuple[str, str]:
+    """
+    Locate an IP address offline
+    :return: (country, city), empty strings when unknown or without a GeoIP database
+    """
+    database = get_geoip_database()
+    if database is None:
+        return UNKNOWN_LOCATION
+    return database.lookup(ip_address)
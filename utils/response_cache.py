@@ -0,0 +1,142 @@
+import hashlib
+import logging
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django_prometheus.conf import NAMESPACE
+from prometheus_client import Counter
+from rest_framework.renderers import JSONRenderer
+
+logger = logging.getLogger(__name__)
+
+EVENTS_NAMESPACE = "events"
+PROJECTS_NAMESPACE = "projects"
+ORGANIZERS_NAMESPACE = "organizers"
+SPEAKERS_NAMESPACE = "speakers"
+BLOG_NAMESPACE = "blog"
+
+response_cache_hits_total = Counter(
+    "response_cache_hits_total",
+    "Responses served from the public response cache",
+    ["namespace"],
+    namespace=NAMESPACE,
+)
+response_cache_misses_total = Counter(
+    "response_cache_misses_total",
+    "Responses rendered because they were not in the public response cache",
+    ["namespace"],
+    namespace=NAMESPACE,
+)
+
+
+def _version_key(namespace: str) -> str:
+    return f"response-cache:{namespace}:version"
+
+
+def _changed_at_key(namespace: str) -> str:
+    return f"response-cache:{namespace}:changed-at"
+
+
+def _initial_version() -> int:
+    # A version key evicted from the cache restarts from the clock rather than from 1, so the entries
+    # stored under the versions it had reached are never served again
+    return time.time_ns() // 1000
+
+
+def get_namespace_version(namespace: str) -> int:
+    """
+    Get the current version of a cache namespace
+
+    :param namespace: The namespace, e.g. "events"
+    :return: The version number, entries stored under older versions are never read again
+    """
+    return cache.get_or_set(_version_key(namespace), _initial_version, timeout=None)
+
+
+def get_namespace_changed_at(namespace: str) -> datetime:
+    """
+    Get the time of the last change of a cache namespace, used as a Last-Modified floor by conditional GETs
+
+    :param namespace: The namespace, e.g. "events"
+    :return: The time of the last bump, or the time of the first read when it is not known
+    """
+    return datetime.fromtimestamp(cache.get_or_set(_changed_at_key(namespace), time.time, timeout=None), timezone.utc)
+
+
+def bump_namespace_version(namespace: str) -> None:
+    """
+    Invalidate every cached response of a namespace by moving it to a new version
+    """
+    key = _version_key(namespace)
+    try:
+        cache.add(key, _initial_version(), timeout=None)
+        cache.incr(key)
+        cache.set(_changed_at_key(namespace), time.time(), timeout=None)
+    except Exception:
+        logger.exception("Error invalidating response cache namespace %s", namespace)
+
+
+def invalidate_on_commit(namespace: str) -> None:
+    """
+    Bump a namespace once the current transaction commits, so readers never cache pre-commit data
+    """
+    transaction.on_commit(lambda: bump_namespace_version(namespace))
+
+
+def build_cache_key(namespace: str, request, version: int) -> str:
+    language = request.headers.get("Accept-Language", "")
+    # Anonymous requests share entries, authenticated users get their own
+    user = getattr(request, "user", None)
+    user_id = user.pk if user is not None and user.is_authenticated else ""
+    digest = hashlib.sha256(f"{request.get_full_path()}|{language}|{user_id}".encode("utf-8")).hexdigest()
+    return f"response-cache:{namespace}:v{version}:{digest}"
+
+
+def cached_response(namespace: str, timeout: int = None):
+    """
+    Cache the rendered JSON of a public GET view method, keyed by path, query string, Accept-Language
+    and the authenticated user
+
+    :param namespace: The namespace whose version is bumped when the underlying data changes
+    :param timeout: Cache timeout in seconds, defaults to settings.RESPONSE_CACHE_TIMEOUT
+    """
+
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method != "GET":
+                return view_method(self, request, *args, **kwargs)
+
+            try:
+                key = build_cache_key(namespace, request, get_namespace_version(namespace))
+                cached = cache.get(key)
+            except Exception:
+                logger.exception("Error reading response cache namespace %s", namespace)
+                return view_method(self, request, *args, **kwargs)
+
+            if cached is not None:
+                response_cache_hits_total.labels(namespace=namespace).inc()
+                status_code, content = cached
+                return HttpResponse(content, status=status_code, content_type="application/json")
+
+            response_cache_misses_total.labels(namespace=namespace).inc()
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                try:
+                    content = JSONRenderer().render(response.data)
+                    cache.set(
+                        key, (response.status_code, content),
+                        timeout=timeout or settings.RESPONSE_CACHE_TIMEOUT,
+                    )
+                except Exception:
+                    logger.exception("Error writing response cache namespace %s", namespace)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,81 @@
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+# Every token the rules below look at, found in a single pass over the header
+TOKEN_RE = re.compile(
+    r'\b(Edg|Edge|EdgA|EdgiOS|OPR|Opera|SamsungBrowser|Firefox|FxiOS|Chrome|CriOS|Chromium|Safari'
+    r'|Trident|MSIE|iPhone|iPad|iPod|Android|Windows|CrOS|Macintosh|Mac OS X|Linux|X11|Tablet|Kindle|Silk'
+    r'|Mobile)\b'
+)
+
+# Rules are tried in order, the first one with a token in the header wins. Most browsers claim to be
+# the ones they are based on (Edge and Opera send "Chrome/", Chrome sends "Safari/"), so derived
+# browsers come first.
+BROWSER_RULES = (
+    ({'Edg', 'Edge', 'EdgA', 'EdgiOS'}, 'Edge'),
+    ({'OPR', 'Opera'}, 'Opera'),
+    ({'SamsungBrowser'}, 'Samsung Internet'),
+    ({'Firefox', 'FxiOS'}, 'Firefox'),
+    ({'Chrome', 'CriOS', 'Chromium'}, 'Chrome'),
+    ({'Safari'}, 'Safari'),
+    ({'Trident', 'MSIE'}, 'Internet Explorer'),
+)
+
+# iOS user agents say "like Mac OS X" and Android ones "Linux"
+OS_RULES = (
+    ({'iPhone', 'iPad', 'iPod'}, 'iOS'),
+    ({'Android'}, 'Android'),
+    ({'Windows'}, 'Windows'),
+    ({'CrOS'}, 'ChromeOS'),
+    ({'Macintosh', 'Mac OS X'}, 'macOS'),
+    ({'Linux', 'X11'}, 'Linux'),
+)
+
+TABLET_TOKENS = {'iPad', 'Tablet', 'Kindle', 'Silk'}
+MOBILE_TOKENS = {'Mobile', 'iPhone', 'iPod'}
+DESKTOP_OS = {'Windows', 'macOS', 'Linux', 'ChromeOS'}
+
+
+class UserAgent(NamedTuple):
+    device_type: str
+    browser: str
+    os: str
+
+
+UNKNOWN = UserAgent('unknown', 'Unknown', 'Unknown')
+
+
+def _match(rules, tokens: set) -> str:
+    for names, name in rules:
+        if tokens & names:
+            return name
+    return 'Unknown'
+
+
+@lru_cache(maxsize=1024)
+def parse_user_agent(user_agent: str) -> UserAgent:
+    """
+    Classify a User-Agent header, the results of the most recent ones are cached
+
+    :param user_agent: The raw header
+    :return: UserAgent with device_type (one of LoginHistory's), browser and os
+    """
+    if not user_agent:
+        return UNKNOWN
+
+    tokens = set(TOKEN_RE.findall(user_agent))
+    browser = _match(BROWSER_RULES, tokens)
+    os = _match(OS_RULES, tokens)
+
+    # Android tablets are the Android devices without "Mobile"
+    if tokens & TABLET_TOKENS or (os == 'Android' and not tokens & MOBILE_TOKENS):
+        device_type = 'tablet'
+    elif tokens & MOBILE_TOKENS:
+        device_type = 'mobile'
+    elif os in DESKTOP_OS:
+        device_type = 'desktop'
+    else:
+        device_type = 'unknown'
+
+    return UserAgent(device_type, browser, os)
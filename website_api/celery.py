@@ -3,6 +3,15 @@ from __future__ import absolute_import, unicode_literals
 import os
 
 from celery import Celery
+from celery.signals import (
+    before_task_publish,
+    task_failure,
+    task_postrun,
+    task_prerun,
+    task_retry,
+    worker_init,
+    worker_process_shutdown,
+)
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'website_api.settings')
 
@@ -16,3 +25,49 @@ app.autodiscover_tasks()
 @app.task(bind=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
+
+
+# services.metrics and services.task_metrics need the settings, they are imported once the signals fire
+
+@before_task_publish.connect
+def stamp_task_headers(headers=None, **kwargs):
+    from services.metrics import stamp_enqueued_at
+    from services.task_metrics import stamp_published_at
+    stamp_enqueued_at(headers)
+    stamp_published_at(headers)
+
+
+@task_prerun.connect
+def record_task_start(task_id=None, task=None, **kwargs):
+    from services.task_metrics import task_started
+    task_started(task_id, task)
+
+
+@task_postrun.connect
+def record_task_end(task_id=None, task=None, state=None, **kwargs):
+    from services.task_metrics import task_finished
+    task_finished(task_id, task, state)
+
+
+@task_failure.connect
+def record_task_failure(sender=None, exception=None, **kwargs):
+    from services.task_metrics import task_failed
+    task_failed(sender, exception)
+
+
+@task_retry.connect
+def record_task_retry(sender=None, **kwargs):
+    from services.task_metrics import task_retried
+    task_retried(sender)
+
+
+@worker_init.connect
+def start_metrics_exporter(**kwargs):
+    from services.metrics import start_worker_exporter
+    start_worker_exporter()
+
+
+@worker_process_shutdown.connect
+def mark_metrics_process_dead(pid=None, **kwargs):
+    from services.metrics import mark_process_dead
+    mark_process_dead(pid)
@@ -1,3 +1,4 @@
+import json
 import os
 
 from utils.main import load_documentation
@@ -10,7 +11,7 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "oauth2_provider.contrib.rest_framework.OAuth2Authentication",
+        "apps.users.authentication.CachedOAuth2Authentication",
     ),
     "DEFAULT_THROTTLE_CLASSES": [
         "rest_framework.throttling.AnonRateThrottle",
@@ -102,11 +103,154 @@ else:
     STATIC_ROOT = os.path.join(BASE_DIR, 'static')
     STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Cache settings
+REDIS_URL = os.getenv("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": "website_api",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Public GET responses (events, projects, organizers) are cached until the data changes
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", 60 * 60))
+
+# Notification preferences are cached per process for a few seconds and in the shared cache until
+# NotificationSettings is saved, the timeouts bound how stale a missed invalidation can get
+NOTIFICATION_PREFERENCES_LOCAL_TTL = int(os.getenv("NOTIFICATION_PREFERENCES_LOCAL_TTL", 10))
+NOTIFICATION_PREFERENCES_CACHE_TIMEOUT = int(os.getenv("NOTIFICATION_PREFERENCES_CACHE_TIMEOUT", 5 * 60))
+
+# Resolved access tokens are cached per process (LRU of AUTH_TOKEN_LOCAL_CACHE_SIZE tokens) and in the
+# shared cache. Deleting a token evicts it at once from the shared cache, other processes keep accepting
+# it for at most AUTH_TOKEN_LOCAL_TTL seconds (0 disables the local cache)
+AUTH_TOKEN_LOCAL_TTL = int(os.getenv("AUTH_TOKEN_LOCAL_TTL", 5))
+AUTH_TOKEN_LOCAL_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_LOCAL_CACHE_SIZE", 10000))
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.getenv("AUTH_TOKEN_CACHE_TIMEOUT", 5 * 60))
+# Expired access and refresh tokens deleted per statement of prune_expired_tokens_task
+TOKEN_PRUNE_BATCH_SIZE = int(os.getenv("TOKEN_PRUNE_BATCH_SIZE", 1000))
+
+# Logins are buffered in Redis and written by drain_login_history_task, LOGIN_HISTORY_BATCH_SIZE rows per
+# insert. The new location check uses each user's known locations, kept in Redis this long after a login
+LOGIN_HISTORY_BATCH_SIZE = int(os.getenv("LOGIN_HISTORY_BATCH_SIZE", 500))
+LOGIN_KNOWN_LOCATIONS_TTL = int(os.getenv("LOGIN_KNOWN_LOCATIONS_TTL", 180 * 24 * 60 * 60))
+# IP ranges compiled by the compile_geoip command, logins are located offline. Processes map the file
+# when they first need it, restart them after compiling a new one
+GEOIP_DATABASE_PATH = os.getenv("GEOIP_DATABASE_PATH", "")
+
 # Celery settings
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL')
 CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND')
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
+# Long notification chunks should not hold back the tasks queued behind them
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+# Redis delivers an unacknowledged message again after visibility_timeout seconds, and late acknowledged
+# tasks such as process_digest_campaign_task are only acknowledged when they return: keep it above
+# the duration of the longest campaign
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    "visibility_timeout": int(os.getenv("CELERY_VISIBILITY_TIMEOUT", 12 * 60 * 60)),
+}
+
+# Each queue has its own workers (see docker-compose.yml), so an OTP never waits behind a fan-out:
+# interactive: a user is waiting for it (OTP, security alerts), short tasks
+# transactional: one notification about one user's action, the default
+# bulk: fan-outs to many users, long tasks
+CELERY_TASK_DEFAULT_QUEUE = "transactional"
+CELERY_TASK_ROUTES = {
+    "apps.users.tasks.send_email_otp_task": {"queue": "interactive"},
+    "apps.users.tasks.send_registration_otp_task": {"queue": "interactive"},
+    "apps.users.tasks.send_new_location_login_alert_task": {"queue": "interactive"},
+    # Not listed: dispatch_notification_outbox_task runs on the default queue for the registration confirmations
+    # and the retries, on the interactive queue when a security alert is queued and on the bulk queue for the
+    # fan-out retries (see CELERY_BEAT_SCHEDULE)
+    "apps.users.tasks.prune_expired_tokens_task": {"queue": "bulk"},
+    "apps.events.tasks.notify_users_on_new_event_task": {"queue": "bulk"},
+    "apps.events.tasks.send_event_notification_chunk_task": {"queue": "bulk"},
+    "apps.events.tasks.finalize_notification_campaign_task": {"queue": "bulk"},
+    "apps.events.tasks.notify_users_on_event_cancelled_task": {"queue": "bulk"},
+    "apps.events.tasks.send_event_reminders_task": {"queue": "bulk"},
+    "apps.events.tasks.send_monthly_digest_task": {"queue": "bulk"},
+    "apps.events.tasks.process_digest_campaign_task": {"queue": "bulk"},
+}
+
+# Number of users notified by each task of a notification campaign
+NOTIFICATION_CHUNK_SIZE = int(os.getenv("NOTIFICATION_CHUNK_SIZE", 500))
+# Users per checkpoint of a monthly digest campaign, at most this many are notified twice after a crash
+DIGEST_BATCH_SIZE = int(os.getenv("DIGEST_BATCH_SIZE", 200))
+# Seconds a run holds a digest campaign, renewed after each batch: must exceed the time to send one batch.
+# Once it has passed, e.g. after a worker crash, another run may resume the campaign
+DIGEST_CAMPAIGN_LEASE = int(os.getenv("DIGEST_CAMPAIGN_LEASE", 15 * 60))
+# Registrations reminded per batch of send_event_reminders_task
+REMINDER_BATCH_SIZE = int(os.getenv("REMINDER_BATCH_SIZE", 500))
+
+# Notification outbox: notifications claimed per dispatcher transaction, and the retry policy.
+# A failed delivery is retried after RETRY_DELAY * 2^(attempts - 1) seconds, capped at MAX_RETRY_DELAY
+NOTIFICATION_OUTBOX_BATCH_SIZE = int(os.getenv("NOTIFICATION_OUTBOX_BATCH_SIZE", 50))
+NOTIFICATION_OUTBOX_MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_OUTBOX_MAX_ATTEMPTS", 6))
+NOTIFICATION_OUTBOX_RETRY_DELAY = int(os.getenv("NOTIFICATION_OUTBOX_RETRY_DELAY", 60))
+NOTIFICATION_OUTBOX_MAX_RETRY_DELAY = int(os.getenv("NOTIFICATION_OUTBOX_MAX_RETRY_DELAY", 60 * 60))
+# Seconds a dispatcher holds the batch it claimed, must exceed the time to deliver a batch
+NOTIFICATION_OUTBOX_LEASE = int(os.getenv("NOTIFICATION_OUTBOX_LEASE", 30 * 60))
+
+# SMS sending rate shared by every worker through Redis (per process without REDIS_URL):
+# messages per second and burst size per Twilio sender number, and optionally per destination
+# calling code, e.g. SMS_RATE_LIMIT_PER_COUNTRY='{"237": {"rate": 5, "capacity": 10}}'.
+# A send waits up to SMS_RATE_LIMIT_MAX_WAIT seconds for its turn, then is reported as rate limited
+SMS_RATE_LIMIT_PER_SENDER = {
+    "rate": float(os.getenv("SMS_RATE_LIMIT_PER_SENDER", 1)),
+    "capacity": float(os.getenv("SMS_RATE_LIMIT_BURST", 5)),
+}
+SMS_RATE_LIMIT_PER_COUNTRY = json.loads(os.getenv("SMS_RATE_LIMIT_PER_COUNTRY", "{}"))
+SMS_RATE_LIMIT_MAX_WAIT = float(os.getenv("SMS_RATE_LIMIT_MAX_WAIT", 10))
+# SMSService.send_bulk keeps rate x SMS_EXPECTED_LATENCY (seconds of a Twilio request) requests in flight,
+# enough to send at SMS_RATE_LIMIT_PER_SENDER, and never more than SMS_MAX_IN_FLIGHT. With the defaults
+# (1 message per second, 0.5 second requests) the messages go out one after the other
+SMS_EXPECTED_LATENCY = float(os.getenv("SMS_EXPECTED_LATENCY", 0.5))
+SMS_MAX_IN_FLIGHT = int(os.getenv("SMS_MAX_IN_FLIGHT", 8))
+# Seconds to connect to the Twilio API and to wait for its answer
+TWILIO_CONNECT_TIMEOUT = float(os.getenv("TWILIO_CONNECT_TIMEOUT", 3.05))
+TWILIO_READ_TIMEOUT = float(os.getenv("TWILIO_READ_TIMEOUT", 10))
+
+# Circuit breakers of the SMTP server and the Twilio API, shared by every worker through the cache:
+# FAILURE_THRESHOLD failures within FAILURE_WINDOW seconds stop the calls for RESET_TIMEOUT seconds
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", 5))
+CIRCUIT_BREAKER_FAILURE_WINDOW = int(os.getenv("CIRCUIT_BREAKER_FAILURE_WINDOW", 60))
+CIRCUIT_BREAKER_RESET_TIMEOUT = int(os.getenv("CIRCUIT_BREAKER_RESET_TIMEOUT", 30))
+
+# Port of the Prometheus exporter started by each Celery worker, 0 to disable it
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", 0))
+
+CELERY_BEAT_SCHEDULE = {
+    # Picks up the notifications waiting for a retry
+    "dispatch-notification-outbox": {
+        "task": "apps.users.tasks.dispatch_notification_outbox_task",
+        "schedule": 60.0,
+    },
+    # Retries the fan-out notifications deferred by the SMS rate limit or an open circuit breaker
+    "dispatch-bulk-notification-outbox": {
+        "task": "apps.users.tasks.dispatch_notification_outbox_task",
+        "schedule": 60.0,
+        "kwargs": {"bulk": True},
+        "options": {"queue": "bulk"},
+    },
+    # Writes the buffered logins, new location alerts wait for it
+    "drain-login-history": {
+        "task": "apps.users.tasks.drain_login_history_task",
+        "schedule": 10.0,
+    },
+    "prune-expired-tokens": {
+        "task": "apps.users.tasks.prune_expired_tokens_task",
+        "schedule": 60.0 * 60,
+    },
+}
 
 # Django Debug ToolBar settings
 if os.getenv("ENVIRONMENT") == "development":
@@ -0,0 +1,8 @@
+from website_api.settings import *  # noqa
+
+# The test runner has no broker, tasks queued by the code under test (e.g. the OTP sent by the
+# User post_save signal) run in the test process instead
+CELERY_TASK_ALWAYS_EAGER = True
+
+# Tests revoke tokens and expect the next request to be rejected, the tests of the local cache enable it
+AUTH_TOKEN_LOCAL_TTL = 0